@@ -0,0 +1,237 @@
+"""
+End-to-end bidding benchmark across scraper engines.
+
+Every engine logs in and registers N courses against a fresh emulated portal
+(benchmarks/portal_emulator.py, same seed for every run). Each run happens in
+its own Python process, started in a temporary directory whose config.ini
+points at the emulator, so CPU time and peak RSS belong to that engine alone.
+
+Reported per engine (median over --repeat runs):
+    login_s             login time
+    first_bid_s         start of the run until the first bid reached the portal
+    total_s             start of the run until register_courses returned
+    requests_per_course unit-page and bid requests per course
+    requests_total      every request the portal saw, login included
+    cpu_s               CPU time of the engine process
+    peak_rss_mb         peak resident memory of the engine process (not browser children)
+    registered          bids the portal accepted
+
+Results are written as JSON (tagged with the current git commit) so runs from
+different commits can be compared with --baseline.
+
+Usage:
+    python -m benchmarks.bench_bidding --courses 10 --latency 100
+    python -m benchmarks.bench_bidding --baseline benchmarks/results/<earlier>.json
+"""
+
+import argparse
+import configparser
+import importlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from .portal_emulator import EmulatorOptions, PortalEmulator
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT_DIR, 'benchmarks', 'results')
+
+# engine name -> "module:class"; add new engines here
+ENGINES = {
+    'request': 'src.scrapers.request_scraper:RequestScraper',
+    'async': 'src.scrapers.async_request_scraper:AsyncRequestScraper',
+    'playwright': 'src.scrapers.playwright_scraper:PlaywrightScraper',
+}
+
+METRICS = ('login_s', 'first_bid_s', 'total_s', 'requests_per_course', 'requests_total',
+           'cpu_s', 'peak_rss_mb', 'registered')
+BID_PAGES = ('registerUnitSurvey.jsp', 'registerUnitProSurvey.jsp')
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB, or None where unsupported."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_child(engine: str, courses_json: str) -> dict:
+    """Run one engine in this process and return its own measurements."""
+    from src.utils.timetable_reader import Course
+
+    module_name, class_name = ENGINES[engine].split(':')
+    scraper_class = getattr(importlib.import_module(module_name), class_name)
+    courses = [Course(**course) for course in json.loads(courses_json)]
+
+    scraper = scraper_class()
+    if hasattr(scraper, 'set_headless_mode'):
+        scraper.set_headless_mode(True)
+    if hasattr(scraper, 'set_max_retries'):
+        scraper.set_max_retries(1)
+
+    started_at = time.time()
+    cpu_start = time.process_time()
+    try:
+        logged_in = scraper.login('2101234', 'benchmark')
+        login_s = time.time() - started_at
+        if not logged_in:
+            raise Exception('login failed')
+        scraper.register_courses(courses)
+        total_s = time.time() - started_at
+    finally:
+        if hasattr(scraper, 'cleanup'):
+            scraper.cleanup()
+
+    return {
+        'started_at': started_at,
+        'login_s': login_s,
+        'total_s': total_s,
+        'cpu_s': time.process_time() - cpu_start,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def build_courses(emulator: PortalEmulator, count: int) -> list:
+    """Pick `count` emulated units and prefer their first two groups of each type."""
+    courses = []
+    for code, groups in sorted(emulator.state.units.items())[:count]:
+        slots = {}
+        for kind in ('L', 'T', 'P'):
+            numbers = sorted(group.number for group in groups.values() if group.kind == kind)
+            if numbers:
+                slots[kind] = numbers[:2]
+        courses.append({'code': code, 'name': emulator.state.unit_names[code], 'slots': slots})
+    return courses
+
+
+def run_engine(engine: str, args) -> dict:
+    """Start a fresh emulator, run the engine in a child process and combine both views."""
+    options = EmulatorOptions(latency_ms=args.latency, jitter_ms=args.jitter, capacity=args.capacity,
+                              units=max(args.courses, 1), seed=args.seed)
+    with PortalEmulator(options) as emulator, tempfile.TemporaryDirectory() as workdir:
+        config = configparser.ConfigParser(interpolation=None)
+        config.read(os.path.join(ROOT_DIR, 'config.ini'))
+        config['URLs']['base_url'] = emulator.base_url
+        config['Storage']['sqlite_db_path'] = os.path.join(workdir, 'app.db')
+        with open(os.path.join(workdir, 'config.ini'), 'w') as f:
+            config.write(f)
+
+        courses = build_courses(emulator, args.courses)
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT_DIR, os.environ.get('PYTHONPATH')])))
+        process = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_bidding', '--child', engine, '--courses-json', json.dumps(courses)],
+            cwd=workdir, env=env, capture_output=True, text=True, timeout=args.timeout,
+        )
+        if process.returncode != 0:
+            raise RuntimeError(process.stderr.strip().splitlines()[-1] if process.stderr.strip() else 'child failed')
+        child = json.loads(process.stdout.strip().splitlines()[-1])
+
+        stats = emulator.state.stats
+        first_bid = emulator.state.first_seen.get('registerUnitProSurvey.jsp')
+        return {
+            'login_s': child['login_s'],
+            'first_bid_s': first_bid - child['started_at'] if first_bid else None,
+            'total_s': child['total_s'],
+            'requests_per_course': sum(stats[page] for page in BID_PAGES) / max(len(courses), 1),
+            'requests_total': stats['total'],
+            'cpu_s': child['cpu_s'],
+            'peak_rss_mb': child['peak_rss_mb'],
+            'registered': stats['registered'],
+        }
+
+
+def median_of(runs: list) -> dict:
+    result = {}
+    for metric in METRICS:
+        values = [run[metric] for run in runs if run.get(metric) is not None]
+        result[metric] = statistics.median(values) if values else None
+    return result
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+                              capture_output=True, text=True).stdout.strip() or 'unknown'
+    except OSError:
+        return 'unknown'
+
+
+def print_report(results: dict, baseline: dict = None) -> None:
+    print(f"{'engine':<12}" + ''.join(f"{metric:>21}" for metric in METRICS))
+    for engine, result in results.items():
+        if 'error' in result:
+            print(f"{engine:<12} skipped: {result['error']}")
+            continue
+        cells = []
+        for metric in METRICS:
+            value = result[metric]
+            cell = '-' if value is None else f"{value:.3f}"
+            previous = (baseline or {}).get(engine, {}).get(metric)
+            if value is not None and previous:
+                cell += f" ({(value - previous) / previous:+.0%})"
+            cells.append(f"{cell:>21}")
+        print(f"{engine:<12}" + ''.join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end bidding benchmark against the emulated portal')
+    parser.add_argument('--engines', default=','.join(ENGINES), help='Comma-separated engines to run')
+    parser.add_argument('--courses', type=int, default=10, help='Courses to register per run')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per engine; the median is reported')
+    parser.add_argument('--latency', type=float, default=100.0, help='Emulated portal latency in ms')
+    parser.add_argument('--jitter', type=float, default=20.0, help='Emulated latency jitter in ms')
+    parser.add_argument('--capacity', type=int, default=0, help='Emulated server capacity, 0 for unlimited')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=300.0, help='Seconds before a run is abandoned')
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/<time>-<commit>.json)')
+    parser.add_argument('--baseline', help='Earlier result file to compare against')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--courses-json', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.courses_json)))
+        return
+
+    results = {}
+    for engine in [name.strip() for name in args.engines.split(',') if name.strip()]:
+        if engine not in ENGINES:
+            results[engine] = {'error': 'unknown engine'}
+            continue
+        runs = []
+        try:
+            for _ in range(args.repeat):
+                runs.append(run_engine(engine, args))
+            results[engine] = median_of(runs)
+        except Exception as e:
+            results[engine] = {'error': str(e)}
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+    print_report(results, baseline)
+
+    commit = git_commit()
+    output = args.output or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'commit': commit,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'options': {key: getattr(args, key) for key in ('courses', 'repeat', 'latency', 'jitter', 'capacity', 'seed')},
+            'results': results,
+        }, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == '__main__':
+    main()
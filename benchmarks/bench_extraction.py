@@ -0,0 +1,88 @@
+"""
+Micro-benchmark of the HTML extraction backends.
+
+Runs every available extractor over the saved portal pages in
+benchmarks/fixtures and reports parse time and memory allocations per page
+type. Both backends must return the same fields; a mismatch is reported.
+Allocation counts come from tracemalloc and therefore only cover Python-level
+objects, not memory allocated inside lxml's C parser.
+
+Usage:
+    python -m benchmarks.bench_extraction [--repeat 200]
+"""
+
+import argparse
+import os
+import statistics
+import time
+import tracemalloc
+
+from src.scrapers.extraction import EXTRACTORS, LxmlExtractor, lxml
+from src.scrapers.unit_offering import FORM_FIELDS
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# page type -> (fixture file, extraction call)
+PAGE_TYPES = {
+    'login': ('login.html', lambda extractor, content: extractor.login_form(content)),
+    'unit': ('unit.html', lambda extractor, content: (
+        extractor.hidden_inputs(content, FORM_FIELDS), extractor.unit_table(content)
+    )),
+    'result': ('result_success.html', lambda extractor, content: extractor.red_message(content)),
+}
+
+
+def load_fixture(name: str) -> bytes:
+    with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+        return f.read()
+
+
+def measure(extract, extractor, content: bytes, repeat: int) -> dict:
+    """Time `repeat` runs and trace allocations of one more."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        extract(extractor, content)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    extract(extractor, content)
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = snapshot.statistics('filename')
+
+    return {
+        'mean_us': statistics.mean(timings) * 1e6,
+        'p95_us': sorted(timings)[int(len(timings) * 0.95) - 1] * 1e6,
+        'alloc_blocks': sum(stat.count for stat in stats),
+        'peak_kib': peak / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark HTML extraction backends')
+    parser.add_argument('--repeat', type=int, default=200, help='Timed runs per page type and backend')
+    args = parser.parse_args()
+
+    backends = [name for name in EXTRACTORS if name != LxmlExtractor.name or lxml is not None]
+    if LxmlExtractor.name not in backends:
+        print('lxml is not installed; only the bs4 backend will be measured.\n')
+
+    print(f"{'page':<8} {'backend':<8} {'mean us':>10} {'p95 us':>10} {'blocks':>8} {'peak KiB':>10}")
+    for page, (fixture, extract) in PAGE_TYPES.items():
+        content = load_fixture(fixture)
+        outputs = {}
+        for backend in backends:
+            extractor = EXTRACTORS[backend]()
+            outputs[backend] = extract(extractor, content)
+            result = measure(extract, extractor, content, args.repeat)
+            print(f"{page:<8} {backend:<8} {result['mean_us']:>10.1f} {result['p95_us']:>10.1f} "
+                  f"{result['alloc_blocks']:>8} {result['peak_kib']:>10.1f}")
+        first = next(iter(outputs.values()))
+        if any(output != first for output in outputs.values()):
+            print(f"  ! backends disagree on {page}: {outputs}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""
+Correctness check and benchmark of the clash-free timetable search.
+
+First checks parse_meeting on hand-written Day/Time cells (12 AM/PM,
+minute precision, rejected ranges) and week_mask on touching and
+overlapping meetings. Then compares solve_timetable with an exhaustive
+reference on random small instances: every solution must be clash-free
+when its meetings are compared minute by minute, and the best solution and
+the ranked alternatives must be exactly the ones the reference ranks first.
+A mismatch is printed and the run exits with status 1. Finally times the
+search on larger random instances.
+
+Usage:
+    python -m benchmarks.bench_solver [--instances 300] [--courses 8] [--repeat 20]
+"""
+
+import argparse
+import itertools
+import logging
+import random
+import statistics
+import sys
+import time
+
+from src.scrapers.unit_offering import parse_meeting
+from src.utils.timetable_reader import Course
+from src.utils.timetable_solver import solve_timetable, week_mask
+
+# (day cell, time cell, expected (day, start minute, end minute) or None)
+MEETING_CASES = [
+    ("Mon", "10:00 AM - 12:00 PM", (0, 600, 720)),
+    ("Tue", "12:00 PM - 1:30 PM", (1, 720, 810)),
+    ("Wed", "12:00 AM - 1:00 AM", (2, 0, 60)),
+    ("Thursday", "11:00 AM - 1:00 PM", (3, 660, 780)),
+    ("fri", "9:05 am - 9:55 am", (4, 545, 595)),
+    ("SAT", "8:00 PM-10:00 PM", (5, 1200, 1320)),
+    ("Sun", "2:00 PM - 2:00 PM", None),       # empty range
+    ("Mon", "3:00 PM - 1:00 PM", None),       # ends before it starts
+    ("Tue", "11:00 PM - 12:00 AM", None),     # runs past midnight
+    ("Mon", "10:00 - 12:00", None),           # no AM/PM
+    ("Xyz", "10:00 AM - 12:00 PM", None),
+    ("", "", None),
+]
+
+# (meetings of one group, meetings of another, whether they clash)
+MASK_CASES = [
+    ([(0, 600, 720)], [(0, 720, 840)], False),   # back to back
+    ([(0, 600, 720)], [(0, 690, 780)], True),
+    ([(0, 600, 720)], [(1, 600, 720)], False),   # same time, other day
+    ([(0, 600, 650)], [(0, 650, 700)], True),    # both cover the 10:30 half hour
+    ([(6, 1380, 1440)], [(0, 0, 30)], False),    # Sunday night and Monday morning
+]
+
+DAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri')
+
+
+def check_meetings() -> list:
+    failures = []
+    for day, time_range, expected in MEETING_CASES:
+        result = parse_meeting(day, time_range)
+        if result != expected:
+            failures.append(f"parse_meeting({day!r}, {time_range!r}) = {result}, expected {expected}")
+    for first, second, clash in MASK_CASES:
+        if bool(week_mask(first) & week_mask(second)) != clash:
+            failures.append(f"week_mask clash of {first} and {second} should be {clash}")
+    return failures
+
+
+def random_instance(rng: random.Random, courses: int, max_groups: int) -> tuple:
+    """Random courses with half-hour aligned meetings, so minute and mask clashes agree."""
+    course_list, group_times = [], {}
+    for index in range(courses):
+        code = f"UECS{2001 + index}"
+        slots, times = {}, {}
+        for kind in rng.sample(('L', 'T', 'P'), rng.randint(1, 3)):
+            numbers = list(range(1, rng.randint(1, max_groups) + 1))
+            for number in numbers:
+                meetings = []
+                # A group never clashes with itself: its meetings are on different days
+                for day in rng.sample(range(len(DAYS)), rng.randint(1, 2)):
+                    start = rng.randrange(16, 36) * 30
+                    meetings.append((day, start, start + rng.choice((60, 90, 120))))
+                # Some preferred groups are not offered
+                if rng.random() > 0.1:
+                    times[(kind, number)] = meetings
+            rng.shuffle(numbers)
+            slots[kind] = numbers
+        course_list.append(Course(code, code, slots))
+        group_times[code] = times
+    return course_list, group_times
+
+
+def overlaps(meetings: list) -> bool:
+    for (day_a, start_a, end_a), (day_b, start_b, end_b) in itertools.combinations(meetings, 2):
+        if day_a == day_b and start_a < end_b and start_b < end_a:
+            return True
+    return False
+
+
+def reference_costs(courses: list, group_times: dict, limit: int) -> list:
+    """Cost of the best `limit` assignments, found by trying every choice of every course."""
+    per_course = []
+    for course in courses:
+        times = group_times.get(course.code, {})
+        choices = []
+        ranked = [[(rank, (kind, number)) for rank, number in enumerate(numbers) if (kind, number) in times]
+                  for kind, numbers in course.slots.items() if numbers]
+        if all(ranked):
+            for combination in itertools.product(*ranked):
+                meetings = [meeting for _, group in combination for meeting in times[group]]
+                if not overlaps(meetings):
+                    choices.append((tuple(rank for rank, _ in combination), meetings))
+        choices.append(None)   # the course is dropped
+        per_course.append(choices)
+
+    costs = []
+    for assignment in itertools.product(*per_course):
+        meetings = [meeting for choice in assignment if choice for meeting in choice[1]]
+        if overlaps(meetings):
+            continue
+        # Courses without any clash-free combination are reported apart and left out of the cost
+        ranked = [choice for choice, options in zip(assignment, per_course) if len(options) > 1]
+        costs.append((sum(1 for choice in ranked if choice is None),)
+                     + tuple((0, choice[0]) if choice else (1,) for choice in ranked))
+    costs.sort()
+    return costs[:limit]
+
+
+def check_solver(instances: int, alternatives: int, seed: int) -> list:
+    failures = []
+    rng = random.Random(seed)
+    for instance in range(instances):
+        courses, group_times = random_instance(rng, rng.randint(2, 4), 3)
+        solutions = solve_timetable(courses, group_times, alternatives=alternatives, max_nodes=10 ** 6)
+        expected = reference_costs(courses, group_times, alternatives + 1)
+        if [solution.cost for solution in solutions] != expected:
+            failures.append(f"instance {instance}: costs {[s.cost for s in solutions]}, expected {expected}")
+            continue
+        for solution in solutions:
+            meetings = [meeting for code, chosen in solution.choices.items()
+                        for kind, number in chosen.items() for meeting in group_times[code][(kind, number)]]
+            if overlaps(meetings):
+                failures.append(f"instance {instance}: solution {solution.choices} has a clash")
+            fitted = set(solution.choices) | set(solution.dropped)
+            if fitted != {course.code for course in courses}:
+                failures.append(f"instance {instance}: solution covers {sorted(fitted)}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check and benchmark the timetable search')
+    parser.add_argument('--instances', type=int, default=300, help='Random instances checked against the reference')
+    parser.add_argument('--courses', type=int, default=8, help='Courses per timed instance, about one semester')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed instances')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    # The solver logs every search at INFO; thousands of them would bury the report
+    logging.getLogger('src.utils.timetable_solver').setLevel(logging.WARNING)
+
+    failures = check_meetings()
+    print(f"meeting and mask cases: {len(MEETING_CASES) + len(MASK_CASES)} checked")
+    failures += check_solver(args.instances, alternatives=3, seed=args.seed)
+    print(f"solver: {args.instances} random instances compared with the exhaustive reference")
+    for failure in failures:
+        print(f"  ! {failure}")
+
+    rng = random.Random(args.seed + 1)
+    timings, drops = [], []
+    for _ in range(args.repeat):
+        courses, group_times = random_instance(rng, args.courses, 6)
+        start = time.perf_counter()
+        solutions = solve_timetable(courses, group_times)
+        timings.append(time.perf_counter() - start)
+        drops.append(len(solutions[0].dropped) if solutions else args.courses)
+    print(f"{args.courses}-course instances: median {statistics.median(timings) * 1000:.1f} ms, "
+          f"max {max(timings) * 1000:.1f} ms, median {statistics.median(drops)} dropped in the best")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Micro-benchmark of settings and course round trips through the SQLite store.
+
+Compares the previous behaviour, a fresh sqlite3 connection per call in the
+default rollback-journal mode, with the long-lived per-thread WAL connection
+of Database. Each operation is the call the GUI makes: loading and saving the
+settings, listing the courses and saving the course list after swapping two
+neighbours. Reports mean, p95 and max latency; the max is what a user would
+notice as a hitch.
+
+Usage:
+    python -m benchmarks.bench_storage [--courses 200] [--repeat 300]
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from src.storage.database import CourseRepository, Database, SettingsRepository
+from src.utils.timetable_reader import Course
+
+
+class PerCallDatabase(Database):
+    """Database as it was before: a new connection for every call, never closed."""
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def close(self) -> None:
+        pass
+
+
+def measure(operation, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operation()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        'mean_us': statistics.mean(timings) * 1e6,
+        'p95_us': timings[int(len(timings) * 0.95) - 1] * 1e6,
+        'max_us': timings[-1] * 1e6,
+    }
+
+
+def run(database_cls, path: str, courses: list, repeat: int) -> dict:
+    database = database_cls(path)
+    settings = SettingsRepository(database)
+    course_repo = CourseRepository(database)
+    course_repo.replace_courses(courses)
+    values = dict(SettingsRepository.DEFAULT_SETTINGS, student_id="2101234")
+    order = list(courses)
+
+    def swap_and_save():
+        order[10], order[11] = order[11], order[10]
+        course_repo.replace_courses(order)
+
+    results = {
+        'load_settings': measure(settings.load_settings, repeat),
+        'save_settings': measure(lambda: settings.save_settings(values), repeat),
+        'list_courses': measure(course_repo.list_courses, repeat),
+        'move_course': measure(swap_and_save, repeat),
+    }
+    database.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark SQLite settings and course round trips')
+    parser.add_argument('--courses', type=int, default=200, help='Courses in the stored list')
+    parser.add_argument('--repeat', type=int, default=300, help='Timed calls per operation')
+    args = parser.parse_args()
+
+    courses = [Course(f"UECS{1000 + index}", f"UNIT {index}", {'L': [1, 2], 'T': [1, 2, 3], 'P': [1]})
+               for index in range(args.courses)]
+
+    workdir = tempfile.mkdtemp(prefix='bench-storage-')
+    try:
+        variants = {'per-call': PerCallDatabase, 'long-lived': Database}
+        print(f"{'operation':<14} {'variant':<11} {'mean us':>10} {'p95 us':>10} {'max us':>10}")
+        results = {name: run(cls, os.path.join(workdir, f"{name}.db"), courses, args.repeat)
+                   for name, cls in variants.items()}
+        for operation in results['per-call']:
+            for name in variants:
+                result = results[name][operation]
+                print(f"{operation:<14} {name:<11} {result['mean_us']:>10.1f} {result['p95_us']:>10.1f} "
+                      f"{result['max_us']:>10.1f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
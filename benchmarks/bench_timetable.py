@@ -0,0 +1,129 @@
+"""
+Benchmark of timetable imports on large generated TTAP exports.
+
+Generates TTAP-style files with a NOTE header and one block per course, where
+some blocks lack a P line, and reads them with the previous list-based reader
+(readlines, a rigid 5-line stride, regex compiled per line) and with the
+streaming TimetableReader. Reports best and median wall time, courses per
+second and peak traced memory. The legacy reader mis-parses files with
+variable block shapes, so course counts are compared on uniform files only.
+
+Usage:
+    python -m benchmarks.bench_timetable [--courses 20000] [--files 4] [--repeat 5]
+"""
+
+import argparse
+import os
+import random
+import re
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from src.utils.timetable_reader import Course, TimetableReader
+
+TTAP_HEADER = (
+    "NOTE: This timetable was generated by TTAP. Verify every group before registering.\n"
+    "Generated for session 202610\n"
+    "Course list\n\n"
+)
+
+
+def generate_export(path: str, courses: int, seed: int, variable: bool) -> None:
+    """Write a TTAP export with `courses` blocks; `variable` drops the P line from some blocks."""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(TTAP_HEADER)
+        for index in range(courses):
+            f.write(f"U{chr(65 + seed % 26)}CS{index:05d}\n")
+            f.write(f"GENERATED UNIT {index}\n")
+            kinds = ('L', 'T') if variable and rng.random() < 0.3 else ('L', 'T', 'P')
+            for kind in kinds:
+                groups = " or ".join(str(number) for number in rng.sample(range(1, 13), rng.randint(1, 4)))
+                f.write(f"{kind}({groups}) - {kind} group preference\n")
+            f.write("\n")
+
+
+def legacy_read_timetable(filename: str) -> list:
+    """The reader as it was before streaming: whole-file lists and a fixed stride."""
+    with open(filename, "r", encoding="utf-8-sig") as file:
+        lines = list(filter(lambda line: line != '\n', file.readlines()))
+        if lines[0].startswith('NOTE'):
+            lines = lines[3:]
+
+    courses = []
+    for i in range(0, len(lines), 5):
+        course_lines = lines[i:i + 5]
+        slots = {}
+        for j in range(2, 5):
+            if j >= len(course_lines):
+                break
+            slot = re.search(r'(L|T|P)\((.*)\) -', course_lines[j])
+            if not slot:
+                continue
+            slots[slot.group(1)] = list(map(lambda num: int(num), slot.group(2).split(" or ")))
+        courses.append(Course(course_lines[0].strip(), course_lines[1].strip() if len(course_lines) > 1 else '', slots))
+    return courses
+
+
+def measure(read, paths: list, repeat: int) -> dict:
+    timings = []
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = sum(len(read(path)) for path in paths)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    for path in paths:
+        read(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = min(timings)
+    return {'courses': count, 'best_ms': best * 1000, 'median_ms': statistics.median(timings) * 1000,
+            'per_sec': count / best, 'peak_kib': peak / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark timetable imports')
+    parser.add_argument('--courses', type=int, default=20000, help='Courses per generated file')
+    parser.add_argument('--files', type=int, default=4, help='Number of generated files')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per reader')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-timetable-')
+    try:
+        for shape in ('uniform', 'variable'):
+            shape_dir = os.path.join(workdir, shape)
+            os.makedirs(shape_dir)
+            paths = []
+            for index in range(args.files):
+                path = os.path.join(shape_dir, f"export-{index}.txt")
+                generate_export(path, args.courses, seed=index, variable=shape == 'variable')
+                paths.append(path)
+
+            readers = {
+                'legacy': legacy_read_timetable,
+                'streaming': lambda path: TimetableReader.read_timetables(path).courses,
+            }
+            print(f"\n{shape} blocks, {args.files} files x {args.courses} courses")
+            print(f"{'reader':<10} {'courses':>8} {'best ms':>10} {'median ms':>10} {'courses/s':>12} {'peak KiB':>10}")
+            for name, read in readers.items():
+                result = measure(read, paths, args.repeat)
+                print(f"{name:<10} {result['courses']:>8} {result['best_ms']:>10.1f} {result['median_ms']:>10.1f} "
+                      f"{result['per_sec']:>12.0f} {result['peak_kib']:>10.1f}")
+
+            # Directory import goes through the same streaming path
+            start = time.perf_counter()
+            imported = TimetableReader.read_timetables(shape_dir)
+            print(f"directory import: {len(imported.courses)} unique courses, {len(imported.errors)} reported lines "
+                  f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
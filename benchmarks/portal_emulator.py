@@ -0,0 +1,483 @@
+"""
+Local stand-in for the UTAR course registration portal.
+
+Emulates the pages the scrapers talk to so the login -> register_courses flow
+can be run and measured on any machine:
+
+    login.jsp                       login form with preKap and a Kaptcha image
+    Kaptcha.jpg                     CAPTCHA image (a fresh code per request)
+    loginProSurvey.jsp              login POST ("Invalid code" / "Invalid ID or password")
+    studentRegistrationSurvey.jsp   home page with the tblGrid student table
+    registerUnitSurvey.jsp          unit page with hidden fields and group rows
+    registerUnitProSurvey.jsp       bid submit, decrementing group vacancies
+    masterScheduleSurvey.jsp        master schedule of every emulated unit (reqUnit filters one)
+
+Requests without a valid session get the portal's session-expired JavaScript
+redirect. Latency, server capacity and failure rates are configurable.
+
+Usage:
+    python -m benchmarks.portal_emulator --port 8080 --latency 150
+
+then point config.ini at it:
+
+    [URLs]
+    base_url = http://127.0.0.1:8080/portal/courseRegStu
+"""
+
+import argparse
+import html
+import posixpath
+import random
+import secrets
+import struct
+import threading
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+BASE_PATH = '/portal/courseRegStu'
+DAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri']
+
+PAGE_HEAD = '''<!DOCTYPE HTML PUBLIC "-//W3C//DTD HTML 4.01 Transitional//EN">
+<html>
+<head>
+<meta http-equiv="Content-Type" content="text/html; charset=UTF-8">
+<title>Course Registration System</title>
+</head>
+<body>
+'''
+PAGE_TAIL = '''<div class="footer">Copyright &copy; Universiti Tunku Abdul Rahman. All rights reserved.</div>
+</body>
+</html>
+'''
+SESSION_EXPIRED_PAGE = '''<html>
+<head>
+<script type="text/javascript">
+window.parent.location.href = "../login.jsp?msg=sessionExpired";
+</script>
+</head>
+<body></body>
+</html>
+'''
+
+
+@dataclass
+class EmulatorOptions:
+    """Behaviour knobs of the emulated portal."""
+    latency_ms: float = 0.0            # added to every response
+    jitter_ms: float = 0.0             # uniform +/- spread around latency_ms
+    capacity: int = 0                  # requests served at once, 0 for unlimited
+    failure_rate: float = 0.0          # share of requests answered with 503
+    captcha_failure_rate: float = 0.0  # share of logins rejected with "Invalid code"
+    session_ttl: float = 1800.0        # idle seconds before a session expires
+    student_id: str = ''               # accepted credentials, empty accepts any
+    password: str = ''
+    units: int = 40                    # units listed in the master schedule
+    seed: int = 0
+
+
+@dataclass
+class Group:
+    """One class group of an emulated unit."""
+    req_mid: str
+    kind: str
+    number: int
+    sessions: List[tuple]   # (day, start hour, hours, room)
+    capacity: int
+    vacancy: int
+
+
+@dataclass
+class Session:
+    """Server-side state of one JSESSIONID."""
+    last_seen: float
+    prekap: str = ''
+    captcha: str = ''
+    student_id: str = ''
+    registered: Dict[str, List[str]] = field(default_factory=dict)
+
+
+def _clock(hour: int) -> str:
+    suffix = 'AM' if hour < 12 else 'PM'
+    return f"{(hour - 1) % 12 + 1:02d}:00 {suffix}"
+
+
+def _blank_png(width: int = 100, height: int = 36) -> bytes:
+    """Encode a white PNG with the standard library only."""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        body = kind + data
+        return struct.pack('>I', len(data)) + body + struct.pack('>I', zlib.crc32(body) & 0xffffffff)
+
+    raw = b''.join(b'\x00' + b'\xff' * (width * 3) for _ in range(height))
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw))
+            + chunk(b'IEND', b''))
+
+
+class PortalState:
+    """Units, sessions and request counters shared by all handler threads."""
+
+    def __init__(self, options: EmulatorOptions):
+        self.options = options
+        self.lock = threading.Lock()
+        self.sessions: Dict[str, Session] = {}
+        self.units: Dict[str, Dict[str, Group]] = {}
+        self.unit_names: Dict[str, str] = {}
+        self.stats = Counter()
+        self.first_seen: Dict[str, float] = {}   # page -> time.time() of its first request
+        self.random = random.Random(options.seed)
+        self.capacity = threading.BoundedSemaphore(options.capacity) if options.capacity > 0 else None
+        self.captcha_image = _blank_png()
+        for index in range(options.units):
+            self.unit(f"UECS{2001 + index}")
+
+    def unit(self, code: str) -> Dict[str, Group]:
+        """Return the groups of a unit, generating them deterministically on first use."""
+        code = code.upper()
+        if code not in self.units:
+            rng = random.Random(f"{self.options.seed}:{code}")
+            groups = {}
+            for kind, count, hours, capacity in (('L', rng.randint(1, 3), 2, 180),
+                                                 ('T', rng.randint(4, 12), 1, 30),
+                                                 ('P', rng.randint(0, 8), 2, 25)):
+                for number in range(1, count + 1):
+                    sessions = [(rng.choice(DAYS), rng.randint(8, 16), hours, f"{kind}B{rng.randint(100, 399)}")]
+                    if kind == 'L':
+                        sessions.append((rng.choice(DAYS), rng.randint(8, 17), 1, sessions[0][3]))
+                    req_mid = f"{rng.getrandbits(80):020X}"
+                    vacancy = 0 if rng.random() < 0.2 else rng.randint(1, capacity)
+                    groups[req_mid] = Group(req_mid, kind, number, sessions, capacity, vacancy)
+            self.units[code] = groups
+            self.unit_names[code] = f"EMULATED UNIT {code}"
+        return self.units[code]
+
+
+class PortalRequestHandler(BaseHTTPRequestHandler):
+    """Routes portal pages by file name, the way the JSP paths are resolved."""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'Apache-Coyote/1.1'
+
+    @property
+    def state(self) -> PortalState:
+        return self.server.state
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def _dispatch(self, method: str) -> None:
+        url = urlsplit(self.path)
+        page = posixpath.basename(posixpath.normpath(url.path))
+        length = int(self.headers.get('Content-Length') or 0)
+        form = parse_qs(self.rfile.read(length).decode('utf-8', errors='ignore')) if length else {}
+        form.update(parse_qs(url.query))
+
+        state = self.state
+        with state.lock:
+            state.stats[page] += 1
+            state.stats['total'] += 1
+            state.first_seen.setdefault(page, time.time())
+
+        if state.capacity:
+            state.capacity.acquire()
+        try:
+            options = state.options
+            delay = options.latency_ms + state.random.uniform(-options.jitter_ms, options.jitter_ms)
+            if delay > 0:
+                time.sleep(delay / 1000)
+            if state.random.random() < options.failure_rate:
+                with state.lock:
+                    state.stats['failed'] += 1
+                self._send(503, 'Service Unavailable')
+                return
+
+            handler = {
+                'login.jsp': self._login_page,
+                'Kaptcha.jpg': self._captcha,
+                'loginProSurvey.jsp': self._login_process,
+                'studentRegistrationSurvey.jsp': self._home,
+                'registerUnitSurvey.jsp': self._unit_page,
+                'registerUnitProSurvey.jsp': self._submit,
+                'masterScheduleSurvey.jsp': self._master_schedule,
+            }.get(page)
+            if handler is None:
+                self._send(404, 'Not Found')
+            else:
+                handler(method, form)
+        finally:
+            if state.capacity:
+                state.capacity.release()
+
+    def _send(self, status: int, body, content_type: str = 'text/html; charset=UTF-8',
+              cookie: Optional[str] = None) -> None:
+        data = body.encode('utf-8') if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        if cookie:
+            self.send_header('Set-Cookie', f'JSESSIONID={cookie}; Path=/; HttpOnly')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _session(self, create: bool = False) -> tuple:
+        """Return (session id, session); expired or unknown sessions come back as None."""
+        cookies = dict(
+            part.strip().split('=', 1) for part in (self.headers.get('Cookie') or '').split(';') if '=' in part
+        )
+        session_id = cookies.get('JSESSIONID')
+        now = time.monotonic()
+        with self.state.lock:
+            session = self.state.sessions.get(session_id)
+            if session and now - session.last_seen > self.state.options.session_ttl:
+                del self.state.sessions[session_id]
+                session = None
+            if session is None and create:
+                session_id = secrets.token_hex(16).upper()
+                session = self.state.sessions[session_id] = Session(last_seen=now)
+            if session:
+                session.last_seen = now
+        return session_id, session
+
+    def _authenticated(self) -> Optional[Session]:
+        _, session = self._session()
+        if not session or not session.student_id:
+            with self.state.lock:
+                self.state.stats['expired'] += 1
+            self._send(200, SESSION_EXPIRED_PAGE)
+            return None
+        return session
+
+    def _login_page(self, method, form):
+        session_id, session = self._session(create=True)
+        session.prekap = secrets.token_hex(5)
+        self._send(200, PAGE_HEAD + f'''<form name="frmLogin" method="post" action="loginProSurvey.jsp">
+<input type="hidden" name="preKap" value="{session.prekap}">
+<table border="0" class="login">
+  <tr><td>Student ID</td><td><input type="text" name="reqFregkey" size="15"></td></tr>
+  <tr><td>Password</td><td><input type="password" name="reqPassword" size="15"></td></tr>
+  <tr><td>Code</td><td><input type="text" name="kaptchafield" size="6"> <img src="../Kaptcha.jpg?ts={int(time.time())}" border="0"></td></tr>
+  <tr><td colspan="2"><input type="submit" name="Submit" value="Login"></td></tr>
+</table>
+</form>
+''' + PAGE_TAIL, cookie=session_id)
+
+    def _captcha(self, method, form):
+        session_id, session = self._session(create=True)
+        session.captcha = secrets.token_hex(3)[:5]
+        self._send(200, self.state.captcha_image, content_type='image/png', cookie=session_id)
+
+    def _login_process(self, method, form):
+        _, session = self._session()
+        options = self.state.options
+        value = lambda name: (form.get(name) or [''])[0]
+
+        if not session or not session.prekap or value('preKap') != session.prekap:
+            self._send(200, SESSION_EXPIRED_PAGE)
+            return
+        if not session.captcha or self.state.random.random() < options.captcha_failure_rate:
+            session.captcha = ''
+            self._send(200, PAGE_HEAD + '<div class="red">Invalid code. Please try again.</div>' + PAGE_TAIL)
+            return
+        student_id, password = value('reqFregkey'), value('reqPassword')
+        if (not student_id or not password
+                or options.student_id and student_id != options.student_id
+                or options.password and password != options.password):
+            self._send(200, PAGE_HEAD + '<div class="red">Invalid ID or password.</div>' + PAGE_TAIL)
+            return
+
+        session.captcha = ''
+        session.student_id = student_id
+        self._send(200, PAGE_HEAD + '<a href="logout.jsp">Log Out</a>' + PAGE_TAIL)
+
+    def _home(self, method, form):
+        session = self._authenticated()
+        if not session:
+            return
+        self._send(200, PAGE_HEAD + f'''<table id="tblGrid" width="100%" border="0">
+  <tr align="left"><td>Student ID</td><td>{session.student_id}</td><td>Name</td><td>EMULATED STUDENT</td></tr>
+  <tr align="left"><td>Programme</td><td>Bachelor of Computer Science (Honours)</td></tr>
+  <tr align="left"><td>Registered Units</td><td>{len(session.registered)}</td></tr>
+</table>
+<form name="frmUnit" method="post" action="registerUnitSurvey.jsp">
+<input type="hidden" name="reqPaperType" value="M">
+<input type="hidden" name="reqFregkey" value="">
+<input type="text" id="reqUnit" name="reqUnit">
+<input type="submit" name="Save" value="View">
+</form>
+''' + PAGE_TAIL)
+
+    def _unit_page(self, method, form):
+        session = self._authenticated()
+        if not session:
+            return
+        code = (form.get('reqUnit') or [''])[0].upper()
+        with self.state.lock:
+            groups = list(self.state.unit(code).values()) if code else []
+
+        rows = []
+        for group in groups:
+            for index, (day, start, hours, room) in enumerate(group.sessions):
+                first = index == 0
+                rows.append(f'''  <tr align="center">
+    <td>{f'<input type="checkbox" name="reqMid" value="{group.req_mid}">' if first else '&nbsp;'}</td>
+    <td>{group.kind if first else ''}</td>
+    <td>{group.number if first else ''}</td>
+    <td>{day}</td>
+    <td>{_clock(start)} - {_clock(start + hours)}</td>
+    <td>{hours}.0</td>
+    <td>1-14</td>
+    <td>{room}</td>
+    <td>{group.capacity if first else ''}</td>
+    <td>{group.vacancy if first else ''}</td>
+  </tr>''')
+
+        self._send(200, PAGE_HEAD + f'''<form name="frmSummary" method="post" action="registerUnitProSurvey.jsp">
+<input type="hidden" name="reqUnit" value="{html.escape(code)}">
+<input type="hidden" name="reqSid" value="18342">
+<input type="hidden" name="reqSession" value="202610">
+<input type="hidden" name="reqFregkey" value="{session.student_id}">
+<input type="hidden" name="reqPaperType" value="M">
+<input type="hidden" name="reqWithClass" value="Y">
+<input type="hidden" name="act" value="insert">
+<table width="100%" border="1" cellspacing="0" cellpadding="3" class="grid">
+  <tr class="header">
+    <th>Select</th><th>Type</th><th>Group</th><th>Day</th><th>Time</th><th>Hour</th><th>Week</th><th>Room</th><th>Capacity</th><th>Vacancy</th>
+  </tr>
+''' + "\n".join(rows) + '''
+</table>
+<input type="submit" name="Submit" value="Register">
+</form>
+''' + PAGE_TAIL)
+
+    def _submit(self, method, form):
+        session = self._authenticated()
+        if not session:
+            return
+        code = (form.get('reqUnit') or [''])[0].upper()
+        req_mids = form.get('reqMid') or []
+
+        with self.state.lock:
+            groups = self.state.unit(code) if code else {}
+            chosen = [groups.get(req_mid) for req_mid in req_mids]
+            if code in session.registered:
+                message = f"{code} is already in your registration list."
+            elif not chosen or None in chosen or len({group.kind for group in chosen}) != len(chosen):
+                message = "Invalid class selection."
+            else:
+                full = [group for group in chosen if group.vacancy <= 0]
+                if full:
+                    message = f"Class {full[0].kind}{full[0].number} is full. Please select another class."
+                else:
+                    for group in chosen:
+                        group.vacancy -= 1
+                    session.registered[code] = req_mids
+                    self.state.stats['registered'] += 1
+                    message = f"Registration success. {code} has been added to your registration list."
+
+        self._send(200, PAGE_HEAD + f'<div class="red">{html.escape(message)}</div>' + PAGE_TAIL)
+
+    def _master_schedule(self, method, form):
+        wanted = form.get('reqUnit', [''])[0].strip().upper()
+        with self.state.lock:
+            units = {code: list(groups.values()) for code, groups in self.state.units.items()
+                     if not wanted or code == wanted}
+            names = dict(self.state.unit_names)
+
+        parts = [PAGE_HEAD]
+        for code, groups in sorted(units.items()):
+            parts.append(f'<table class="unit" border="1">\n  <tr class="unitHeader"><td colspan="8">'
+                         f'<b>{code}</b> - {names[code]}</td></tr>\n'
+                         '  <tr class="header"><th>Type</th><th>Group</th><th>Day</th><th>Time</th>'
+                         '<th>Hour</th><th>Week</th><th>Room</th><th>Capacity</th></tr>\n')
+            for group in groups:
+                for day, start, hours, room in group.sessions:
+                    parts.append(f'  <tr align="center"><td>{group.kind}</td><td>{group.number}</td>'
+                                 f'<td>{day}</td><td>{_clock(start)} - {_clock(start + hours)}</td>'
+                                 f'<td>{hours}.0</td><td>1-14</td><td>{room}</td><td>{group.capacity}</td></tr>\n')
+            parts.append('</table>\n')
+        parts.append(PAGE_TAIL)
+        self._send(200, ''.join(parts))
+
+
+class PortalEmulator:
+    """Run the emulated portal on a background thread."""
+
+    def __init__(self, options: EmulatorOptions = None, host: str = '127.0.0.1', port: int = 0):
+        self.options = options or EmulatorOptions()
+        self.server = ThreadingHTTPServer((host, port), PortalRequestHandler)
+        self.server.daemon_threads = True
+        self.server.state = PortalState(self.options)
+        self._thread = None
+
+    @property
+    def state(self) -> PortalState:
+        return self.server.state
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}{BASE_PATH}"
+
+    def start(self) -> 'PortalEmulator':
+        self._thread = threading.Thread(target=self.server.serve_forever, name='portal-emulator', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> 'PortalEmulator':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the UTAR registration portal')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0, help='Added latency per response in ms')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Uniform latency jitter in ms')
+    parser.add_argument('--capacity', type=int, default=0, help='Requests served at once, 0 for unlimited')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Share of requests answered with 503')
+    parser.add_argument('--captcha-failure-rate', type=float, default=0.0,
+                        help='Share of logins rejected with "Invalid code"')
+    parser.add_argument('--session-ttl', type=float, default=1800.0, help='Idle seconds before a session expires')
+    parser.add_argument('--student-id', default='', help='Only accept this student ID')
+    parser.add_argument('--password', default='', help='Only accept this password')
+    parser.add_argument('--units', type=int, default=40, help='Units listed in the master schedule')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    options = EmulatorOptions(
+        latency_ms=args.latency, jitter_ms=args.jitter, capacity=args.capacity,
+        failure_rate=args.failure_rate, captcha_failure_rate=args.captcha_failure_rate,
+        session_ttl=args.session_ttl, student_id=args.student_id, password=args.password,
+        units=args.units, seed=args.seed,
+    )
+    emulator = PortalEmulator(options, args.host, args.port)
+    print(f"Emulated portal listening on {emulator.base_url}")
+    print(f"Set [URLs] base_url = {emulator.base_url} in config.ini to use it.")
+    try:
+        emulator.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -74,6 +74,8 @@ def build_executable():
         "--hidden-import=PyQt5.QtWidgets",
         "--hidden-import=requests",
         "--hidden-import=bs4",
+        "--hidden-import=lxml.html",
+        "--hidden-import=aiohttp",
         "--hidden-import=selenium",
         "--hidden-import=ddddocr",
     ])
@@ -9,10 +9,13 @@ def parse_arguments():
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(description='UTAR Course Registration Scraper')
     parser.add_argument('--timetable-file', type=str, help='Path to the timetable file')
-    parser.add_argument('--method', type=str, choices=['request', 'playwright', 'beautifulsoup', 'selenium'], 
-                        help='Scraping method to use (request or playwright)')
+    parser.add_argument('--method', type=str, choices=['request', 'async', 'playwright', 'beautifulsoup', 'selenium'], 
+                        help='Scraping method to use (request, async or playwright)')
     parser.add_argument('--start', action='store_true',
                         help='Start the application immediately')
+    parser.add_argument('--fire-at', type=str,
+                        help='Bidding window opening time (HH:MM[:SS] today or an ISO date-time); '
+                             'bids are prepared in advance and submitted at that moment (request method only)')
     return parser.parse_args()
 
 if __name__ == '__main__':
@@ -5,14 +5,15 @@ Course management widget for the UTAR Course Registration Scraper.
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
                            QLabel, QLineEdit, QTableWidget, QTableWidgetItem,
                            QHeaderView, QMessageBox, QGroupBox, QFormLayout, 
-                           QFileDialog)
-from PyQt5.QtCore import Qt, pyqtSignal
+                           QFileDialog, QListWidget, QListWidgetItem)
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
 import json
 import os
 from ..utils.timetable_reader import TimetableReader, Course
 from ..utils.logger import setup_logger
 from ..utils.config import BASE_DIR
-from ..storage.database import Database, CourseRepository
+from ..storage.database import CatalogRepository, CourseRepository, get_database
+from ..scrapers.schedule_crawler import ScheduleCrawler
 
 logger = setup_logger(__name__)
 
@@ -23,23 +24,39 @@ class DropLineEdit(QLineEdit):
         self.setAcceptDrops(True)
         
     def dragEnterEvent(self, event):
-        if event.mimeData().hasUrls() and len(event.mimeData().urls()) == 1:
+        if event.mimeData().hasUrls():
             event.acceptProposedAction()
             
     def dragMoveEvent(self, event):
-        if event.mimeData().hasUrls() and len(event.mimeData().urls()) == 1:
+        if event.mimeData().hasUrls():
             event.acceptProposedAction()
             
     def dropEvent(self, event):
-        if event.mimeData().hasUrls() and len(event.mimeData().urls()) == 1:
-            file_path = event.mimeData().urls()[0].toLocalFile()
-            self.setText(file_path)
-            # Process the file via the parent widget
+        if event.mimeData().hasUrls():
+            file_paths = [url.toLocalFile() for url in event.mimeData().urls()]
+            self.setText("; ".join(file_paths))
+            # Process the files and folders via the parent widget
             parent_widget = self.window().findChild(CourseManagerWidget)
             if parent_widget:
-                parent_widget._process_imported_file(file_path)
+                parent_widget._process_imported_files(file_paths)
             event.acceptProposedAction()
 
+class CatalogCrawlThread(QThread):
+    """Crawls the master schedule without blocking the UI."""
+    crawled = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, crawler: ScheduleCrawler):
+        super().__init__()
+        self.crawler = crawler
+
+    def run(self):
+        try:
+            self.crawled.emit(self.crawler.crawl())
+        except Exception as e:
+            logger.error(f"Master schedule crawl failed: {str(e)}")
+            self.failed.emit(str(e))
+
 class CourseManagerWidget(QWidget):
     """Integrated Widget for managing courses."""
     
@@ -52,10 +69,15 @@ class CourseManagerWidget(QWidget):
         app_data_dir = os.path.join(BASE_DIR, 'data')
         os.makedirs(app_data_dir, exist_ok=True)
         self.courses_file = os.path.join(app_data_dir, 'courses.json')
-        self.course_repo = CourseRepository(Database())
+        self.course_repo = CourseRepository(get_database())
         self.course_repo.migrate_from_json(self.courses_file)
         self.courses = self._load_courses()
         
+        # Local copy of the master schedule for lookups while typing
+        self.catalog = CatalogRepository(self.course_repo.database)
+        self.cookie_provider = None
+        self.crawl_thread = None
+        
         self.selected_course = None
         self._setup_ui()
         self._populate_course_list()
@@ -71,7 +93,7 @@ class CourseManagerWidget(QWidget):
         
         self.import_path = DropLineEdit()
         self.import_path.setReadOnly(True)
-        self.import_path.setPlaceholderText("Drag & drop a TTAP/courses json file here or click Browse...")
+        self.import_path.setPlaceholderText("Drag & drop TTAP/courses json files or folders here or click Browse...")
         
         import_btn = QPushButton("Browse...")
         import_btn.setObjectName("btn_import_course")
@@ -123,6 +145,34 @@ class CourseManagerWidget(QWidget):
         details_group = QGroupBox("Course Details")
         details_layout = QVBoxLayout()
         
+        # Catalog lookup: pick a unit to fill in its code, name and every group
+        catalog_group = QGroupBox("Course Catalog")
+        catalog_layout = QVBoxLayout()
+        
+        catalog_search_layout = QHBoxLayout()
+        self.catalog_search = QLineEdit()
+        self.catalog_search.setPlaceholderText("Search the master schedule by code or name...")
+        self.catalog_search.textChanged.connect(self._on_catalog_search)
+        catalog_search_layout.addWidget(self.catalog_search)
+        
+        self.catalog_update_button = QPushButton("Update Catalog")
+        self.catalog_update_button.setObjectName("btn_update_catalog")
+        self.catalog_update_button.clicked.connect(self._update_catalog)
+        catalog_search_layout.addWidget(self.catalog_update_button)
+        catalog_layout.addLayout(catalog_search_layout)
+        
+        self.catalog_results = QListWidget()
+        self.catalog_results.setMaximumHeight(120)
+        self.catalog_results.itemClicked.connect(self._fill_from_catalog)
+        catalog_layout.addWidget(self.catalog_results)
+        
+        self.catalog_status = QLabel()
+        catalog_layout.addWidget(self.catalog_status)
+        self._show_catalog_size()
+        
+        catalog_group.setLayout(catalog_layout)
+        details_layout.addWidget(catalog_group)
+        
         form_layout = QFormLayout()
         self.code_input = QLineEdit()
         self.code_input.setPlaceholderText("e.g., UCCD1003")
@@ -215,6 +265,65 @@ class CourseManagerWidget(QWidget):
         self.tutorial_slots.setText(", ".join(map(str, course.slots.get('T', []))))
         self.practical_slots.setText(", ".join(map(str, course.slots.get('P', []))))
     
+    def _show_catalog_size(self):
+        try:
+            count = len(self.catalog.unit_hashes())
+        except Exception as e:
+            logger.error(f"Failed to read the course catalog: {str(e)}")
+            count = 0
+        if count:
+            self.catalog_status.setText(f"{count} units in the catalog")
+        else:
+            self.catalog_status.setText("Catalog is empty; click Update Catalog to download the master schedule")
+    
+    def _on_catalog_search(self, text: str):
+        self.catalog_results.clear()
+        if len(text.strip()) < 2:
+            return
+        try:
+            matches = self.catalog.search_units(text)
+        except Exception as e:
+            logger.error(f"Catalog search failed: {str(e)}")
+            return
+        for code, name in matches:
+            item = QListWidgetItem(f"{code} - {name}")
+            item.setData(Qt.UserRole, code)
+            self.catalog_results.addItem(item)
+    
+    def _fill_from_catalog(self, item: QListWidgetItem):
+        course = self.catalog.unit_course(item.data(Qt.UserRole))
+        if not course:
+            return
+        self.code_input.setText(course.code)
+        self.name_input.setText(course.name)
+        self.lecture_slots.setText(", ".join(map(str, course.slots.get('L', []))))
+        self.tutorial_slots.setText(", ".join(map(str, course.slots.get('T', []))))
+        self.practical_slots.setText(", ".join(map(str, course.slots.get('P', []))))
+    
+    def set_cookie_provider(self, provider):
+        """Use the portal cookies returned by `provider` when crawling the master schedule."""
+        self.cookie_provider = provider
+    
+    def _update_catalog(self):
+        if self.crawl_thread and self.crawl_thread.isRunning():
+            return
+        cookies = self.cookie_provider() if self.cookie_provider else None
+        self.crawl_thread = CatalogCrawlThread(ScheduleCrawler(self.catalog, cookies))
+        self.crawl_thread.crawled.connect(self._on_catalog_crawled)
+        self.crawl_thread.failed.connect(self._on_catalog_crawl_failed)
+        self.catalog_update_button.setEnabled(False)
+        self.catalog_status.setText("Downloading the master schedule...")
+        self.crawl_thread.start()
+    
+    def _on_catalog_crawled(self, result):
+        self.catalog_update_button.setEnabled(True)
+        self.catalog_status.setText(result.summary())
+        self._on_catalog_search(self.catalog_search.text())
+    
+    def _on_catalog_crawl_failed(self, error: str):
+        self.catalog_update_button.setEnabled(True)
+        self.catalog_status.setText(f"Catalog update failed: {error}")
+    
     def _parse_slots(self, slot_text: str) -> list:
         if not slot_text.strip():
             return []
@@ -321,22 +430,39 @@ class CourseManagerWidget(QWidget):
             self._save_courses(show_message=False)
     
     def _import_courses(self):
-        filename, _ = QFileDialog.getOpenFileName(
-            self, "Select Course File", "", "Text Files (*.txt);;JSON Files (*.json);;All Files (*.*)"
+        filenames, _ = QFileDialog.getOpenFileNames(
+            self, "Select Course Files", "", "Text Files (*.txt);;JSON Files (*.json);;All Files (*.*)"
         )
-        if filename:
-            self.import_path.setText(filename)
-            self._process_imported_file(filename)
+        if filenames:
+            self.import_path.setText("; ".join(filenames))
+            self._process_imported_files(filenames)
             
     def _process_imported_file(self, file_path):
+        self._process_imported_files([file_path])
+    
+    def _process_imported_files(self, file_paths):
         try:
-            if file_path.lower().endswith('.json'):
-                with open(file_path, 'r') as f:
+            courses = []
+            json_paths = [path for path in file_paths if path.lower().endswith('.json')]
+            for path in json_paths:
+                with open(path, 'r') as f:
                     data = json.load(f)
-                    self.courses = [Course(**course) for course in data]
-            else:
-                self.courses = TimetableReader.read_timetable(file_path)
-                
+                    courses.extend(Course(**course) for course in data)
+            
+            timetable_paths = [path for path in file_paths if path not in json_paths]
+            if timetable_paths:
+                imported = TimetableReader.read_timetables(timetable_paths)
+                courses.extend(imported.courses)
+                if imported.errors:
+                    details = "\n".join(str(error) for error in imported.errors[:10])
+                    more = f"\n... and {len(imported.errors) - 10} more" if len(imported.errors) > 10 else ""
+                    QMessageBox.warning(
+                        self, "Import Warnings",
+                        f"Imported {len(imported.courses)} courses; {len(imported.errors)} lines were skipped:\n\n"
+                        f"{details}{more}"
+                    )
+            
+            self.courses = courses
             self._populate_course_list()
             self._save_courses(show_message=False)
         except Exception as e:
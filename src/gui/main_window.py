@@ -6,19 +6,22 @@ import os
 import sys
 import threading
 import time
+from datetime import date, datetime, time as dt_time
 
+from ..scrapers.async_request_scraper import AsyncRequestScraper
 from ..scrapers.playwright_scraper import PlaywrightScraper
 from ..scrapers.request_scraper import RequestScraper
 
 from PyQt5 import uic
-from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtCore import QThread, QTimer, pyqtSignal
 from PyQt5.QtGui import QIcon
 from PyQt5.QtWidgets import (
     QApplication, QComboBox, QFormLayout, QGroupBox, QHBoxLayout,
     QLabel, QLineEdit, QMainWindow, QMessageBox, QPushButton,
     QTextEdit, QVBoxLayout, QWidget,
 )
-from ..utils.config import BASE_DIR, WINDOW_POSITION, WINDOW_SIZE, WINDOW_TITLE
+from ..utils.captcha_solver import get_captcha_solver
+from ..utils.config import BASE_DIR, SETTINGS_FLUSH_DELAY, WINDOW_POSITION, WINDOW_SIZE, WINDOW_TITLE
 from ..utils.logger import setup_crash_logging, setup_logger
 from ..utils.settings import Settings
 from .course_manager import CourseManagerWidget
@@ -47,15 +50,44 @@ class ScraperThread(QThread):
 
     finished = pyqtSignal(bool, str)
     progress = pyqtSignal(str)
+    events = pyqtSignal(list)   # batches of RegistrationEvent
 
-    def __init__(self, scraper, method, student_id, password, courses=None):
+    # Registration events are forwarded in batches so a long retry loop
+    # does not flood the GUI thread with one signal per step
+    EVENT_BATCH_INTERVAL = 0.1
+    EVENT_BATCH_SIZE = 50
+
+    def __init__(self, scraper, method, student_id, password, courses=None, fire_at=None):
         super().__init__()
         self.scraper = scraper
         self.method = method
         self.student_id = student_id
         self.password = password
         self.courses = courses or []
+        self.fire_at = fire_at
         self.is_running = True
+        self._event_buffer = []
+        self._event_lock = threading.Lock()
+        self._flush_stop = threading.Event()
+
+    def _queue_event(self, event):
+        """Buffer an event from a scraper thread; a full batch is flushed at once."""
+        with self._event_lock:
+            self._event_buffer.append(event)
+            full = len(self._event_buffer) >= self.EVENT_BATCH_SIZE
+        if full:
+            self._flush_events()
+
+    def _flush_events(self):
+        with self._event_lock:
+            batch, self._event_buffer = self._event_buffer, []
+        if batch:
+            self.events.emit(batch)
+
+    def _flush_periodically(self):
+        # run() blocks without an event loop, so a QTimer here would never fire
+        while not self._flush_stop.wait(self.EVENT_BATCH_INTERVAL):
+            self._flush_events()
 
     def run(self):
         try:
@@ -64,7 +96,11 @@ class ScraperThread(QThread):
                 return
 
             self.scraper.reset_cancellation()
-            if self.method == "Request":
+            if hasattr(self.scraper, "set_event_listener"):
+                self.scraper.set_event_listener(self._queue_event)
+                self._flush_stop.clear()
+                threading.Thread(target=self._flush_periodically, name="event-flusher", daemon=True).start()
+            if self.method in ("Request", "Async"):
                 try:
                     self.progress.emit("Attempting to log in to UTAR course registration system...")
                     if self.scraper.login(self.student_id, self.password):
@@ -73,7 +109,13 @@ class ScraperThread(QThread):
                                 self.progress.emit(
                                     f"Login successful. Attempting to register {len(self.courses)} courses..."
                                 )
-                                result_text, success = self.scraper.register_courses(self.courses)
+                                if self.fire_at is not None:
+                                    result_text, success = self.scraper.register_courses(
+                                        self.courses, fire_at=self.fire_at
+                                    )
+                                else:
+                                    result_text, success = self.scraper.register_courses(self.courses)
+                                self._flush_events()
                                 self.finished.emit(success, result_text)
                             except Exception as error:
                                 logger.error(f"Critical error in course registration: {error}")
@@ -121,6 +163,10 @@ class ScraperThread(QThread):
             else:
                 self.finished.emit(False, f"Scraping failed: {error_msg}")
         finally:
+            self._flush_stop.set()
+            if hasattr(self.scraper, "set_event_listener"):
+                self.scraper.set_event_listener(None)
+            self._flush_events()
             if self.method == "Playwright" and self.scraper:
                 try:
                     self.scraper.cleanup()
@@ -166,10 +212,17 @@ class MainWindow(QMainWindow):
             self.setWindowIcon(QIcon(icon_path))
 
         self.settings = Settings()
+        # Restarted by every change so a burst of edits is written once
+        self.settings_timer = QTimer(self)
+        self.settings_timer.setSingleShot(True)
+        self.settings_timer.setInterval(int(SETTINGS_FLUSH_DELAY * 1000))
+        self.settings_timer.timeout.connect(self._flush_settings)
         self.request_scraper = RequestScraper()
+        self.async_scraper = AsyncRequestScraper()
         self.playwright_scraper = PlaywrightScraper()
         self.scraper_thread = None
         self.courses = []
+        self.fire_at = None
 
         self._setup_ui()
         self._setup_logging()
@@ -195,6 +248,7 @@ class MainWindow(QMainWindow):
         self.course_manager = CourseManagerWidget(self)
         self.page_courses.layout().addWidget(self.course_manager)
         self.course_manager.course_updated.connect(self._on_courses_updated)
+        self.course_manager.set_cookie_provider(lambda: self.request_scraper.sessions.jar)
 
         self._setup_navigation()
         self._setup_dynamic_controls()
@@ -260,6 +314,7 @@ class MainWindow(QMainWindow):
         self.font_size_spin.valueChanged.connect(self._on_font_size_changed)
 
         self.radio_bs4.toggled.connect(self._on_engine_selection_changed)
+        self.radio_async.toggled.connect(self._on_engine_selection_changed)
         self.radio_playwright.toggled.connect(self._on_engine_selection_changed)
 
     def _setup_logging(self):
@@ -274,11 +329,13 @@ class MainWindow(QMainWindow):
 
     def _get_selected_method(self) -> str:
         if self.radio_bs4.isChecked(): return "Request"
+        if self.radio_async.isChecked(): return "Async"
         if self.radio_playwright.isChecked(): return "Playwright"
         return "Request"
 
     def _set_method_controls(self, method: str):
         if method == "Playwright": self.radio_playwright.setChecked(True)
+        elif method == "Async": self.radio_async.setChecked(True)
         else: self.radio_bs4.setChecked(True)
 
     def _load_settings(self):
@@ -287,7 +344,7 @@ class MainWindow(QMainWindow):
 
         method = self.settings.get_method()
         if method == "BeautifulSoup": method = "Request"
-        else: method = "Playwright"
+        elif method not in ("Request", "Async"): method = "Playwright"
 
         self._set_method_controls(method)
         self.headless_checkbox.setChecked(self.settings.get_headless_mode())
@@ -305,6 +362,14 @@ class MainWindow(QMainWindow):
             max_retries=int(self.retry_combo.currentText()),
             font_size=int(self.font_size_spin.value()),
         )
+        if self.settings.dirty:
+            self.settings_timer.start()
+
+    def _flush_settings(self):
+        try:
+            self.settings.flush()
+        except Exception as error:
+            logger.error(f"Failed to save settings: {error}")
 
     def _apply_font_size(self, value: int):
         apply_stylesheet(self, value)
@@ -355,15 +420,28 @@ class MainWindow(QMainWindow):
         self.stop_button.setEnabled(True)
         logger.info(f"Starting {method} scraping with {len(self.courses)} courses...")
 
-        scraper = self.playwright_scraper if method == "Playwright" else self.request_scraper
+        scrapers = {
+            "Request": self.request_scraper,
+            "Async": self.async_scraper,
+            "Playwright": self.playwright_scraper,
+        }
+        scraper = scrapers[method]
         if method == "Playwright":
             scraper.set_headless_mode(self.headless_checkbox.isChecked())
         else:
             scraper.set_max_retries(int(self.retry_combo.currentText()))
 
-        self.scraper_thread = ScraperThread(scraper, method, student_id, password, self.courses)
+        fire_at = None
+        if self.fire_at is not None:
+            if method == "Request":
+                fire_at = self.fire_at
+            else:
+                logger.warning(f"Scheduled bidding is only supported by the Request method; {method} starts now")
+
+        self.scraper_thread = ScraperThread(scraper, method, student_id, password, self.courses, fire_at)
         self.scraper_thread.finished.connect(self._on_scraping_finished)
         self.scraper_thread.progress.connect(self._on_progress)
+        self.scraper_thread.events.connect(self._on_events)
         self.scraper_thread.start()
 
     def _stop_scraping(self):
@@ -391,6 +469,9 @@ class MainWindow(QMainWindow):
         self.results_display.append(message)
         logger.info(message)
 
+    def _on_events(self, batch: list):
+        self.results_display.append("\n".join(event.to_text() for event in batch))
+
     def _on_courses_updated(self, courses):
         self.courses = courses
         logger.info(f"Courses updated: {len(courses)} courses loaded")
@@ -403,6 +484,29 @@ class MainWindow(QMainWindow):
             logger.error(f"Failed to load courses on startup: {error}")
             self.courses = []
 
+    def set_fire_at(self, value):
+        """
+        Schedule bid submission for the moment the bidding window opens.
+
+        Args:
+            value (str): "HH:MM[:SS]" for today or an ISO 8601 date-time, in local time
+
+        Returns:
+            bool: True if the time was understood
+        """
+        try:
+            if "T" in value or "-" in value:
+                moment = datetime.fromisoformat(value)
+            else:
+                moment = datetime.combine(date.today(), dt_time.fromisoformat(value))
+        except ValueError:
+            logger.error(f"Invalid --fire-at time: {value}")
+            return False
+
+        self.fire_at = moment.timestamp()
+        logger.info(f"Bids will be submitted at {moment.isoformat(sep=' ')}")
+        return True
+
     def set_timetable_file(self, file_path):
         if file_path and os.path.exists(file_path):
             try:
@@ -429,7 +533,7 @@ class MainWindow(QMainWindow):
 
     def set_method(self, method):
         method_map = {
-            "request": "Request", "playwright": "Playwright",
+            "request": "Request", "async": "Async", "playwright": "Playwright",
             "beautifulsoup": "Request",
         }
         if method and method.lower() in method_map.keys():
@@ -450,13 +554,29 @@ class MainWindow(QMainWindow):
                 self.scraper_thread.wait(1000)
             except Exception as error:
                 logger.error(f"Error during shutdown cleanup: {error}")
+        crawl_thread = self.course_manager.crawl_thread
+        if crawl_thread and crawl_thread.isRunning():
+            logger.info("Application closing: Waiting for the catalog update...")
+            crawl_thread.wait(2000)
+        try:
+            self.request_scraper.cleanup()
+            self.async_scraper.cleanup()
+        except Exception as error:
+            logger.error(f"Error closing request engines: {error}")
         self._save_settings()
+        self.settings_timer.stop()
+        try:
+            self.settings.close()
+        except Exception as error:
+            logger.error(f"Failed to save settings: {error}")
         event.accept()
 
 def main(args=None):
     """Main entry point for the application."""
 
     app = QApplication(sys.argv)
+    # Load the OCR model while the window is being built, not on the first login
+    get_captcha_solver().warm_up_in_background()
     window = MainWindow()
 
     if args:
@@ -464,6 +584,8 @@ def main(args=None):
             window.set_timetable_file(args.timetable_file)
         if args.method:
             window.set_method(args.method)
+        if getattr(args, "fire_at", None):
+            window.set_fire_at(args.fire_at)
         if args.start:
             window._execute_scraping()
 
@@ -0,0 +1,498 @@
+"""
+Asynchronous request engine built on aiohttp.
+"""
+
+import asyncio
+import time
+from threading import Event
+from typing import Dict, List, Optional
+
+import aiohttp
+
+from ..utils.config import (
+    ASYNC_MAX_CONCURRENCY, BASE_URL, CAPTCHA_MAX_REFETCHES, CAPTCHA_MIN_CONFIDENCE, COURSE_REGISTRATION_URL, DEFAULT_HEADERS,
+    LOGIN_PROCESS_URL, LOGIN_URL, REGISTRATION_PROCESS_URL, REGISTRATION_URL, RETRY_REFRESH_EVERY, SUBMIT_HEADERS
+)
+from ..utils.captcha_solver import get_captcha_solver
+from ..utils.logger import setup_logger
+from ..utils.timetable_reader import Course
+from .base_scraper import BaseScraper
+from .beautifulsoup_scraper import SessionExpiredException
+from .course_run import CourseRun, CourseState
+from .events import EventKind, RegistrationEventSource
+from .extraction import get_extractor
+from .retry_scheduler import RetryScheduler
+from .offering_cache import OfferingCache, content_hash
+from .unit_offering import UnitOffering, parse_unit_offering
+
+logger = setup_logger(__name__)
+
+
+class AsyncRequestScraper(RegistrationEventSource, BaseScraper):
+    """Request engine that fetches every unit page concurrently and bids as soon as each is ready."""
+
+    def __init__(self, max_concurrency: int = ASYNC_MAX_CONCURRENCY, connection_timeout: int = 10):
+        """
+        Initialize the scraper.
+
+        Args:
+            max_concurrency (int): Maximum number of requests in flight at once
+            connection_timeout (int): Total timeout per request in seconds
+        """
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.connection_timeout = connection_timeout
+        self.headers = DEFAULT_HEADERS
+        self.captcha_solver = get_captcha_solver()
+        self.extractor = get_extractor()
+        self.max_retries = 2
+
+        self._loop = asyncio.new_event_loop()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._relogin_lock: Optional[asyncio.Lock] = None
+        self._cancellation_token = Event()
+        # Loop-side mirror of the token, so retry waits wake up on cancel()
+        self._cancel_event: Optional[asyncio.Event] = None
+        # Set by cleanup() while a run is in progress; _run() closes the loop when it returns
+        self._close_requested = False
+
+        self._student_id = None
+        self._password = None
+        self._is_logged_in = False
+        self._login_generation = 0
+
+        # Memory only: lets an unchanged unit page skip parsing on a retry
+        self.offering_cache = OfferingCache()
+
+        logger.info("AsyncRequestScraper initialized")
+
+    def cancel(self) -> None:
+        """Set the cancellation token to stop ongoing operations."""
+        self._cancellation_token.set()
+        cancel_event = self._cancel_event
+        if cancel_event is not None and not self._loop.is_closed():
+            # Called from the GUI thread while the loop runs on the scraper thread
+            self._loop.call_soon_threadsafe(cancel_event.set)
+        logger.info("Cancellation requested")
+
+    def reset_cancellation(self) -> None:
+        """Reset the cancellation token."""
+        self._cancellation_token.clear()
+        self._cancel_event = None
+
+    def set_max_retries(self, max_retries: int) -> None:
+        """
+        Set the maximum number of registration rounds.
+
+        Args:
+            max_retries (int): Maximum number of retries
+        """
+        self.max_retries = max_retries
+        logger.info(f"Max retries set to {self.max_retries}")
+
+    def set_max_concurrency(self, max_concurrency: int) -> None:
+        """
+        Set the number of requests allowed in flight at once.
+
+        Args:
+            max_concurrency (int): Concurrency cap, at least 1
+        """
+        self.max_concurrency = max(1, int(max_concurrency))
+        # The connector is resized by _ensure_session before the next request
+        self._semaphore = None
+        logger.info(f"Max concurrency set to {self.max_concurrency}")
+
+    def _check_cancellation(self) -> None:
+        if self._cancellation_token.is_set():
+            logger.info("Operation cancelled by user")
+            raise Exception("Operation cancelled by user")
+
+    @staticmethod
+    def _is_session_expired(text: str) -> bool:
+        return "window.parent.location.href" in text and "sessionExpired" in text
+
+    def _run(self, coro):
+        """Run a coroutine to completion on the scraper's private event loop."""
+        if self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+            self._semaphore = None
+            self._relogin_lock = None
+            self._cancel_event = None
+        try:
+            return self._loop.run_until_complete(coro)
+        finally:
+            if self._close_requested:
+                self._close_requested = False
+                self._loop.run_until_complete(self._close_session())
+                self._loop.close()
+
+    async def _ensure_session(self) -> aiohttp.ClientSession:
+        cookie_jar = None
+        session = self._session
+        if session is not None and not session.closed and session.connector.limit != self.max_concurrency:
+            # The connector's pool size is fixed, so a new concurrency cap needs a new
+            # session; the cookie jar moves over so the login is kept
+            cookie_jar = session.cookie_jar
+            await session.close()
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, ssl=False)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                # unsafe=True keeps cookies for IP-address hosts such as a local test portal
+                cookie_jar=cookie_jar or aiohttp.CookieJar(unsafe=True),
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.connection_timeout),
+            )
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if self._cancel_event is None:
+            self._cancel_event = asyncio.Event()
+            if self._cancellation_token.is_set():
+                self._cancel_event.set()
+        if self._relogin_lock is None:
+            self._relogin_lock = asyncio.Lock()
+        return self._session
+
+    async def _request(self, method: str, url: str, **kwargs) -> tuple:
+        """
+        Perform one request under the concurrency cap.
+
+        Returns:
+            tuple: (status, final url, body bytes)
+
+        Raises:
+            SessionExpiredException: If the portal answered with the session-expired redirect
+        """
+        self._check_cancellation()
+        session = await self._ensure_session()
+        async with self._semaphore:
+            async with session.request(method, url, **kwargs) as response:
+                body = await response.read()
+                status, final_url = response.status, str(response.url)
+
+        self._check_cancellation()
+        if status == 200 and self._is_session_expired(body.decode('utf-8', errors='ignore')):
+            self._is_logged_in = False
+            raise SessionExpiredException("Session has expired. Please log in again.")
+        return status, final_url, body
+
+    def login(self, student_id: str, password: str, max_retries: int = 5) -> bool:
+        """
+        Log in to the portal, solving the CAPTCHA off the event loop.
+
+        Args:
+            student_id (str): Student ID for login
+            password (str): Password for login
+            max_retries (int): Maximum number of attempts
+
+        Returns:
+            bool: True when the login succeeded
+        """
+        if not student_id or not password:
+            raise Exception("Student ID and password are required!")
+
+        self._student_id = student_id
+        self._password = password
+        return self._run(self._login(max_retries))
+
+    async def _login(self, max_retries: int = 5) -> bool:
+        self._is_logged_in = False
+        for attempt in range(1, max_retries + 1):
+            self._check_cancellation()
+            logger.info(f"Attempting to log in (attempt {attempt}/{max_retries})")
+            try:
+                status, _, body = await self._request('GET', LOGIN_URL)
+                if status != 200:
+                    logger.warning(f"Failed to get login page. Status: {status}")
+                    await asyncio.sleep(1)
+                    continue
+
+                captcha_src, prekap_value = self.extractor.login_form(body)
+                if not captcha_src or prekap_value is None:
+                    logger.warning("CAPTCHA image or preKap value not found, retrying...")
+                    await asyncio.sleep(1)
+                    continue
+
+                captcha_url = f"{BASE_URL}/../{captcha_src.lstrip('../')}"
+                captcha_solution = await self._solve_login_captcha(captcha_url)
+                if captcha_solution is None:
+                    await asyncio.sleep(1)
+                    continue
+
+                payload = {
+                    'preKap': prekap_value,
+                    'reqFregkey': self._student_id,
+                    'reqPassword': self._password,
+                    'kaptchafield': captcha_solution
+                }
+                _, _, body = await self._request('POST', LOGIN_PROCESS_URL, data=payload)
+                text = body.decode('utf-8', errors='ignore')
+                if 'Invalid code' in text:
+                    self.captcha_solver.stats.record_submission(accepted=False)
+                    logger.error("Invalid CAPTCHA code entered. Retrying...")
+                    continue
+                self.captcha_solver.stats.record_submission(accepted=True)
+                if 'Invalid' in text:
+                    raise Exception('Login failed. Please check your credentials.')
+
+                status, _, body = await self._request('GET', COURSE_REGISTRATION_URL)
+                if status != 200 or b'tblGrid' not in body:
+                    logger.warning("Failed to get home page data, retrying...")
+                    await asyncio.sleep(1)
+                    continue
+
+                self._is_logged_in = True
+                self._login_generation += 1
+                logger.info("Async login successful")
+                return True
+
+            except SessionExpiredException:
+                logger.warning("Session expired during login, retrying...")
+                await asyncio.sleep(1)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"Request failed: {str(e)}, retrying...")
+                await asyncio.sleep(1)
+
+        raise Exception(f"Login failed after {max_retries} attempts. Please try again later.")
+
+    async def _solve_login_captcha(self, captcha_url: str) -> Optional[str]:
+        """Fetch and solve the CAPTCHA, refetching the image while the guess is unsure."""
+        for attempt in range(CAPTCHA_MAX_REFETCHES + 1):
+            status, _, image = await self._request('GET', captcha_url)
+            if status != 200:
+                logger.warning(f"Failed to retrieve CAPTCHA image. Status: {status}")
+                return None
+
+            guess = await self._loop.run_in_executor(None, self.captcha_solver.solve_with_confidence, image)
+            if guess.confidence >= CAPTCHA_MIN_CONFIDENCE or attempt == CAPTCHA_MAX_REFETCHES:
+                logger.info(f'CAPTCHA solved: {guess.text} (confidence {guess.confidence:.2f})')
+                return guess.text
+
+            self.captcha_solver.stats.refetched += 1
+            logger.info(f'CAPTCHA guess {guess.text} below confidence threshold, refetching image')
+        return None
+
+    async def _relogin(self, expired_generation: int) -> bool:
+        """
+        Log in again once, no matter how many courses noticed the expiry.
+
+        Args:
+            expired_generation (int): Login generation the caller was using
+
+        Returns:
+            bool: True if a valid login is available afterwards
+        """
+        if not self._student_id or not self._password:
+            logger.warning("Cannot relogin: No stored credentials")
+            return False
+
+        async with self._relogin_lock:
+            if self._is_logged_in and self._login_generation != expired_generation:
+                # Another course already relogged in while this one waited
+                return True
+            logger.info("Attempting to relogin due to session expiration")
+            self._session.cookie_jar.clear()
+            try:
+                return await self._login()
+            except Exception as e:
+                logger.error(f"Error during relogin attempt: {str(e)}")
+                return False
+
+    async def _fetch_unit_offering(self, unit_code: str) -> UnitOffering:
+        data = {
+            'reqPaperType': 'M',
+            'reqFregkey': '',
+            'reqUnit': unit_code,
+            'Save': 'View'
+        }
+        status, _, body = await self._request('POST', REGISTRATION_URL, data=data)
+        if status != 200:
+            raise Exception(f"Failed to fetch course data for {unit_code}. Status: {status}")
+        page_hash = content_hash(body)
+        offering = self.offering_cache.lookup(self._student_id or '', unit_code, page_hash)
+        if offering is None:
+            offering = parse_unit_offering(unit_code, body)
+            self.offering_cache.put(self._student_id or '', offering, page_hash)
+        return offering
+
+    async def _submit_bidding(self, offering: UnitOffering, req_mids: List[str]) -> dict:
+        data_bundle = [
+            ('reqUnit', offering.unit_code),
+            ('reqSid', offering.req_sid),
+            ('reqSession', offering.req_session),
+            ('reqFregkey', offering.student_id),
+            ('reqPaperType', offering.paper_type),
+            ('reqWithClass', offering.req_with_class),
+            ('act', 'insert'),
+        ] + [('reqMid', req_mid) for req_mid in req_mids]
+
+        status, final_url, body = await self._request('POST', REGISTRATION_PROCESS_URL, data=data_bundle, headers=SUBMIT_HEADERS)
+        if status != 200:
+            return {'success': False, 'error': f"Received status code {status}"}
+
+        success_msg = self.extractor.red_message(body)
+        if "insert-success" in final_url or success_msg and "success" in success_msg.lower():
+            return {'success': True, 'message': "Course registration successful!"}
+        return {'success': False, 'error': "Bidding request submitted, but status unclear"}
+
+    async def _register_course(self, run: CourseRun) -> CourseRun:
+        """
+        Fetch, resolve and submit one course, or resubmit its resolved bid.
+
+        Returns:
+            CourseRun: The same run, finished
+        """
+        course = run.course
+        run.lines.append(f"Course: {course.code} - {course.name}")
+        if run.bid is not None:
+            run.lines.append("Resubmitting the resolved groups")
+        self._emit(EventKind.COURSE_STARTED, course.code, f"Registering {course.code} - {course.name}",
+                   attempt=run.attempt)
+        run.state = CourseState.DONE if await self._attempt_course(run) else CourseState.FAILED
+        self._emit(EventKind.OUTCOME, course.code, run.lines[-1], success=run.success, attempt=run.attempt)
+        return run
+
+    async def _attempt_course(self, run: CourseRun) -> bool:
+        course, lines = run.course, run.lines
+        for _ in range(2):
+            generation = self._login_generation
+            try:
+                if run.bid is None:
+                    offering = await self._fetch_unit_offering(course.code)
+                    lines.append(f"Student ID: {offering.student_id}")
+
+                    class_values: Dict[str, str] = {}
+                    for class_type, slot_numbers in course.slots.items():
+                        choice = offering.select(class_type, slot_numbers)
+                        for slot_number, reason in choice.skipped:
+                            lines.append(f"Skipped {class_type}{slot_number}: {reason}")
+                        if choice.req_mid:
+                            class_code = f"{class_type}{choice.slot_number}"
+                            class_values[class_code] = choice.req_mid
+                            lines.append(f"Found {class_code} value: {choice.req_mid[:8]}...")
+                            self._emit(EventKind.GROUP_RESOLVED, course.code, f"Resolved {class_code}",
+                                       attempt=run.attempt)
+
+                    missing_types = {t for t, slots in course.slots.items() if slots} - {c[0] for c in class_values}
+                    if missing_types:
+                        logger.warning(f"Could not find values for all required class types: {missing_types}")
+                        lines.append(f"Missing values for class types: {', '.join(sorted(missing_types))}")
+                        return False
+                    run.offering = offering
+                    run.bid = {'req_mids': list(class_values.values())}
+
+                started = time.perf_counter()
+                bidding_result = await self._submit_bidding(run.offering, run.bid['req_mids'])
+                run.latency = time.perf_counter() - started
+                self._emit(EventKind.BID_SUBMITTED, course.code, "Bid submitted", attempt=run.attempt)
+                if bidding_result.get('success'):
+                    logger.info(f"Successfully registered {course.code}")
+                    lines.append(bidding_result.get('message', 'Registration successful!'))
+                    return True
+
+                logger.warning(f"Registration failed for {course.code}: {bidding_result.get('error')}")
+                lines.append(bidding_result.get('error', 'Registration failed'))
+                return False
+
+            except SessionExpiredException:
+                logger.warning(f"Session expired while registering {course.code}, attempting relogin")
+                if not await self._relogin(generation):
+                    lines.append("Session expired and relogin failed. Please log in again.")
+                    run.session_lost = True
+                    return False
+                lines.append("Session expired but successfully relogged in")
+                # The new session gets a freshly fetched unit page
+                run.offering = run.bid = None
+            except Exception as e:
+                self._check_cancellation()
+                logger.error(f"Error registering course {course.code}: {str(e)}")
+                lines.append(f"Error: {str(e)}")
+                return False
+
+        return False
+
+    async def _register_with_retries(self, run: CourseRun, scheduler: RetryScheduler) -> CourseRun:
+        """Attempt one course until it succeeds or runs out of retries, spaced by the scheduler."""
+        while True:
+            self._check_cancellation()
+            await self._ensure_session()
+            await self._register_course(run)
+            delay = scheduler.record(run.course.code, run.success, run.latency)
+            if run.success or run.session_lost or run.attempt >= self.max_retries:
+                return run
+
+            refresh = RETRY_REFRESH_EVERY and run.attempt % RETRY_REFRESH_EVERY == 0
+            run.retry(reuse_bid=not refresh)
+            self._emit(EventKind.RETRY_SCHEDULED, run.course.code,
+                       f"Retrying in {delay:.2f}s (attempt {run.attempt}/{self.max_retries})",
+                       attempt=run.attempt)
+            await self._wait_or_cancel(delay)
+
+    async def _wait_or_cancel(self, delay: float) -> None:
+        """Sleep for `delay` seconds, returning early and raising if the run is cancelled."""
+        try:
+            await asyncio.wait_for(self._cancel_event.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+        self._check_cancellation()
+
+    async def _register_all(self, courses: List[Course]) -> tuple:
+        scheduler = RetryScheduler()
+        runs = [CourseRun(course) for course in courses]
+        tasks = [asyncio.ensure_future(self._register_with_retries(run, scheduler)) for run in runs]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        # Only each course's latest attempt is reported; progress goes out as events
+        result_text = "Async Request Course Registration Results:\n\n"
+        for run in runs:
+            result_text += "\n".join(run.lines) + "\n\n"
+        return result_text, all(run.success for run in runs)
+
+    def register_courses(self, courses: List[Course]) -> tuple:
+        """
+        Register all courses concurrently.
+
+        Args:
+            courses (list): List of Course objects to register
+
+        Returns:
+            tuple: (result_text, success_status)
+        """
+        if not courses:
+            logger.warning("No courses provided for registration")
+            return "No courses provided for registration", False
+        return self._run(self._register_all(courses))
+
+    def cleanup(self) -> None:
+        """
+        Close the HTTP session and the private event loop.
+
+        If another thread is still inside a run, the run is cancelled, the
+        session is closed on the loop's own thread and the loop is closed
+        by that thread when the run returns.
+        """
+        if self._loop.is_closed():
+            return
+        self._close_requested = True
+        if self._loop.is_running():
+            self.cancel()
+            future = asyncio.run_coroutine_threadsafe(self._close_session(), self._loop)
+            try:
+                future.result(timeout=1.0)
+            except Exception as e:
+                logger.warning(f"Could not close the HTTP session of the running loop: {str(e)}")
+            return
+        self._close_requested = False
+        self._loop.run_until_complete(self._close_session())
+        self._loop.close()
+
+    async def _close_session(self) -> None:
+        session, self._session = self._session, None
+        if session is not None and not session.closed:
+            await session.close()
@@ -4,19 +4,39 @@ BeautifulSoup implementation for scraping UTAR course registration data.
 
 import requests
 from bs4 import BeautifulSoup
+from requests.cookies import RequestsCookieJar
 import urllib3
 import socket
+import time
 from time import sleep
-from threading import Event, Lock
-from requests.adapters import HTTPAdapter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from threading import Event, Lock, local
 from urllib3.util.retry import Retry
 from ..utils.config import (
-    BASE_URL, LOGIN_URL, LOGIN_PROCESS_URL, REGISTRATION_URL,
-    COURSE_REGISTRATION_URL, DEFAULT_HEADERS
+    BASE_URL, LOGIN_URL, LOGIN_PROCESS_URL, REGISTRATION_URL, REGISTRATION_PROCESS_URL,
+    COURSE_REGISTRATION_URL, DEFAULT_HEADERS, SUBMIT_HEADERS, CAPTCHA_MIN_CONFIDENCE, CAPTCHA_MAX_REFETCHES,
+    TRACING_ENABLED, SESSION_KEEPALIVE_ENABLED, SESSION_KEEPALIVE_INTERVAL, SESSION_MAX_AGE, SESSION_REUSE_COOKIES,
+    SCHEDULE_FIRE_DELAY, SCHEDULE_CLOCK_SAMPLES, SCHEDULE_RENEW_MARGIN, BID_PLAN_TTL, REQUEST_MAX_WORKERS,
+    RETRY_REFRESH_EVERY, TIMETABLE_SOLVER_ENABLED, TIMETABLE_ALTERNATIVES, TIMETABLE_MAX_NODES, OFFERING_CACHE_TTL
 )
-from ..utils.captcha_solver import CaptchaSolver
-from ..utils.logger import setup_logger
+from ..storage.database import (
+    BidPlanRepository, CourseRepository, OfferingRepository, SessionRepository, get_database
+)
+from ..utils.captcha_solver import get_captcha_solver
+from ..utils.clock_sync import ClockOffset, estimate_clock_offset
+from ..utils.logger import reset_log_context, set_log_context, setup_logger
+from ..utils.tracing import Tracer, TracingHTTPAdapter
 from ..utils.timetable_reader import Course
+from ..utils.timetable_solver import solve_timetable
+from .bid_plan import BidBundle, BidPlan, build_bid_form, course_fingerprint
+from .course_run import CourseRun, CourseState
+from .retry_scheduler import RetryScheduler
+from .events import EventKind, RegistrationEventSource
+from .extraction import get_extractor
+from .offering_cache import OfferingCache, content_hash
+from .session_keepalive import SessionKeepAlive
+from .session_manager import SessionManager
+from .unit_offering import UnitOffering, parse_unit_offering
 
 # Disable SSL warnings
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -26,9 +46,13 @@ logger = setup_logger(__name__)
 
 class SessionExpiredException(Exception):
     """Exception raised when the session has expired."""
-    pass
+    
+    def __init__(self, message: str = "Session has expired. Please log in again.", generation: int = None):
+        super().__init__(message)
+        # Session generation the failing request was sent with; None while logging in
+        self.generation = generation
 
-class BeautifulSoupScraper:
+class BeautifulSoupScraper(RegistrationEventSource):
     """Scraper implementation using BeautifulSoup."""
     
     def __init__(self, connection_retries=3, connection_timeout=10, pool_connections=10, pool_maxsize=10):
@@ -42,39 +66,166 @@ class BeautifulSoupScraper:
             pool_maxsize (int): Maximum connections per pool
         """
         # Configure session with retry strategy
-        self.session = requests.Session()
+        self._session_options = {
+            'connection_retries': connection_retries,
+            'pool_connections': pool_connections,
+            'pool_maxsize': pool_maxsize
+        }
+        self.session = self._build_session()
+        self._login_session = self._build_session()
+        
+        # Course workers each get their own session sharing the main cookie jar
+        self.max_workers = REQUEST_MAX_WORKERS
+        self._worker_pool = None
+        self._worker_local = local()
+        self._worker_sessions = []
+        self._worker_lock = Lock()
+        
+        self.headers = DEFAULT_HEADERS
+        self.captcha_solver = get_captcha_solver()
+        self.extractor = get_extractor()
+        self.tracer = Tracer(enabled=TRACING_ENABLED)
+        self.max_retries = 2
+        
+        # Add cancellation token
+        self._cancellation_token = Event()
+        
+        # Store credentials for auto-relogin
+        self._student_id = None
+        self._password = None
+        self._is_logged_in = False
+        
+        # Authenticated cookie jar, replaced as a whole (new generation) on relogin
+        self.sessions = SessionManager(self._authenticate)
+        
+        # Cookies of the last authenticated session, compiled bid plans and parsed unit pages, kept across runs
+        self.database = None
+        self.session_store = None
+        self.plan_store = None
+        offering_store = None
+        try:
+            self.database = get_database()
+            self.plan_store = BidPlanRepository(self.database)
+            offering_store = OfferingRepository(self.database)
+            if SESSION_REUSE_COOKIES:
+                self.session_store = SessionRepository(self.database)
+        except Exception as e:
+            logger.warning(f"Local storage unavailable: {str(e)}")
+        self.offering_cache = OfferingCache(offering_store)
+        
+        # Heartbeat that keeps the session alive between runs
+        self.keepalive = SessionKeepAlive(
+            self._ping_session,
+            self._renew_session,
+            interval=SESSION_KEEPALIVE_INTERVAL,
+            max_age=SESSION_MAX_AGE
+        )
+        
+        logger.info("BeautifulSoupScraper initialized")
+
+    def _build_session(self) -> requests.Session:
+        """
+        Create a session with the configured retry strategy and connection pool.
+        
+        Returns:
+            Session: A new session without cookies
+        """
+        session = requests.Session()
         
         # Configure retry strategy
         retry_strategy = Retry(
-            total=connection_retries,
+            total=self._session_options['connection_retries'],
             backoff_factor=0.5,
             status_forcelist=[429, 500, 502, 503, 504],
             allowed_methods=["GET", "POST"]
         )
         
         # Mount adapter with retry strategy
-        adapter = HTTPAdapter(
+        adapter = TracingHTTPAdapter(
             max_retries=retry_strategy,
-            pool_connections=pool_connections,
-            pool_maxsize=pool_maxsize
+            pool_connections=self._session_options['pool_connections'],
+            pool_maxsize=self._session_options['pool_maxsize']
         )
-        self.session.mount("http://", adapter)
-        self.session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _http_session(self) -> tuple:
+        """
+        Return the session for the calling thread and its session generation.
         
-        self.headers = DEFAULT_HEADERS
-        self.captcha_solver = CaptchaSolver()
-        self.max_retries = 2
+        Course workers get a session of their own, since requests.Session is
+        not safe for concurrent use. Every session carries the current
+        authenticated cookie jar; a relogin swaps the jar, so connection pools
+        survive it. A login in progress uses its own session and the jar being
+        authenticated, reported as generation None.
         
-        # Add cancellation token
-        self._cancellation_token = Event()
+        Returns:
+            tuple: (Session, generation)
+        """
+        worker = self._worker_local
+        login_jar = getattr(worker, 'login_jar', None)
+        if login_jar is not None:
+            self._login_session.cookies = login_jar
+            return self._login_session, None
         
-        # Store credentials for auto-relogin
-        self._student_id = None
-        self._password = None
-        self._is_logged_in = False
-        self._relogin_lock = Lock()  # Lock to prevent multiple relogin attempts
+        if getattr(worker, 'active', False):
+            session = getattr(worker, 'session', None)
+            if session is None:
+                session = worker.session = self._build_session()
+                with self._worker_lock:
+                    self._worker_sessions.append(session)
+        else:
+            session = self.session
         
-        logger.info("BeautifulSoupScraper initialized")
+        generation, jar = self.sessions.current()
+        if session.cookies is not jar:
+            session.cookies = jar
+        return session, generation
+
+    def _request(self, name: str, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send one HTTP request through the session and record its timings.
+        
+        Args:
+            name (str): Trace label of the call (e.g. "unit_view", "bid_submit")
+            method (str): HTTP method
+            url (str): Target URL
+            **kwargs: Passed through to requests.Session.request
+            
+        Returns:
+            Response: The HTTP response
+        """
+        with self.tracer.span(name, 'http', method, url) as record:
+            session, generation = self._http_session()
+            response = session.request(method, url, **kwargs)
+            response.session_generation = generation
+            self.tracer.record_response(record, response)
+        self.keepalive.mark_activity()
+        return response
+
+    def _ping_session(self) -> bool:
+        """
+        Send one cheap authenticated request to reset the portal's idle timer.
+        
+        Returns:
+            bool: False if the portal reports the session as expired
+        """
+        response = self._request('keepalive', 'GET', COURSE_REGISTRATION_URL, headers=self.headers, verify=False)
+        try:
+            self._check_session_expired(response)
+        except SessionExpiredException:
+            return False
+        return response.status_code == 200
+
+    def _renew_session(self) -> bool:
+        """
+        Replace the current session with a fresh login.
+        
+        Returns:
+            bool: True if the relogin succeeded
+        """
+        return self._relogin(self.sessions.generation)
 
     def cancel(self):
         """Set the cancellation token to stop ongoing operations."""
@@ -106,61 +257,56 @@ class BeautifulSoupScraper:
             content = response.content.decode('utf-8', errors='ignore')
             # Check for session expired redirects in JavaScript
             if "window.parent.location.href" in content and "sessionExpired" in content:
+                generation = getattr(response, 'session_generation', None)
                 logger.warning("Session has expired")
-                self._is_logged_in = False
-                raise SessionExpiredException("Session has expired. Please log in again.")
+                if generation is not None and generation == self.sessions.generation:
+                    self._is_logged_in = False
+                    self._forget_session()
+                raise SessionExpiredException("Session has expired. Please log in again.", generation)
 
-    def _try_relogin(self):
+    def _relogin(self, failed_generation: int) -> bool:
         """
-        Attempt to relogin if credentials are available.
+        Get a session newer than the one a request failed with.
+        
+        Concurrent callers reporting the same generation share one relogin;
+        a caller whose generation is already outdated resumes immediately.
         
+        Args:
+            failed_generation (int): Generation from the SessionExpiredException,
+                None if the failure happened during a login
+            
         Returns:
-            bool: True if relogin was successful, False otherwise
+            bool: True if a newer session is available
         """
         # Skip if no credentials available
         if not self._student_id or not self._password:
             logger.warning("Cannot relogin: No stored credentials")
             return False
+        if failed_generation is None:
+            return False
+        
+        if self.sessions.renew(failed_generation):
+            self._is_logged_in = True
+            return True
+        return False
+
+    def _authenticate(self, jar: RequestsCookieJar) -> bool:
+        """
+        Log in again with the stored credentials into an empty cookie jar.
+        
+        Args:
+            jar (RequestsCookieJar): Jar to authenticate
             
-        # Prevent multiple simultaneous relogin attempts
-        with self._relogin_lock:
-            if self._is_logged_in:
-                # Another thread already relogged in successfully
-                return True
-                
-            logger.info("Attempting to relogin due to session expiration")
-            try:
-                # Clear the session and create a new one
-                self.session.close()
-                self.session = requests.Session()
-                
-                # Configure retry strategy again
-                retry_strategy = Retry(
-                    total=3,
-                    backoff_factor=0.5,
-                    status_forcelist=[429, 500, 502, 503, 504],
-                    allowed_methods=["GET", "POST"]
-                )
-                
-                # Mount adapter with retry strategy
-                adapter = HTTPAdapter(max_retries=retry_strategy)
-                self.session.mount("http://", adapter)
-                self.session.mount("https://", adapter)
-                
-                # Attempt login with stored credentials
-                login_result = self.login(self._student_id, self._password)
-                
-                if 'success' in login_result:
-                    self._is_logged_in = True
-                    logger.info("Successfully relogged in after session expiration")
-                    return True
-                else:
-                    logger.error("Failed to relogin after session expiration")
-                    return False
-                    
-            except Exception as e:
-                logger.error(f"Error during relogin attempt: {str(e)}")
-                return False
+        Returns:
+            bool: True if the login succeeded
+        """
+        logger.info("Attempting to relogin due to session expiration")
+        result = self._login_with_jar(jar, self._student_id, self._password, reuse_session=False)
+        if 'success' in result:
+            logger.info("Successfully relogged in after session expiration")
+            return True
+        logger.warning(f"Relogin after session expiration failed: {result.get('error', 'unknown error')}")
+        return False
 
     async def fetch_student_info(self, unit_code: str, group_code: str) -> dict:
         """
@@ -180,56 +326,40 @@ class BeautifulSoupScraper:
             'Save': 'View'
         }
         
-        try:
-            response = self.session.post(
-                REGISTRATION_URL,
-                headers=self.headers,
-                data=data,
-                verify=False
-            )
-            
-            self._check_session_expired(response)
-            self._check_cancellation()
-            
-            if response.status_code != 200:
-                raise Exception(f'Failed to fetch course data for {group_code}. Status: {response.status_code}')
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            # Extract required values
-            req_fregkey_input = soup.find('input', {'name': 'reqFregkey'})
-            req_paper_type = soup.find('input', {'name': 'reqPaperType'})
-            req_session_value = soup.find('input', {'name': 'reqSession'})
-            req_sid = soup.find('input', {'name': 'reqSid'})
-            req_with_class = soup.find('input', {'name': 'reqWithClass'})
-            if not req_fregkey_input or not req_fregkey_input.get('value'):
-                raise Exception('Student ID not found.')
-            
-            result = {
-                'student_id': req_fregkey_input['value'],
-                'paper_type': req_paper_type['value'],
-                'req_session': req_session_value['value'],
-                'reqsid': req_sid['value'],
-                'req_with_class': req_with_class['value']
-            }
-            
-            logger.info(f'student_id: {result["student_id"]}, paper_type: {result["paper_type"]}, '
-                       f'req_session: {result["req_session"]}, reqsid: {result["reqsid"]}, '
-                       f'req_with_class: {result["req_with_class"]}')
-            
-            return result
-            
-        except SessionExpiredException:
-            # Try to relogin and retry the operation
-            if self._try_relogin():
-                logger.info("Retrying fetch_student_info after successful relogin")
-                return await self.fetch_student_info(unit_code, group_code)
-            else:
+        for attempt in range(2):
+            try:
+                response = self._request(
+                    'unit_view', 'POST', REGISTRATION_URL,
+                    headers=self.headers,
+                    data=data,
+                    verify=False
+                )
+                
+                self._check_session_expired(response)
+                self._check_cancellation()
+                
+                if response.status_code != 200:
+                    raise Exception(f'Failed to fetch course data for {group_code}. Status: {response.status_code}')
+                
+                result = parse_unit_offering(unit_code, response.content).student_info()
+                
+                logger.info(f'student_id: {result["student_id"]}, paper_type: {result["paper_type"]}, '
+                           f'req_session: {result["req_session"]}, reqsid: {result["reqsid"]}, '
+                           f'req_with_class: {result["req_with_class"]}')
+                
+                return result
+                
+            except SessionExpiredException as e:
+                # Resume once on a newer session
+                if attempt == 0 and self._relogin(e.generation):
+                    logger.info("Retrying fetch_student_info on the new session")
+                    continue
                 raise Exception('Session expired and relogin failed')
-        except Exception as e:
-            # Check if cancellation was the cause
-            self._check_cancellation()
-            # If we get here, it was another exception
-            raise Exception(f'Request failed: {str(e)}')
+            except Exception as e:
+                # Check if cancellation was the cause
+                self._check_cancellation()
+                # If we get here, it was another exception
+                raise Exception(f'Request failed: {str(e)}')
 
     async def fetch_course_value(self, unit_code: str, group_code: str) -> str:
         """
@@ -251,52 +381,41 @@ class BeautifulSoupScraper:
             'Save': 'View'
         }
         
-        try:
-            response = self.session.post(
-                REGISTRATION_URL,
-                headers=self.headers,
-                data=data,
-                verify=False
-            )
-            
-            self._check_session_expired(response)
-            self._check_cancellation()
-            
-            if response.status_code != 200:
-                raise Exception(f'Failed to fetch course data for {group_code}. Status: {response.status_code}')
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            rows = soup.find_all('tr', align='center')
-            
-            for row in rows:
+        for attempt in range(2):
+            try:
+                response = self._request(
+                    'unit_view', 'POST', REGISTRATION_URL,
+                    headers=self.headers,
+                    data=data,
+                    verify=False
+                )
+                
+                self._check_session_expired(response)
                 self._check_cancellation()
                 
-                cols = row.find_all('td')
-                if len(cols) >= 3:
-                    group_col = cols[2].get_text(strip=True)
-                    group_type = cols[1].get_text(strip=True)
-                    
-                    if f'{group_type}{group_col}' == group_code:
-                        checkbox = row.find('input', {'name': 'reqMid'})
-                        if checkbox and checkbox.get('value'):
-                            return checkbox['value']
-            
-            raise Exception(f'Group {group_code} not found for unit {unit_code}')
-            
-        except SessionExpiredException:
-            # Try to relogin and retry the operation
-            if self._try_relogin():
-                logger.info("Retrying fetch_course_value after successful relogin")
-                return await self.fetch_course_value(unit_code, group_code)
-            else:
+                if response.status_code != 200:
+                    raise Exception(f'Failed to fetch course data for {group_code}. Status: {response.status_code}')
+                
+                for cells, req_mid in self.extractor.group_rows(response.content):
+                    if len(cells) >= 3 and f'{cells[1]}{cells[2]}' == group_code and req_mid:
+                        return req_mid
+                
+                raise Exception(f'Group {group_code} not found for unit {unit_code}')
+                
+            except SessionExpiredException as e:
+                # Resume once on a newer session
+                if attempt == 0 and self._relogin(e.generation):
+                    logger.info("Retrying fetch_course_value on the new session")
+                    continue
                 raise Exception('Session expired and relogin failed')
-        except Exception as e:
-            # Check if cancellation was the cause
-            self._check_cancellation()
-            # If we get here, it was another exception
-            raise Exception(f'Request failed: {str(e)}')
+            except Exception as e:
+                # Check if cancellation was the cause
+                self._check_cancellation()
+                # If we get here, it was another exception
+                raise Exception(f'Request failed: {str(e)}')
     
-    def login(self, student_id: str, password: str, max_retries: int = 5) -> dict:
+
+    def login(self, student_id: str, password: str, max_retries: int = 5, reuse_session: bool = True) -> dict:
         """
         Handle the login process including CAPTCHA.
         
@@ -304,6 +423,7 @@ class BeautifulSoupScraper:
             student_id (str): Student ID for login
             password (str): Password for login
             max_retries (int): Maximum number of retry attempts
+            reuse_session (bool): Try the stored cookies of a previous run before logging in
             
         Returns:
             dict: Dictionary containing login result and student data
@@ -320,6 +440,53 @@ class BeautifulSoupScraper:
         self._password = password
         self._is_logged_in = False
         
+        jar = RequestsCookieJar()
+        result = self._login_with_jar(jar, student_id, password, max_retries, reuse_session)
+        self.sessions.install(jar)
+        self._is_logged_in = True
+        return result
+
+    def _login_with_jar(self, jar: RequestsCookieJar, student_id: str, password: str,
+                        max_retries: int = 5, reuse_session: bool = True) -> dict:
+        """
+        Authenticate a cookie jar, by stored cookies or a CAPTCHA login.
+        
+        Requests made on this thread until it returns use the jar, on a
+        session of their own, so current sessions keep working meanwhile.
+        
+        Args:
+            jar (RequestsCookieJar): Empty jar to authenticate
+            student_id (str): Student ID for login
+            password (str): Password for login
+            max_retries (int): Maximum number of retry attempts
+            reuse_session (bool): Try the stored cookies of a previous run first
+            
+        Returns:
+            dict: Dictionary containing login result and student data
+        """
+        self._worker_local.login_jar = jar
+        try:
+            if reuse_session:
+                restored = self._restore_session(student_id, jar)
+                if restored:
+                    return restored
+            return self._captcha_login(student_id, password, max_retries, jar)
+        finally:
+            self._worker_local.login_jar = None
+
+    def _captcha_login(self, student_id: str, password: str, max_retries: int, jar: RequestsCookieJar) -> dict:
+        """
+        Log in through the login form, solving its CAPTCHA.
+        
+        Args:
+            student_id (str): Student ID for login
+            password (str): Password for login
+            max_retries (int): Maximum number of retry attempts
+            jar (RequestsCookieJar): Jar being authenticated
+            
+        Returns:
+            dict: Dictionary containing login result and student data
+        """
         retry_count = 0
         while retry_count < max_retries:
             try:
@@ -327,7 +494,7 @@ class BeautifulSoupScraper:
                 
                 # Get login page
                 logger.info(f"Attempting to get login page (attempt {retry_count+1}/{max_retries})")
-                response = self.session.get(LOGIN_URL, headers=self.headers, verify=False)
+                response = self._request('login_page', 'GET', LOGIN_URL, headers=self.headers, verify=False)
                 
                 self._check_cancellation()
                 
@@ -337,39 +504,28 @@ class BeautifulSoupScraper:
                     sleep(1)
                     continue
 
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Find CAPTCHA image
-                captcha_img = soup.find('img', {'src': lambda src: src and 'Kaptcha.jpg' in src})
-                if not captcha_img:
+                # Find CAPTCHA image and preKap value
+                with self.tracer.span('parse_login_page'):
+                    captcha_src, prekap_value = self.extractor.login_form(response.content)
+                if not captcha_src:
                     logger.warning("CAPTCHA image not found, retrying...")
                     retry_count += 1
                     sleep(1)
                     continue
                 
                 # Get CAPTCHA image
-                captcha_src = captcha_img['src'].lstrip('../')
-                captcha_url = f"{BASE_URL}/../{captcha_src}"
+                captcha_url = f"{BASE_URL}/../{captcha_src.lstrip('../')}"
                 
                 self._check_cancellation()
                 
                 try:
-                    logger.info(f"Attempting to retrieve CAPTCHA image")
-                    captcha_response = self.session.get(captcha_url, headers=self.headers, verify=False)
-                    
-                    self._check_cancellation()
-                    
-                    if captcha_response.status_code != 200:
-                        logger.warning(f"Failed to retrieve CAPTCHA image from {captcha_url}. Status: {captcha_response.status_code}")
-                        retry_count += 1
-                        sleep(1)
-                        continue
-                    
                     # Solve CAPTCHA using CaptchaSolver
                     try:
-                        self._check_cancellation()
-                        captcha_solution = self.captcha_solver.solve(captcha_response.content)
-                        logger.info(f'CAPTCHA solved: {captcha_solution}')
+                        captcha_solution = self._solve_login_captcha(captcha_url)
+                        if captcha_solution is None:
+                            retry_count += 1
+                            sleep(1)
+                            continue
                     except ConnectionError as ce:
                         logger.warning(f"Connection error during CAPTCHA solving: {str(ce)}")
                         retry_count += 1
@@ -385,16 +541,12 @@ class BeautifulSoupScraper:
                 
                 self._check_cancellation()
                 
-                # Get preKap value
-                prekap_input = soup.find('input', {'name': 'preKap'})
-                if not prekap_input:
+                if prekap_value is None:
                     logger.warning("preKap value not found, retrying...")
                     retry_count += 1
                     sleep(1)
                     continue
                 
-                prekap_value = prekap_input.get('value')
-                
                 # Attempt login
                 payload = {
                     'preKap': prekap_value,
@@ -405,8 +557,8 @@ class BeautifulSoupScraper:
                 
                 self._check_cancellation()
                 
-                login_response = self.session.post(
-                    LOGIN_PROCESS_URL,
+                login_response = self._request(
+                    'login_submit', 'POST', LOGIN_PROCESS_URL,
                     headers=self.headers,
                     data=payload,
                     verify=False
@@ -425,10 +577,13 @@ class BeautifulSoupScraper:
                 
                 if 'Invalid code' in login_response.text:
                     # This is a critical error - invalid credentials
+                    self.captcha_solver.stats.record_submission(accepted=False)
                     logger.error("Invalid CAPTCHA code entered. Retrying...")
                     retry_count += 1
                     continue
-                elif 'Invalid' in login_response.text:
+                
+                self.captcha_solver.stats.record_submission(accepted=True)
+                if 'Invalid' in login_response.text:
                     # This is a critical error - invalid credentials
                     self._is_logged_in = False
                     raise Exception('Login failed. Please check your credentials.')
@@ -441,8 +596,10 @@ class BeautifulSoupScraper:
                     sleep(1)
                     continue
                 
-                # Set logged in flag
-                self._is_logged_in = True
+                self.keepalive.mark_login()
+                self._store_session(student_id, jar)
+                if SESSION_KEEPALIVE_ENABLED:
+                    self.keepalive.start()
                 
                 return {
                     'success': 'Login successful',
@@ -478,71 +635,206 @@ class BeautifulSoupScraper:
         self._is_logged_in = False
         raise Exception(f"Login failed after {max_retries} attempts. Please try again later.")
 
-    def get_home_page_data(self) -> tuple:
+    def _solve_login_captcha(self, captcha_url: str) -> str:
         """
-        Get data from the home page after successful login.
+        Fetch and solve the login CAPTCHA, refetching instead of submitting unsure guesses.
+        
+        Kaptcha draws a new code on every image request, so a low-confidence guess
+        costs one image GET rather than a failed login POST and a new login page.
         
+        Args:
+            captcha_url (str): URL of the Kaptcha image
+            
         Returns:
-            tuple: (data dictionary, cookies dictionary)
+            str: The CAPTCHA guess to submit, or None if the image could not be fetched
         """
-        try:
+        for attempt in range(CAPTCHA_MAX_REFETCHES + 1):
             self._check_cancellation()
+            logger.info(f"Attempting to retrieve CAPTCHA image")
+            captcha_response = self._request('captcha', 'GET', captcha_url, headers=self.headers, verify=False)
             
-            response = self.session.get(COURSE_REGISTRATION_URL, headers=self.headers, verify=False)
+            self._check_cancellation()
             
-            self._check_session_expired(response)
+            if captcha_response.status_code != 200:
+                logger.warning(f"Failed to retrieve CAPTCHA image from {captcha_url}. Status: {captcha_response.status_code}")
+                return None
             
-            if response.status_code != 200:
-                logger.info(f'Failed to retrieve home page. Status code: {response.status_code}')
-                return None, self.session.cookies.get_dict()
+            with self.tracer.span('solve_captcha', 'captcha'):
+                guess = self.captcha_solver.solve_with_confidence(captcha_response.content)
+            if guess.confidence >= CAPTCHA_MIN_CONFIDENCE or attempt == CAPTCHA_MAX_REFETCHES:
+                logger.info(f'CAPTCHA solved: {guess.text} (confidence {guess.confidence:.2f})')
+                return guess.text
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            table = soup.find('table', {'id': 'tblGrid'})
+            self.captcha_solver.stats.refetched += 1
+            logger.info(f'CAPTCHA guess {guess.text} below confidence threshold '
+                        f'({guess.confidence:.2f} < {CAPTCHA_MIN_CONFIDENCE}), refetching image')
+        
+        return None
+
+    def get_home_page_data(self) -> tuple:
+        """
+        Get data from the home page after successful login.
+        
+        Returns:
+            tuple: (data dictionary, cookies dictionary)
+        """
+        for attempt in range(2):
+            try:
+                self._check_cancellation()
+                
+                response = self._request('home_page', 'GET', COURSE_REGISTRATION_URL, headers=self.headers, verify=False)
+                
+                self._check_session_expired(response)
+                
+                if response.status_code != 200:
+                    logger.info(f'Failed to retrieve home page. Status code: {response.status_code}')
+                    return None, self._http_session()[0].cookies.get_dict()
+                
+                return self._parse_home_page(response.content), self._http_session()[0].cookies.get_dict()
+                
+            except SessionExpiredException as e:
+                # Resume once on a newer session
+                if attempt == 0 and self._relogin(e.generation):
+                    logger.info("Retrying get_home_page_data on the new session")
+                    continue
+                raise Exception('Session expired and relogin failed')
+            except Exception as e:
+                # Check if cancellation was the cause
+                self._check_cancellation()
+                # If we get here, it was another exception
+                raise Exception(f'Failed to get home page data: {str(e)}')
+
+    def _parse_home_page(self, content: bytes) -> dict:
+        """
+        Extract the student details table from the home page.
+        
+        Args:
+            content (bytes): Home page HTML
             
-            if not table:
-                logger.info('Table not found.')
-                return None, self.session.cookies.get_dict()
+        Returns:
+            dict: Field name to value, or None if the table is missing
+        """
+        soup = BeautifulSoup(content, 'html.parser')
+        table = soup.find('table', {'id': 'tblGrid'})
+        
+        if not table:
+            logger.info('Table not found.')
+            return None
+        
+        data = {}
+        rows = table.find_all('tr', align='left')
+        
+        for row in rows:
+            cols = row.find_all('td')
+            if len(cols) >= 2:
+                key = cols[0].get_text(strip=True)
+                if len(cols) == 4:
+                    data[key] = cols[1].get_text(strip=True)
+                    second_key = cols[2].get_text(strip=True)
+                    data[second_key] = cols[3].get_text(strip=True)
+                else:
+                    data[key] = cols[1].get_text(strip=True)
+        
+        logger.info('Extracted Data:')
+        for key, value in data.items():
+            logger.info(f'{key}: {value}')
+        
+        return data
+
+    def _restore_session(self, student_id: str, jar: RequestsCookieJar) -> dict:
+        """
+        Reuse the stored cookies of a previous run if the portal still accepts them.
+        
+        Validation costs a single home page request; the CAPTCHA login only runs
+        when it fails.
+        
+        Args:
+            student_id (str): Student the stored session must belong to
+            jar (RequestsCookieJar): Jar to load the stored cookies into
             
-            data = {}
-            rows = table.find_all('tr', align='left')
+        Returns:
+            dict: Login result like login() returns, or None if no usable session exists
+        """
+        if not self.session_store:
+            return None
+        
+        try:
+            stored = self.session_store.load_session(student_id, BASE_URL)
+            if not stored:
+                return None
             
-            for row in rows:
-                cols = row.find_all('td')
-                if len(cols) >= 2:
-                    key = cols[0].get_text(strip=True)
-                    if len(cols) == 4:
-                        data[key] = cols[1].get_text(strip=True)
-                        second_key = cols[2].get_text(strip=True)
-                        data[second_key] = cols[3].get_text(strip=True)
-                    else:
-                        data[key] = cols[1].get_text(strip=True)
+            cookies, issued_at = stored
+            age = time.time() - issued_at
+            if SESSION_MAX_AGE and age >= SESSION_MAX_AGE:
+                logger.info(f"Stored session is {age:.0f}s old, logging in again")
+                self.session_store.delete_session(student_id, BASE_URL)
+                return None
             
-            logger.info('Extracted Data:')
-            for key, value in data.items():
-                logger.info(f'{key}: {value}')
+            self._check_cancellation()
+            jar.clear()
+            for cookie in cookies:
+                jar.set(
+                    cookie['name'], cookie['value'], domain=cookie['domain'], path=cookie['path']
+                )
             
-            return data, self.session.cookies.get_dict()
+            response = self._request('home_page', 'GET', COURSE_REGISTRATION_URL, headers=self.headers, verify=False)
+            self._check_session_expired(response)
+            data = self._parse_home_page(response.content) if response.status_code == 200 else None
+            if not data:
+                raise SessionExpiredException("Stored session was not accepted")
             
         except SessionExpiredException:
-            # Try to relogin and retry the operation
-            if self._try_relogin():
-                logger.info("Retrying get_home_page_data after successful relogin")
-                return self.get_home_page_data()
-            else:
-                raise Exception('Session expired and relogin failed')
+            logger.info("Stored session is no longer valid, logging in again")
+            self._forget_session(student_id)
+            jar.clear()
+            return None
+        except (requests.RequestException, ValueError, KeyError) as e:
+            logger.warning(f"Could not restore stored session: {str(e)}")
+            jar.clear()
+            return None
+        
+        logger.info(f"Reusing stored session from {age:.0f}s ago, CAPTCHA login skipped")
+        self.keepalive.mark_login(age)
+        if SESSION_KEEPALIVE_ENABLED:
+            self.keepalive.start()
+        
+        return {
+            'success': 'Login successful (session restored)',
+            'students_data': (data, jar.get_dict())
+        }
+
+    def _store_session(self, student_id: str, jar: RequestsCookieJar):
+        """Save the cookies of a freshly logged-in session for later runs."""
+        if not self.session_store:
+            return
+        cookies = [
+            {'name': cookie.name, 'value': cookie.value, 'domain': cookie.domain, 'path': cookie.path}
+            for cookie in jar
+        ]
+        try:
+            self.session_store.save_session(student_id, BASE_URL, cookies, time.time())
         except Exception as e:
-            # Check if cancellation was the cause
-            self._check_cancellation()
-            # If we get here, it was another exception
-            raise Exception(f'Failed to get home page data: {str(e)}')
-            
-    def register_courses(self, courses: list[Course]) -> tuple:
+            logger.warning(f"Could not store session cookies: {str(e)}")
+
+    def _forget_session(self, student_id: str = None):
+        """Drop the stored cookies once the portal has rejected them."""
+        student_id = student_id or self._student_id
+        if not self.session_store or not student_id:
+            return
+        try:
+            self.session_store.delete_session(student_id, BASE_URL)
+        except Exception as e:
+            logger.warning(f"Could not delete stored session cookies: {str(e)}")
+
+    def register_courses(self, courses: list[Course], fire_at: float = None) -> tuple:
         """
         Register multiple courses using BeautifulSoup with optimized bidding strategy.
         Includes retry mechanism for failed course registrations.
         
         Args:
             courses (list): List of Course objects to register
+            fire_at (float): Unix time (server clock) at which the bidding window opens.
+                When given, every bid is prepared ahead of time and submitted at that moment.
             
         Returns:
             tuple: (result_text, success_status)
@@ -553,199 +845,647 @@ class BeautifulSoupScraper:
             logger.warning("No courses provided for registration")
             return "No courses provided for registration", False
         
-        result_text = "BeautifulSoup Course Registration Results:\n\n"
-        registration_success = True
+        # Renew an ageing session now rather than in the middle of the round
+        if self.keepalive.running and self.keepalive.needs_renewal(margin=self.keepalive.interval):
+            logger.info("Session is close to its maximum age, renewing it before bidding")
+            self._renew_session()
         
-        # Track courses that need retry
-        failed_courses = courses[:]
-        successful_courses = []
-        retry_count = 0
+        # Each run exports only its own requests
+        self.tracer.clear()
+        try:
+            if fire_at is not None:
+                return self._register_scheduled(courses, fire_at)
+            with self.keepalive.critical():
+                return self._register_courses(courses, solve=TIMETABLE_SOLVER_ENABLED)
+        finally:
+            self._export_trace()
+    
+    def _register_courses(self, courses: list[Course], solve: bool = False) -> tuple:
+        """
+        Attempt every course up to max_retries times; the keep-alive is paused while this runs.
         
-        while failed_courses and retry_count < self.max_retries:
-            self._check_cancellation()
-            
-            for course in list(failed_courses):
-                self._check_cancellation()
-                
-                logger.info(f"Attempting to register course: {course.code} - {course.name}")
-                result_text += f"Course: {course.code} - {course.name}\n"
-                
+        Failed courses are retried on their own schedule from RetryScheduler
+        instead of in back-to-back rounds. Each attempt runs as its own task
+        on the worker pool and its course is rescheduled as soon as it
+        finishes, so a quick retry never waits for a slow peer. A retry
+        submits the already resolved reqMid values again and only refetches
+        the unit page every RETRY_REFRESH_EVERY attempts or when the bid
+        could not be built.
+        
+        Args:
+            courses (list): List of Course objects to register
+            solve (bool): Fetch every unit page first and put a clash-free timetable first in the preferences
+            
+        Returns:
+            tuple: (result_text, success_status)
+        """
+        offerings = {}
+        if solve and len(courses) > 1:
+            courses, offerings = self._solve_courses(courses)
+        
+        scheduler = RetryScheduler()
+        runs = {}
+        for course in courses:
+            # Courses whose unit page the solver already fetched start at the resolve step
+            offering = offerings.get(course.code)
+            runs[course.code] = CourseRun(course, state=CourseState.RESOLVE if offering else CourseState.FETCH,
+                                          offering=offering)
+        # Only each course's latest attempt is reported; progress goes out as events
+        latest_lines = {code: [] for code in runs}
+        order = {code: index for index, code in enumerate(runs)}
+        waiting = list(runs.values())   # priority order
+        in_flight = {}                  # future -> CourseRun
+        parallel = self.max_workers > 1 and len(runs) > 1
+        
+        def finish_attempt(run: CourseRun) -> bool:
+            """Reschedule or retire a course after an attempt; False if the session was lost."""
+            code = run.course.code
+            latest_lines[code] = run.lines
+            if run.session_lost:
+                return False
+            delay = scheduler.record(code, run.success, run.latency)
+            if run.success or run.attempt >= self.max_retries:
+                return True
+            refresh = RETRY_REFRESH_EVERY and run.attempt % RETRY_REFRESH_EVERY == 0
+            run.retry(reuse_bid=not refresh)
+            self._emit(EventKind.RETRY_SCHEDULED, code,
+                       f"Retrying in {delay:.2f}s (attempt {run.attempt}/{self.max_retries})",
+                       attempt=run.attempt)
+            waiting.append(run)
+            waiting.sort(key=lambda queued: order[queued.course.code])
+            return True
+        
+        while waiting or in_flight:
+            self._check_cancellation()
+            
+            due = set(scheduler.due(run.course.code for run in waiting))
+            for run in [run for run in waiting if run.course.code in due]:
+                waiting.remove(run)
+                if parallel:
+                    in_flight[self._get_worker_pool().submit(self._run_course_in_worker, run)] = run
+                else:
+                    self._run_course(run)
+                    if not finish_attempt(run):
+                        return self._format_results(latest_lines), False
+            
+            timeout = scheduler.wait_time(run.course.code for run in waiting) if waiting else None
+            if not in_flight:
+                if waiting:
+                    self._cancellation_token.wait(timeout)
+                continue
+            
+            done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in sorted(done, key=lambda future: order[in_flight[future].course.code]):
+                run = in_flight.pop(future)
+                # Re-raises a worker exception (e.g. cancellation) here
+                future.result()
+                if not finish_attempt(run):
+                    # Let the other attempts finish before reporting
+                    wait(in_flight)
+                    for other in in_flight.values():
+                        latest_lines[other.course.code] = other.lines
+                    return self._format_results(latest_lines), False
+        
+        return self._format_results(latest_lines), all(run.success for run in runs.values())
+
+    @staticmethod
+    def _format_results(latest_lines: dict) -> str:
+        """Build the final report from each course's latest attempt, in priority order."""
+        result_text = "BeautifulSoup Course Registration Results:\n\n"
+        for lines in latest_lines.values():
+            if lines:
+                result_text += "\n".join(lines) + "\n\n"
+        return result_text
+
+    def _get_worker_pool(self) -> ThreadPoolExecutor:
+        with self._worker_lock:
+            if self._worker_pool is None:
+                self._worker_pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="course-worker"
+                )
+            return self._worker_pool
+
+    def _run_course_in_worker(self, run: CourseRun) -> CourseRun:
+        self._worker_local.active = True
+        return self._run_course(run)
+
+    def _fetch_offerings(self, unit_codes: list, max_age: float = None) -> dict:
+        """
+        Fetch several unit pages on the worker pool.
+        
+        Args:
+            unit_codes (list): Unit codes to fetch
+            max_age (float): Reuse cached offerings up to this many seconds old instead of fetching
+            
+        Returns:
+            dict: Unit code -> UnitOffering, or None where the fetch failed
+        """
+        offerings = {}
+        if max_age is not None:
+            for code in unit_codes:
+                offerings[code] = self._cached_offering(code, max_age)
+        missing = [code for code in unit_codes if not offerings.get(code)]
+        if self.max_workers <= 1 or len(missing) <= 1:
+            offerings.update((code, self._fetch_unit_offering(code)) for code in missing)
+        else:
+            offerings.update(zip(missing, self._get_worker_pool().map(self._fetch_offering_in_worker, missing)))
+        return {code: offerings[code] for code in unit_codes}
+
+    def _fetch_offering_in_worker(self, unit_code: str) -> UnitOffering:
+        self._worker_local.active = True
+        return self._fetch_unit_offering(unit_code)
+
+    def _cached_offering(self, unit_code: str, max_age: float = OFFERING_CACHE_TTL) -> UnitOffering:
+        """Return the cached offering of a unit if it is at most max_age seconds old, without a request."""
+        offering = self.offering_cache.get(self._student_id or '', unit_code, max_age)
+        if offering:
+            logger.debug(f"Using cached unit offering for {unit_code}")
+        return offering
+
+    def solve_timetable(self, courses: list[Course], offerings: dict = None) -> list:
+        """
+        Find clash-free group assignments for the courses from their unit pages.
+        
+        Full groups are left out, and the meeting times come from the Day and
+        Time columns of each group.
+        
+        Args:
+            courses (list): Courses in priority order
+            offerings (dict): Unit code -> UnitOffering already fetched; taken from the
+                offering cache or fetched here if not given
+            
+        Returns:
+            list: TimetableSolution, best first, followed by up to TIMETABLE_ALTERNATIVES runner-ups
+        """
+        if offerings is None:
+            offerings = self._fetch_offerings([course.code for course in courses], max_age=OFFERING_CACHE_TTL)
+        group_times = {
+            code: {key: offering.meetings.get(key, []) for key in offering.groups if offering.vacancy(*key) != 0}
+            for code, offering in offerings.items() if offering
+        }
+        return solve_timetable(courses, group_times, TIMETABLE_ALTERNATIVES, TIMETABLE_MAX_NODES)
+
+    def _solve_courses(self, courses: list[Course], max_age: float = None) -> tuple:
+        """
+        Reorder each course's preferences so the best clash-free timetable is tried first.
+        
+        Args:
+            courses (list): Courses in priority order
+            max_age (float): Reuse cached offerings up to this many seconds old; None fetches every page
+        
+        Returns:
+            tuple: (courses, offerings) - the reordered courses and the unit pages fetched for them
+        """
+        offerings = self._fetch_offerings([course.code for course in courses], max_age)
+        solutions = self.solve_timetable(courses, offerings)
+        if not solutions:
+            return courses, offerings
+        
+        best = solutions[0]
+        for code in best.dropped:
+            logger.warning(f"No clash-free groups left for {code}; bidding with its own preferences")
+        for code, groups in best.choices.items():
+            chosen = ", ".join(f"{class_type}{number}" for class_type, number in groups.items())
+            logger.info(f"Timetable choice for {code}: {chosen}")
+        return [best.apply(course) for course in courses], offerings
+
+    def _run_course(self, run: CourseRun) -> CourseRun:
+        """
+        Drive one course through fetch, resolve, submit and verify.
+        
+        An expired session triggers a single relogin, after which the course
+        starts again from the fetch step.
+        
+        Args:
+            run (CourseRun): The course's state
+            
+        Returns:
+            CourseRun: The same run, finished
+        """
+        course = run.course
+        token = set_log_context(course.code)
+        try:
+            logger.info(f"Attempting to register course: {course.code} - {course.name}")
+            run.lines.append(f"Course: {course.code} - {course.name}")
+            if run.state is CourseState.SUBMIT:
+                run.lines.append("Resubmitting the resolved groups")
+            self._emit(EventKind.COURSE_STARTED, course.code, f"Registering {course.code} - {course.name}",
+                       attempt=run.attempt)
+            
+            while not run.finished:
+                self._check_cancellation()
                 try:
-                    # Step 1: Fetch student info for the course
-                    student_data = self._fetch_student_info(course.code)
-                    if not student_data:
-                        logger.warning(f"Could not fetch student info for {course.code}")
-                        result_text += f"Failed to fetch student information\n"
-                        continue
-                    
-                    self._check_cancellation()
-                    
-                    # Extract required values from student data
-                    student_id = student_data.get('student_id')
-                    paper_type = student_data.get('paper_type')
-                    req_session = student_data.get('req_session')
-                    req_sid = student_data.get('reqsid')
-                    req_with_class = student_data.get('req_with_class')
-                    
-                    result_text += f"Student ID: {student_id}\n"
-                    
-                    # Step 2: Get all class types and their corresponding values
-                    class_values = {}
-                    
-                    # Group classes by type (L, T, P)
-                    for class_type, slot_numbers in course.slots.items():
-                        if not slot_numbers:  # Skip empty slots
-                            continue
-                        
-                        # For each slot number in priority order
-                        for slot_number in slot_numbers:
-                            class_code = f"{class_type}{slot_number}"
-                            course_value = self._fetch_course_value(course.code, class_code)
-                            
-                            if course_value:
-                                class_values[class_code] = course_value
-                                result_text += f"Found {class_code} value: {course_value[:8]}...\n"
-                                break  # Stop after finding the first available slot for each type
-                            else:
-                                result_text += f"Could not find {class_code} value\n"
+                    if run.state is CourseState.FETCH:
+                        run.offering = self._fetch_unit_offering(course.code)
+                        if not run.offering:
+                            logger.warning(f"Could not fetch unit offering for {course.code}")
+                            run.fail("Failed to fetch unit offering")
+                        else:
+                            run.state = CourseState.RESOLVE
                     
-                    # Check if we found values for all required class types
-                    if len(class_values) < sum(1 for slots in course.slots.values() if slots):
-                        missing_types = set(course.slots.keys()) - {code[0] for code in class_values.keys()}
-                        logger.warning(f"Could not find values for all required class types: {missing_types}")
-                        result_text += f"Missing values for class types: {', '.join(missing_types)}\n"
-                        continue
+                    elif run.state is CourseState.RESOLVE:
+                        run.bid, bid_text = self._prepare_bid(course, run.offering, run.attempt)
+                        run.lines.extend(bid_text.splitlines())
+                        if run.bid:
+                            run.state = CourseState.SUBMIT
+                        else:
+                            run.state = CourseState.FAILED
                     
-                    # Step 3: Submit registration using the bidding approach
-                    bidding_result = self._submit_bidding(
-                        course.code,
-                        student_id,
-                        paper_type,
-                        req_session,
-                        req_sid,
-                        req_with_class,
-                        list(class_values.values())
-                    )
+                    elif run.state is CourseState.SUBMIT:
+                        started = time.perf_counter()
+                        run.result = self._submit_bidding(**run.bid)
+                        run.latency = time.perf_counter() - started
+                        self._emit(EventKind.BID_SUBMITTED, course.code, "Bid submitted", attempt=run.attempt)
+                        run.state = CourseState.VERIFY
                     
-                    if bidding_result.get('success'):
-                        logger.info(f"Successfully registered {course.code}")
-                        result_text += f"{bidding_result.get('message', 'Registration successful!')}\n"
-                        successful_courses.append(course)
-                        failed_courses.remove(course)
-                    else:
-                        logger.warning(f"Registration failed for {course.code}: {bidding_result.get('error')}")
-                        result_text += f"{bidding_result.get('error', 'Registration failed')}\n"
-                        registration_success = False
+                    elif run.state is CourseState.VERIFY:
+                        if run.result.get('success'):
+                            logger.info(f"Successfully registered {course.code}")
+                            run.lines.append(run.result.get('message', 'Registration successful!'))
+                            run.state = CourseState.DONE
+                        else:
+                            logger.warning(f"Registration failed for {course.code}: {run.result.get('error')}")
+                            run.fail(run.result.get('error', 'Registration failed'))
                 
-                except SessionExpiredException:
+                except SessionExpiredException as e:
                     logger.warning(f"Session expired while registering {course.code}, attempting relogin")
-                    # Try to relogin and continue
-                    if self._try_relogin():
+                    if run.relogins == 0 and self._relogin(e.generation):
                         logger.info(f"Successfully relogged in, continuing with registration for {course.code}")
-                        result_text += "Session expired but successfully relogged in\n"
-                        # Don't mark as failure, just continue with this course in the next iteration
+                        run.lines.append("Session expired but successfully relogged in")
+                        run.relogins += 1
+                        run.state = CourseState.FETCH
                     else:
                         logger.error(f"Session expired and relogin failed while registering {course.code}")
-                        result_text += "Session expired and relogin failed. Please log in again.\n"
-                        registration_success = False
-                        return result_text, registration_success
-                    
+                        run.fail("Session expired and relogin failed. Please log in again.")
+                        run.session_lost = True
+                
                 except Exception as e:
                     self._check_cancellation()  # Check if it was cancelled
                     
                     logger.error(f"Error registering course {course.code}: {str(e)}")
-                    result_text += f"Error: {str(e)}\n"
-                    registration_success = False
-                
-                result_text += "\n"
+                    run.fail(f"Error: {str(e)}")
             
-            retry_count += 1
-        
-        return result_text, registration_success
+            self._emit(EventKind.OUTCOME, course.code, run.lines[-1], success=run.success, attempt=run.attempt)
+            return run
+        finally:
+            reset_log_context(token)
 
-    def _fetch_student_info(self, unit_code: str) -> dict:
+    def _prepare_bid(self, course: Course, offering: UnitOffering = None, attempt: int = 1) -> tuple:
         """
-        Fetch student information from the registration page.
+        Fetch a unit page and build the bid for the course's preferred groups.
         
         Args:
-            unit_code (str): The unit code to fetch information for
+            course (Course): The course to prepare
+            offering (UnitOffering): Already fetched snapshot to reuse, if any
+            attempt (int): Registration round, for the emitted events
             
         Returns:
-            dict: Dictionary containing student information or None if failed
+            tuple: (bid, result_text)
+            - bid: Keyword arguments for _submit_bidding, or None if the bid cannot be built
+            - result_text: Progress text for the registration report
         """
+        result_text = ""
+        
+        # Step 1: Fetch the unit page once and reuse it for every lookup
+        offering = offering or self._fetch_unit_offering(course.code)
+        if not offering:
+            logger.warning(f"Could not fetch unit offering for {course.code}")
+            return None, "Failed to fetch unit offering\n"
+        
+        student_data = self._fetch_student_info(course.code, offering)
+        if not student_data:
+            logger.warning(f"Could not fetch student info for {course.code}")
+            return None, "Failed to fetch student information\n"
+        
         self._check_cancellation()
         
-        data = {
-            'reqPaperType': 'M',
-            'reqFregkey': '',
-            'reqUnit': unit_code,
-            'Save': 'View'
+        result_text += f"Student ID: {student_data.get('student_id')}\n"
+        
+        # Step 2: Get all class types and their corresponding values
+        class_values = {}
+        
+        # Group classes by type (L, T, P)
+        for class_type, slot_numbers in course.slots.items():
+            if not slot_numbers:  # Skip empty slots
+                continue
+            
+            # First group in priority order that is offered and not full
+            choice = offering.select(class_type, slot_numbers)
+            for slot_number, reason in choice.skipped:
+                logger.info(f"Skipping {course.code} {class_type}{slot_number}: {reason}")
+                result_text += f"Skipped {class_type}{slot_number}: {reason}\n"
+            
+            if choice.req_mid:
+                class_code = f"{class_type}{choice.slot_number}"
+                class_values[class_code] = choice.req_mid
+                result_text += f"Found {class_code} value: {choice.req_mid[:8]}...\n"
+                self._emit(EventKind.GROUP_RESOLVED, course.code, f"Resolved {class_code}", attempt=attempt)
+        
+        # Check if we found values for all required class types
+        if len(class_values) < sum(1 for slots in course.slots.values() if slots):
+            missing_types = set(course.slots.keys()) - {code[0] for code in class_values.keys()}
+            logger.warning(f"Could not find values for all required class types: {missing_types}")
+            result_text += f"Missing values for class types: {', '.join(missing_types)}\n"
+            return None, result_text
+        
+        bid = {
+            'unit_code': course.code,
+            'student_id': student_data.get('student_id'),
+            'paper_type': student_data.get('paper_type'),
+            'req_session': student_data.get('req_session'),
+            'req_sid': student_data.get('reqsid'),
+            'req_with_class': student_data.get('req_with_class'),
+            'req_mids': list(class_values.values()),
         }
+        return bid, result_text
+
+    def _register_scheduled(self, courses: list[Course], fire_at: float) -> tuple:
+        """
+        Prepare every bid ahead of time, then submit them when the window opens.
         
-        try:
-            response = self.session.post(
-                REGISTRATION_URL,
-                headers=self.headers,
-                data=data,
-                verify=False
-            )
+        Unit pages are fetched and bids built before the window, so only the
+        submit requests land inside it. The fire time is converted to the local
+        clock with an offset estimated from the portal's Date headers. Courses
+        whose bid could not be prepared or was not accepted go through the
+        normal registration rounds afterwards.
+        
+        The keep-alive runs during the wait even when it is off in the config,
+        and a session that would age out during the window is renewed
+        SCHEDULE_RENEW_MARGIN seconds before it, so no CAPTCHA login lands
+        inside the window. fire_bid_plan() sends the bundles one after
+        another, so the last bid goes out only after every earlier round trip.
+        
+        Args:
+            courses (list): List of Course objects to register
+            fire_at (float): Unix time on the server clock at which to submit
             
-            self._check_session_expired(response)
-            self._check_cancellation()
+        Returns:
+            tuple: (result_text, success_status)
+        """
+        result_text = "Scheduled Course Registration Results:\n\n"
+        
+        # Phase 1: compile the bid plan and measure the server clock
+        offerings = None
+        if TIMETABLE_SOLVER_ENABLED and len(courses) > 1:
+            # Planning ahead of the window can use recently cached unit pages
+            courses, offerings = self._solve_courses(courses, max_age=OFFERING_CACHE_TTL)
+        plan = self.build_bid_plan(courses, offerings)
+        result_text += (f"Bid plan: {len(plan.bundles)}/{len(courses)} courses ready "
+                        f"({plan.fetched} unit pages fetched, {plan.rebuilt} bids rebuilt)\n")
+        
+        clock = self._sync_clock()
+        fire_local = clock.to_local(fire_at) - clock.rtt / 2 + clock.error + SCHEDULE_FIRE_DELAY
+        logger.info(
+            f"{len(plan.bundles)}/{len(courses)} bids prepared, firing at "
+            f"{time.strftime('%H:%M:%S', time.localtime(fire_local))}.{int(fire_local % 1 * 1000):03d} local time "
+            f"(in {fire_local - time.time():.1f}s)"
+        )
+        started_keepalive = not self.keepalive.running
+        if started_keepalive:
+            self.keepalive.start()
+        try:
+            self._wait_until(fire_local - SCHEDULE_RENEW_MARGIN)
+            if self.keepalive.needs_renewal(margin=SCHEDULE_RENEW_MARGIN + self.keepalive.interval):
+                logger.info("Session would expire during the bidding window, renewing it now")
+                self._renew_session()
+            self._wait_until(fire_local)
             
-            if response.status_code != 200:
-                logger.warning(f"Failed to fetch course data. Status: {response.status_code}")
-                return None
+            # Phase 2: replay the compiled submits
+            with self.keepalive.critical():
+                fire_text, failed_codes = self.fire_bid_plan(plan)
+                result_text += "Submitting prepared bids:\n" + fire_text
+                pending = plan.unresolved + [course for course in courses if course.code in failed_codes]
+                
+                if not pending:
+                    return result_text, True
+                
+                result_text += f"\nRetrying {len(pending)} course(s):\n\n"
+                retry_text, success = self._register_courses(pending)
+                return result_text + retry_text, success
+        finally:
+            if started_keepalive:
+                self.keepalive.stop()
+
+    def build_bid_plan(self, courses: list[Course] = None, offerings: dict = None) -> BidPlan:
+        """
+        Resolve courses into ready-to-POST bid bundles and store them.
+        
+        Stored bundles that are still valid and were built for the same slot
+        preferences are reused without any request. Other courses use their
+        cached unit page if it is fresh, or have it fetched; if the offering
+        is unchanged only the validity is extended, otherwise the bundle is
+        rebuilt.
+        
+        Args:
+            courses (list): Courses in priority order; defaults to the saved course list
+            offerings (dict): Unit code -> UnitOffering already fetched; these are used instead of stored bundles
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+        Returns:
+            BidPlan: Bundles in priority order and the courses that could not be resolved
+        """
+        if courses is None:
+            courses = CourseRepository(self.database).list_courses() if self.database else []
+        
+        student_id = self._student_id
+        stored = self._load_stored_plan(student_id)
+        plan = BidPlan()
+        now = time.time()
+        
+        for index, course in enumerate(courses):
+            self._check_cancellation()
+            existing = stored.get(course.code)
+            if offerings and course.code in offerings:
+                offering = offerings[course.code]
+            elif existing and existing.is_valid(now) and existing.matches(course):
+                existing.sort_order = index
+                plan.bundles.append(existing)
+                continue
+            else:
+                offering = self._cached_offering(course.code)
+                if not offering:
+                    offering = self._fetch_unit_offering(course.code)
+                    plan.fetched += 1
+            if not offering:
+                plan.unresolved.append(course)
+                continue
             
-            # Extract required values
-            req_fregkey_input = soup.find('input', {'name': 'reqFregkey'})
-            req_paper_type = soup.find('input', {'name': 'reqPaperType'})
-            req_session_value = soup.find('input', {'name': 'reqSession'})
-            req_sid = soup.find('input', {'name': 'reqSid'})
-            req_with_class = soup.find('input', {'name': 'reqWithClass'})
+            course_hash = course_fingerprint(course)
+            offering_hash = offering.fingerprint()
+            valid_until = time.time() + BID_PLAN_TTL
+            if existing and existing.course_hash == course_hash and existing.offering_hash == offering_hash:
+                existing.valid_until, existing.sort_order = valid_until, index
+                self._save_bundle(existing, extend_only=True)
+                plan.bundles.append(existing)
+                continue
             
-            if not req_fregkey_input or not req_fregkey_input.get('value'):
-                logger.warning("Student ID not found.")
-                return None
+            bid, _ = self._prepare_bid(course, offering)
+            if not bid:
+                plan.unresolved.append(course)
+                continue
             
-            result = {
-                'student_id': req_fregkey_input['value'],
-                'paper_type': req_paper_type['value'],
-                'req_session': req_session_value['value'],
-                'reqsid': req_sid['value'],
-                'req_with_class': req_with_class['value']
-            }
+            bundle = BidBundle(
+                unit_code=course.code,
+                student_id=offering.student_id,
+                form=build_bid_form(**bid),
+                course_hash=course_hash,
+                offering_hash=offering_hash,
+                built_at=time.time(),
+                valid_until=valid_until,
+                sort_order=index
+            )
+            self._save_bundle(bundle)
+            plan.bundles.append(bundle)
+            plan.rebuilt += 1
+        
+        if self.plan_store and student_id:
+            try:
+                self.plan_store.prune(student_id, [course.code for course in courses])
+            except Exception as e:
+                logger.warning(f"Could not prune bid plan: {str(e)}")
+        
+        logger.info(f"Bid plan ready: {len(plan.bundles)} bundles, {len(plan.unresolved)} unresolved, "
+                    f"{plan.fetched} unit pages fetched, {plan.rebuilt} rebuilt")
+        return plan
+
+    def fire_bid_plan(self, plan: BidPlan) -> tuple:
+        """
+        Replay the compiled bid forms in priority order.
+        
+        No unit page is fetched and nothing is looked up; only the submit
+        response is checked. Bundles are sent one after another, so each
+        bid's latency includes the round trips of the bids before it. Bundles the portal rejects are dropped from the
+        stored plan so the next build resolves them again.
+        
+        Args:
+            plan (BidPlan): The compiled plan
             
-            logger.info(f"Student info fetched: {result['student_id']}")
-            return result
+        Returns:
+            tuple: (result_text, failed_codes)
+        """
+        result_text = ""
+        failed_codes = []
+        for bundle in sorted(plan.bundles, key=lambda bundle: bundle.sort_order):
+            self._check_cancellation()
+            try:
+                bidding_result = self._post_bid(bundle.form)
+            except SessionExpiredException:
+                bidding_result = {'success': False, 'error': 'Session expired and relogin failed'}
             
-        except SessionExpiredException:
-            # Try to relogin and retry the operation
-            if self._try_relogin():
-                logger.info("Retrying _fetch_student_info after successful relogin")
-                return self._fetch_student_info(unit_code)
+            self._emit(EventKind.BID_SUBMITTED, bundle.unit_code, "Prepared bid submitted")
+            if bidding_result.get('success'):
+                logger.info(f"Successfully registered {bundle.unit_code}")
+                message = bidding_result.get('message', 'Registration successful!')
             else:
-                logger.error("Failed to relogin after session expiration")
-                return None
+                logger.warning(f"Planned bid failed for {bundle.unit_code}: {bidding_result.get('error')}")
+                message = bidding_result.get('error', 'Registration failed')
+                failed_codes.append(bundle.unit_code)
+                self._drop_bundle(bundle)
+            result_text += f"{bundle.unit_code}: {message}\n"
+            self._emit(EventKind.OUTCOME, bundle.unit_code, message, success=bool(bidding_result.get('success')))
+        return result_text, failed_codes
+
+    def _load_stored_plan(self, student_id: str) -> dict:
+        """Load the stored bundles of a student keyed by unit code."""
+        if not self.plan_store or not student_id:
+            return {}
+        try:
+            rows = self.plan_store.load_plan(student_id)
         except Exception as e:
+            logger.warning(f"Could not load stored bid plan: {str(e)}")
+            return {}
+        return {code: BidBundle(student_id=student_id, **row) for code, row in rows.items()}
+
+    def _save_bundle(self, bundle: BidBundle, extend_only: bool = False):
+        """Persist a bundle, or only its new validity and position."""
+        if not self.plan_store or not self._student_id:
+            return
+        try:
+            if extend_only:
+                self.plan_store.extend_validity(self._student_id, bundle.unit_code, bundle.valid_until, bundle.sort_order)
+            else:
+                self.plan_store.save_bundle(
+                    self._student_id, bundle.unit_code, bundle.form, bundle.course_hash,
+                    bundle.offering_hash, bundle.built_at, bundle.valid_until, bundle.sort_order
+                )
+        except Exception as e:
+            logger.warning(f"Could not store bid plan entry for {bundle.unit_code}: {str(e)}")
+
+    def _drop_bundle(self, bundle: BidBundle):
+        """Remove a bundle the portal rejected."""
+        if not self.plan_store or not self._student_id:
+            return
+        try:
+            self.plan_store.delete_bundle(self._student_id, bundle.unit_code)
+        except Exception as e:
+            logger.warning(f"Could not drop bid plan entry for {bundle.unit_code}: {str(e)}")
+        # The page it was built from is no longer trusted either
+        self.offering_cache.invalidate(self._student_id, bundle.unit_code)
+
+    def _sync_clock(self) -> ClockOffset:
+        """
+        Estimate the portal's clock offset from the Date headers of home page requests.
+        
+        Returns:
+            ClockOffset: The estimated offset and round trip
+        """
+        def fetch_date():
+            response = self._request('clock_sync', 'GET', COURSE_REGISTRATION_URL, headers=self.headers, verify=False)
+            return response.headers.get('Date')
+        
+        try:
+            return estimate_clock_offset(fetch_date, samples=SCHEDULE_CLOCK_SAMPLES)
+        except requests.RequestException as e:
+            logger.warning(f"Clock offset estimation failed, using the local clock: {str(e)}")
+            return ClockOffset()
+
+    def _wait_until(self, target: float):
+        """
+        Sleep until a local Unix time, staying responsive to cancellation.
+        
+        The last few milliseconds are spun rather than slept, since sleep
+        granularity can exceed the precision the fire time needs.
+        
+        Args:
+            target (float): Local Unix time to wake up at
+        """
+        while True:
             self._check_cancellation()
-            logger.error(f"Error fetching student info: {str(e)}")
-            return None
-    
-    def _fetch_course_value(self, unit_code: str, group_code: str) -> str:
+            remaining = target - time.time()
+            if remaining <= 0:
+                return
+            if remaining > 0.02:
+                self._cancellation_token.wait(min(remaining - 0.02, 1.0))
+            else:
+                sleep(0)
+
+    def _export_trace(self):
+        """Write this run's request timeline as a Chrome trace, if tracing is on."""
+        if not self.tracer.enabled:
+            return
+        try:
+            self.tracer.export_chrome_trace()
+        except OSError as e:
+            logger.warning(f"Could not write request trace: {str(e)}")
+
+    def _fetch_unit_offering(self, unit_code: str, max_age: float = None) -> UnitOffering:
         """
-        Fetch course value for a specific unit and group.
+        Fetch and parse the registration page of a unit.
+        
+        A page that hashes the same as the cached one is not parsed again;
+        the cached offering is returned instead.
         
         Args:
             unit_code (str): The unit code to fetch
-            group_code (str): The group code to fetch (e.g. "L1", "T2", "P1")
+            max_age (float): Return a cached offering up to this many seconds old without a request
             
         Returns:
-            str: The course value or None if not found
+            UnitOffering: Parsed snapshot of the unit page or None if failed
         """
         self._check_cancellation()
+        if max_age is not None:
+            offering = self._cached_offering(unit_code, max_age)
+            if offering:
+                return offering
         
         data = {
             'reqPaperType': 'M',
@@ -754,52 +1494,85 @@ class BeautifulSoupScraper:
             'Save': 'View'
         }
         
-        try:
-            response = self.session.post(
-                REGISTRATION_URL,
-                headers=self.headers,
-                data=data,
-                verify=False
-            )
-            
-            self._check_session_expired(response)
-            self._check_cancellation()
-            
-            if response.status_code != 200:
-                logger.warning(f"Failed to fetch course data for {group_code}. Status: {response.status_code}")
-                return None
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            rows = soup.find_all('tr', align='center')
-            
-            for row in rows:
+        for attempt in range(2):
+            try:
+                response = self._request(
+                    'unit_view', 'POST', REGISTRATION_URL,
+                    headers=self.headers,
+                    data=data,
+                    verify=False
+                )
+                
+                self._check_session_expired(response)
                 self._check_cancellation()
                 
-                cols = row.find_all('td')
-                if len(cols) >= 3:
-                    group_col = cols[2].get_text(strip=True)
-                    group_type = cols[1].get_text(strip=True)
-                    
-                    if f'{group_type}{group_col}' == group_code:
-                        checkbox = row.find('input', {'name': 'reqMid'})
-                        if checkbox and checkbox.get('value'):
-                            return checkbox['value']
+                if response.status_code != 200:
+                    logger.warning(f"Failed to fetch course data for {unit_code}. Status: {response.status_code}")
+                    return None
+                
+                page_hash = content_hash(response.content)
+                offering = self.offering_cache.lookup(self._student_id or '', unit_code, page_hash)
+                if offering:
+                    logger.info(f"Unit page of {unit_code} unchanged, reusing its parsed offering")
+                    return offering
+                
+                with self.tracer.span('parse_unit_offering'):
+                    offering = parse_unit_offering(unit_code, response.content)
+                self.offering_cache.put(self._student_id or '', offering, page_hash)
+                logger.info(f"Unit offering fetched for {unit_code}: {len(offering.groups)} groups")
+                return offering
+                
+            except SessionExpiredException as e:
+                # Resume once on a newer session
+                if attempt == 0 and self._relogin(e.generation):
+                    logger.info("Retrying _fetch_unit_offering on the new session")
+                    continue
+                logger.error("Failed to relogin after session expiration")
+                return None
+            except Exception as e:
+                self._check_cancellation()
+                logger.error(f"Error fetching unit offering: {str(e)}")
+                return None
+
+    def _fetch_student_info(self, unit_code: str, offering: UnitOffering = None) -> dict:
+        """
+        Fetch student information from the registration page.
+        
+        Args:
+            unit_code (str): The unit code to fetch information for
+            offering (UnitOffering): Already fetched snapshot to reuse, if any
             
-            logger.warning(f"Group {group_code} not found for unit {unit_code}")
+        Returns:
+            dict: Dictionary containing student information or None if failed
+        """
+        offering = offering or self._fetch_unit_offering(unit_code)
+        if not offering:
             return None
+        
+        logger.info(f"Student info fetched: {offering.student_id}")
+        return offering.student_info()
+    
+    def _fetch_course_value(self, unit_code: str, group_code: str, offering: UnitOffering = None) -> str:
+        """
+        Fetch course value for a specific unit and group.
+        
+        Args:
+            unit_code (str): The unit code to fetch
+            group_code (str): The group code to fetch (e.g. "L1", "T2", "P1")
+            offering (UnitOffering): Already fetched snapshot to reuse, if any
             
-        except SessionExpiredException:
-            # Try to relogin and retry the operation
-            if self._try_relogin():
-                logger.info("Retrying _fetch_course_value after successful relogin")
-                return self._fetch_course_value(unit_code, group_code)
-            else:
-                logger.error("Failed to relogin after session expiration")
-                return None
-        except Exception as e:
-            self._check_cancellation()
-            logger.error(f"Error fetching course value: {str(e)}")
+        Returns:
+            str: The course value or None if not found
+        """
+        offering = offering or self._fetch_unit_offering(unit_code)
+        if not offering:
             return None
+        
+        group_type, group_no = group_code[:1], group_code[1:]
+        course_value = offering.resolve(group_type, group_no) if group_no.isdigit() else None
+        if not course_value:
+            logger.warning(f"Group {group_code} not found for unit {unit_code}")
+        return course_value
     
     def _submit_bidding(self, unit_code: str, student_id: str, paper_type: str, 
                        req_session: str, req_sid: str, req_with_class: str, req_mids: list) -> dict:
@@ -818,82 +1591,75 @@ class BeautifulSoupScraper:
         Returns:
             dict: Result of the bidding process
         """
-        try:
-            # Prepare the data bundle for bidding
-            data_bundle = {
-                'reqUnit': unit_code,
-                'reqSid': req_sid,
-                'reqSession': req_session,
-                'reqFregkey': student_id,
-                'reqPaperType': paper_type,
-                'reqWithClass': req_with_class,
-                'act': 'insert',
-                'reqMid': req_mids  # List of values
-            }
-            
-            # Set headers for the request
-            headers = {
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-                'Content-Type': 'application/x-www-form-urlencoded',
-                'Origin': 'https://unitreg.utar.edu.my',
-                'Referer': 'https://unitreg.utar.edu.my/portal/courseRegStu/registration/registerUnitSurvey.jsp'
-            }
-            
-            # Send the bidding request
-            response = self.session.post(
-                'https://unitreg.utar.edu.my/portal/courseRegStu/registration/registerUnitProSurvey.jsp',
-                headers=headers,
-                data=data_bundle,
-                verify=False
-            )
-            
-            self._check_session_expired(response)
+        data_bundle = build_bid_form(unit_code, student_id, paper_type, req_session, req_sid, req_with_class, req_mids)
+        return self._post_bid(data_bundle)
+    
+    def _post_bid(self, data_bundle: dict) -> dict:
+        """
+        POST a prepared bidding form and interpret the response.
+        
+        Args:
+            data_bundle (dict): Form fields as built by build_bid_form
             
-            if response.status_code != 200:
+        Returns:
+            dict: Result of the bidding process
+        """
+        for attempt in range(2):
+            try:
+                # Send the bidding request
+                response = self._request(
+                    'bid_submit', 'POST', REGISTRATION_PROCESS_URL,
+                    headers=SUBMIT_HEADERS,
+                    data=data_bundle,
+                    verify=False
+                )
+                
+                self._check_session_expired(response)
+                
+                if response.status_code != 200:
+                    return {
+                        'success': False,
+                        'error': f"Received status code {response.status_code}"
+                    }
+                
+                # Check for success messages with class = red
+                with self.tracer.span('parse_bid_result'):
+                    success_msg = self.extractor.red_message(response.content)
+                # check if insert-success is in response.url
+                if response.url and "insert-success" in response.url or\
+                    success_msg and "success" in success_msg.lower():
+                    return {
+                        'success': True,
+                        'message': "Course registration successful!"
+                    }
+                
+                # If we can't definitively determine the status
                 return {
                     'success': False,
-                    'error': f"Received status code {response.status_code}"
-                }
-            
-            # Parse the response to check for success or error messages
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Check for success messages with class = red
-            success_msg = soup.find('div', class_='red')
-            # check if insert-success is in response.url
-            if response.url and "insert-success" in response.url or\
-                success_msg and "success" in success_msg.get_text(strip=True).lower():
-                return {
-                    'success': True,
-                    'message': "Course registration successful!"
+                    'error': "Bidding request submitted, but status unclear"
                 }
-            
-            # If we can't definitively determine the status
-            return {
-                'success': False,
-                'error': "Bidding request submitted, but status unclear"
-            }
-            
-        except SessionExpiredException:
-            # Try to relogin and retry the operation
-            if self._try_relogin():
-                logger.info("Retrying _submit_bidding after successful relogin")
-                return self._submit_bidding(unit_code, student_id, paper_type, req_session, req_sid, req_with_class, req_mids)
-            else:
+                
+            except SessionExpiredException as e:
+                # Resume once on a newer session
+                if attempt == 0 and self._relogin(e.generation):
+                    logger.info("Retrying _post_bid on the new session")
+                    continue
                 # Propagate the session expired exception to be handled by the caller
                 raise
-        except Exception as e:
-            logger.error(f"Error in bidding submission: {str(e)}")
-            return {
-                'success': False,
-                'error': f"Error in bidding submission: {str(e)}"
-            }
+            except Exception as e:
+                logger.error(f"Error in bidding submission: {str(e)}")
+                return {
+                    'success': False,
+                    'error': f"Error in bidding submission: {str(e)}"
+                }
     
+
     def cancel(self):
         """
         Cancel the current session.
         """
         try:
+            self.keepalive.stop()
             self.session.close()
             self._cancellation_token.set()
             self._is_logged_in = False
@@ -909,4 +1675,35 @@ class BeautifulSoupScraper:
             max_retries (int): Maximum number of retries
         """
         self.max_retries = max_retries
-        logger.info(f"Max retries set to {self.max_retries}")
\ No newline at end of file
+        logger.info(f"Max retries set to {self.max_retries}")
+
+    def set_max_workers(self, max_workers: int):
+        """
+        Set how many courses are registered in parallel.
+        
+        Args:
+            max_workers (int): Worker bound, 1 to register courses one after another
+        """
+        with self._worker_lock:
+            if self._worker_pool is not None:
+                self._worker_pool.shutdown(wait=True)
+                self._worker_pool = None
+        self.max_workers = max(1, max_workers)
+        logger.info(f"Max workers set to {self.max_workers}")
+
+    def cleanup(self):
+        """Stop the keep-alive heartbeat, the course workers and close the HTTP sessions and database."""
+        self.keepalive.stop()
+        # Runs on the GUI thread at shutdown: stop the workers without waiting for their requests
+        self.cancel()
+        with self._worker_lock:
+            if self._worker_pool is not None:
+                self._worker_pool.shutdown(wait=False, cancel_futures=True)
+                self._worker_pool = None
+            for session in self._worker_sessions:
+                session.close()
+            self._worker_sessions.clear()
+        self.session.close()
+        if self.database:
+            self.database.close()
+        self._is_logged_in = False
@@ -0,0 +1,76 @@
+"""
+Compiled bid plan: ready-to-POST registration forms built ahead of the bidding window.
+"""
+
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+from ..utils.timetable_reader import Course
+
+
+def build_bid_form(unit_code: str, student_id: str, paper_type: str, req_session: str,
+                   req_sid: str, req_with_class: str, req_mids: list) -> Dict[str, Any]:
+    """
+    Build the ``registerUnitProSurvey.jsp`` form for one course.
+
+    Args:
+        unit_code (str): Course code
+        student_id (str): Student ID
+        paper_type (str): Paper type
+        req_session (str): Session value
+        req_sid (str): SID value
+        req_with_class (str): WithClass value
+        req_mids (list): reqMid values of the chosen groups, one per class type
+
+    Returns:
+        dict: Form fields; reqMid is a list and is sent as repeated fields
+    """
+    return {
+        'reqUnit': unit_code,
+        'reqSid': req_sid,
+        'reqSession': req_session,
+        'reqFregkey': student_id,
+        'reqPaperType': paper_type,
+        'reqWithClass': req_with_class,
+        'act': 'insert',
+        'reqMid': list(req_mids)
+    }
+
+
+def course_fingerprint(course: Course) -> str:
+    """Hash of a course's code and slot preferences."""
+    # Types without preferences are not stored, so they do not change the hash
+    payload = [course.code, sorted((kind, list(slots)) for kind, slots in course.slots.items() if slots)]
+    return hashlib.sha1(json.dumps(payload).encode('utf-8')).hexdigest()
+
+
+@dataclass
+class BidBundle:
+    """One compiled bid: the exact form to POST and what it was built from."""
+    unit_code: str
+    student_id: str
+    form: Dict[str, Any]
+    course_hash: str
+    offering_hash: str
+    built_at: float
+    valid_until: float
+    sort_order: int = 0
+
+    def is_valid(self, now: float = None) -> bool:
+        return (now or time.time()) < self.valid_until
+
+    def matches(self, course: Course) -> bool:
+        """Whether the bundle was built for the course's current slot preferences."""
+        return self.course_hash == course_fingerprint(course)
+
+
+@dataclass
+class BidPlan:
+    """Bundles for a run in priority order, plus the courses that could not be compiled."""
+    bundles: List[BidBundle] = field(default_factory=list)
+    unresolved: List[Course] = field(default_factory=list)
+    fetched: int = 0      # unit pages fetched while building
+    rebuilt: int = 0      # bundles written because the course or offering changed
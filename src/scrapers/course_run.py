@@ -0,0 +1,65 @@
+"""
+Per-course registration state shared by the request engines.
+"""
+
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import List, Optional
+
+from ..utils.timetable_reader import Course
+from .unit_offering import UnitOffering
+
+
+class CourseState(Enum):
+    """Steps a course goes through in one registration attempt."""
+    FETCH = 'fetch'        # load the unit page
+    RESOLVE = 'resolve'    # pick reqMid values for the preferred groups
+    SUBMIT = 'submit'      # POST the bid
+    VERIFY = 'verify'      # interpret the portal's answer
+    DONE = 'done'
+    FAILED = 'failed'
+
+
+@dataclass
+class CourseRun:
+    """One course's progress through a registration attempt."""
+    course: Course
+    state: CourseState = CourseState.FETCH
+    offering: Optional[UnitOffering] = None
+    bid: Optional[dict] = None
+    result: Optional[dict] = None
+    lines: List[str] = field(default_factory=list)
+    relogins: int = 0
+    session_lost: bool = False
+    attempt: int = 1       # attempt number, starting at 1
+    latency: Optional[float] = None   # round trip of the submit, None if it was not sent
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (CourseState.DONE, CourseState.FAILED)
+
+    @property
+    def success(self) -> bool:
+        return self.state is CourseState.DONE
+
+    def fail(self, line: str) -> None:
+        self.lines.append(line)
+        self.state = CourseState.FAILED
+
+    def retry(self, reuse_bid: bool) -> None:
+        """
+        Reset the run for its next attempt.
+
+        Args:
+            reuse_bid (bool): Submit the already resolved bid again instead of refetching the unit page
+        """
+        reuse_bid = reuse_bid and self.bid is not None
+        self.state = CourseState.SUBMIT if reuse_bid else CourseState.FETCH
+        if not reuse_bid:
+            self.offering = None
+            self.bid = None
+        self.result = None
+        self.lines = []
+        self.relogins = 0
+        self.latency = None
+        self.attempt += 1
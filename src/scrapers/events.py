@@ -0,0 +1,63 @@
+"""
+Structured progress events emitted by the registration engines.
+"""
+
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Callable, Optional
+
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class EventKind(Enum):
+    COURSE_STARTED = 'course_started'
+    GROUP_RESOLVED = 'group_resolved'
+    BID_SUBMITTED = 'bid_submitted'
+    OUTCOME = 'outcome'
+    RETRY_SCHEDULED = 'retry_scheduled'
+
+
+@dataclass(frozen=True)
+class RegistrationEvent:
+    """One step of a course's registration, in the order it happened."""
+    kind: EventKind
+    unit_code: str
+    message: str = ''
+    success: Optional[bool] = None   # set on OUTCOME
+    attempt: int = 1                 # registration round the event belongs to
+    timestamp: float = field(default_factory=time.time)
+
+    def to_text(self) -> str:
+        return f"[{self.unit_code}] {self.message}"
+
+
+EventListener = Callable[[RegistrationEvent], None]
+
+
+class RegistrationEventSource:
+    """Mixin for engines that report progress to an optional listener."""
+
+    _event_listener: Optional[EventListener] = None
+
+    def set_event_listener(self, listener: Optional[EventListener]) -> None:
+        """
+        Register a callable that receives every RegistrationEvent.
+
+        Engines may call it from worker threads, so it must be thread-safe.
+
+        Args:
+            listener (callable): Event consumer, or None to stop reporting
+        """
+        self._event_listener = listener
+
+    def _emit(self, kind: EventKind, unit_code: str, message: str = '', **fields) -> None:
+        listener = self._event_listener
+        if listener is None:
+            return
+        try:
+            listener(RegistrationEvent(kind, unit_code, message, **fields))
+        except Exception as e:
+            logger.warning(f"Registration event listener failed: {str(e)}")
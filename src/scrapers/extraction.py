@@ -0,0 +1,165 @@
+"""
+Targeted field extraction from portal pages.
+
+The scrapers only ever need a handful of values from each response: the hidden
+inputs of the registration form, the group rows and column headers of a unit
+page, the CAPTCHA image of the login page and the red status message of a bid
+result. Extractors return exactly those values so the fast backend never has
+to build a full tree.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from ..utils.config import PARSER_BACKEND
+from ..utils.logger import setup_logger
+
+try:
+    import lxml.html
+except ImportError:  # pragma: no cover - depends on the build environment
+    lxml = None
+
+logger = setup_logger(__name__)
+
+# (cell texts, reqMid value or None) for one `tr[align=center]` row
+GroupRow = Tuple[List[str], Optional[str]]
+
+
+class SoupExtractor:
+    """Reference extractor that parses the whole page with bs4's html.parser."""
+
+    name = 'bs4'
+
+    def _soup(self, content) -> BeautifulSoup:
+        return BeautifulSoup(content, 'html.parser')
+
+    def hidden_inputs(self, content, names: Iterable[str]) -> Dict[str, str]:
+        soup = self._soup(content)
+        result = {}
+        for name in names:
+            tag = soup.find('input', {'name': name})
+            if tag:
+                result[name] = tag.get('value', '')
+        return result
+
+    def group_rows(self, content) -> List[GroupRow]:
+        return self.unit_table(content)[1]
+
+    def unit_table(self, content) -> Tuple[List[str], List[GroupRow]]:
+        soup = self._soup(content)
+        header = soup.find('th')
+        headers = [col.get_text(strip=True) for col in header.parent.find_all('th')] if header else []
+        rows = []
+        for row in soup.find_all('tr', align='center'):
+            cells = [col.get_text(strip=True) for col in row.find_all('td')]
+            checkbox = row.find('input', {'name': 'reqMid'})
+            rows.append((cells, checkbox.get('value') if checkbox else None))
+        return headers, rows
+
+    def login_form(self, content) -> Tuple[Optional[str], Optional[str]]:
+        soup = self._soup(content)
+        captcha_img = soup.find('img', {'src': lambda src: src and 'Kaptcha.jpg' in src})
+        prekap_input = soup.find('input', {'name': 'preKap'})
+        return (
+            captcha_img['src'] if captcha_img else None,
+            prekap_input.get('value') if prekap_input else None,
+        )
+
+    def red_message(self, content) -> Optional[str]:
+        message = self._soup(content).find('div', class_='red')
+        return message.get_text(strip=True) if message else None
+
+
+class LxmlExtractor:
+    """Fast extractor built on lxml's C parser and XPath."""
+
+    name = 'lxml'
+
+    @staticmethod
+    def _tree(content):
+        if not content or not content.strip():
+            return None
+        return lxml.html.fromstring(content)
+
+    @staticmethod
+    def _text(element) -> str:
+        # Same result as bs4's get_text(strip=True)
+        return ''.join(part.strip() for part in element.itertext())
+
+    def hidden_inputs(self, content, names: Iterable[str]) -> Dict[str, str]:
+        tree = self._tree(content)
+        wanted = set(names)
+        result = {}
+        if tree is None:
+            return result
+        for tag in tree.iter('input'):
+            name = tag.get('name')
+            if name in wanted and name not in result:
+                result[name] = tag.get('value', '')
+        return result
+
+    def group_rows(self, content) -> List[GroupRow]:
+        return self.unit_table(content)[1]
+
+    def unit_table(self, content) -> Tuple[List[str], List[GroupRow]]:
+        tree = self._tree(content)
+        if tree is None:
+            return [], []
+        headers = [self._text(col) for col in tree.xpath('(//tr[th])[1]/th')]
+        rows = []
+        for row in tree.xpath('//tr[@align="center"]'):
+            cells = [self._text(col) for col in row.iter('td')]
+            req_mids = row.xpath('.//input[@name="reqMid"]/@value')
+            rows.append((cells, req_mids[0] if req_mids else None))
+        return headers, rows
+
+    def login_form(self, content) -> Tuple[Optional[str], Optional[str]]:
+        tree = self._tree(content)
+        if tree is None:
+            return None, None
+        captcha_src = tree.xpath('//img[contains(@src, "Kaptcha.jpg")]/@src')
+        prekap_input = tree.xpath('//input[@name="preKap"]')
+        return (
+            captcha_src[0] if captcha_src else None,
+            prekap_input[0].get('value') if prekap_input else None,
+        )
+
+    def red_message(self, content) -> Optional[str]:
+        tree = self._tree(content)
+        if tree is None:
+            return None
+        messages = tree.xpath('//div[contains(concat(" ", normalize-space(@class), " "), " red ")]')
+        return self._text(messages[0]) if messages else None
+
+
+EXTRACTORS = {
+    SoupExtractor.name: SoupExtractor,
+    LxmlExtractor.name: LxmlExtractor,
+}
+
+_extractor = None
+
+
+def get_extractor(backend: str = None):
+    """
+    Return the extractor for a backend.
+
+    Args:
+        backend (str): "lxml", "bs4" or "auto"; defaults to the [Parsing] setting
+
+    Returns:
+        The extractor instance, falling back to bs4 when lxml is unavailable
+    """
+    global _extractor
+    backend = (backend or PARSER_BACKEND).lower()
+    if backend in ('auto', LxmlExtractor.name) and lxml is not None:
+        backend = LxmlExtractor.name
+    elif backend != SoupExtractor.name:
+        if backend == LxmlExtractor.name:
+            logger.warning("lxml is not installed, falling back to bs4 extraction")
+        backend = SoupExtractor.name
+
+    if _extractor is None or _extractor.name != backend:
+        _extractor = EXTRACTORS[backend]()
+    return _extractor
@@ -0,0 +1,186 @@
+"""
+Cache of parsed unit pages, in memory and in SQLite.
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable, Optional, Tuple
+
+from ..storage.database import OfferingRepository
+from ..utils.config import OFFERING_CACHE_SIZE, OFFERING_CACHE_TTL
+from ..utils.logger import setup_logger
+from .unit_offering import UnitOffering
+
+logger = setup_logger(__name__)
+
+# Stored offerings older than this are deleted when the cache is created
+STORED_OFFERING_MAX_AGE = 7 * 24 * 3600
+
+# Hidden form fields of a UnitOffering, stored as one JSON object
+_FIELDS = ('student_id', 'paper_type', 'req_session', 'req_sid', 'req_with_class')
+
+
+def content_hash(content: bytes) -> str:
+    """Hash of a raw unit page, to tell whether it changed since it was parsed."""
+    return hashlib.sha1(content).hexdigest()
+
+
+@dataclass
+class CachedOffering:
+    """A parsed unit page and when it was last fetched."""
+    offering: UnitOffering
+    content_hash: str
+    fetched_at: float
+
+    def age(self, now: float) -> float:
+        return now - self.fetched_at
+
+
+class OfferingCache:
+    """
+    Parsed unit pages keyed by student and unit code.
+
+    An in-memory LRU sits in front of the optional SQLite store, so a warm
+    start still finds the offerings of the previous run. get() serves
+    entries younger than a TTL without any request, for planning. After a
+    live fetch, lookup() returns the already parsed offering when the page
+    hashes the same, so the page is not parsed again and the offering's
+    fingerprint, and every bid plan built from it, stays the same.
+    """
+
+    def __init__(self, repository: OfferingRepository = None, ttl: float = OFFERING_CACHE_TTL,
+                 capacity: int = OFFERING_CACHE_SIZE, clock: Callable[[], float] = time.time):
+        """
+        Args:
+            repository (OfferingRepository): SQLite store, or None for a memory-only cache
+            ttl (float): Default age in seconds up to which get() serves an entry
+            capacity (int): Offerings kept in memory
+            clock (callable): Wall clock, replaceable for testing
+        """
+        self.repository = repository
+        self.ttl = ttl
+        self.capacity = max(1, capacity)
+        self._clock = clock
+        self._entries: "OrderedDict[Tuple[str, str], CachedOffering]" = OrderedDict()
+        self._lock = Lock()
+        if self.repository:
+            try:
+                removed = self.repository.prune(self._clock() - STORED_OFFERING_MAX_AGE)
+                if removed:
+                    logger.debug(f"Removed {removed} stored unit offerings")
+            except Exception as e:
+                logger.warning(f"Could not prune stored unit offerings: {str(e)}")
+
+    def get(self, student_id: str, unit_code: str, max_age: float = None) -> Optional[UnitOffering]:
+        """
+        Return a cached offering if it was fetched recently enough.
+
+        Args:
+            student_id (str): Logged-in student
+            unit_code (str): Unit code
+            max_age (float): Oldest acceptable entry in seconds; defaults to the TTL
+
+        Returns:
+            UnitOffering: The cached offering, or None if there is no fresh entry
+        """
+        entry = self._entry(student_id, unit_code)
+        if entry is None:
+            return None
+        if entry.age(self._clock()) > (self.ttl if max_age is None else max_age):
+            return None
+        return entry.offering
+
+    def lookup(self, student_id: str, unit_code: str, page_hash: str) -> Optional[UnitOffering]:
+        """
+        Return the cached offering of a page that has just been fetched again, if it is unchanged.
+
+        A hit counts as a fresh fetch for the TTL.
+
+        Args:
+            student_id (str): Logged-in student
+            unit_code (str): Unit code
+            page_hash (str): content_hash() of the new page
+
+        Returns:
+            UnitOffering: The offering parsed from the same page earlier, or None
+        """
+        entry = self._entry(student_id, unit_code)
+        if entry is None or entry.content_hash != page_hash:
+            return None
+        entry.fetched_at = self._clock()
+        if self.repository:
+            try:
+                self.repository.touch_offering(student_id, unit_code, entry.fetched_at)
+            except Exception as e:
+                logger.warning(f"Could not update stored unit offering {unit_code}: {str(e)}")
+        return entry.offering
+
+    def put(self, student_id: str, offering: UnitOffering, page_hash: str) -> None:
+        """
+        Cache an offering parsed from a freshly fetched page.
+
+        Args:
+            student_id (str): Logged-in student
+            offering (UnitOffering): Parsed page
+            page_hash (str): content_hash() of the page
+        """
+        entry = CachedOffering(offering, page_hash, self._clock())
+        self._remember((student_id, offering.unit_code), entry)
+        if self.repository:
+            groups = [
+                (kind, number, req_mid, *offering.seats.get((kind, number), (None, None)),
+                 offering.meetings.get((kind, number), []))
+                for (kind, number), req_mid in offering.groups.items()
+            ]
+            fields = {name: getattr(offering, name) for name in _FIELDS}
+            try:
+                self.repository.save_offering(student_id, offering.unit_code, page_hash, fields, groups,
+                                              entry.fetched_at)
+            except Exception as e:
+                logger.warning(f"Could not store unit offering {offering.unit_code}: {str(e)}")
+
+    def invalidate(self, student_id: str, unit_code: str) -> None:
+        """Forget a unit's offering, e.g. after the portal rejected a bid built from it."""
+        with self._lock:
+            self._entries.pop((student_id, unit_code), None)
+        if self.repository:
+            try:
+                self.repository.delete_offering(student_id, unit_code)
+            except Exception as e:
+                logger.warning(f"Could not delete stored unit offering {unit_code}: {str(e)}")
+
+    def _entry(self, student_id: str, unit_code: str) -> Optional[CachedOffering]:
+        key = (student_id, unit_code)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if not self.repository:
+            return None
+
+        try:
+            row = self.repository.load_offering(student_id, unit_code)
+        except Exception as e:
+            logger.warning(f"Could not load stored unit offering {unit_code}: {str(e)}")
+            return None
+        if row is None:
+            return None
+        offering = UnitOffering(unit_code=unit_code, **row['fields'])
+        for kind, number, req_mid, capacity, vacancy, meetings in row['groups']:
+            offering.groups[(kind, number)] = req_mid
+            offering.seats[(kind, number)] = (capacity, vacancy)
+            offering.meetings[(kind, number)] = [tuple(meeting) for meeting in meetings]
+        entry = CachedOffering(offering, row['content_hash'], row['fetched_at'])
+        self._remember(key, entry)
+        return entry
+
+    def _remember(self, key: Tuple[str, str], entry: CachedOffering) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
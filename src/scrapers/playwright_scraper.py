@@ -8,14 +8,15 @@ from typing import List
 from playwright.sync_api import Error, TimeoutError as PlaywrightTimeoutError, sync_playwright
 
 from ..utils.config import COURSE_REGISTRATION_URL, LOGIN_URL, PLAYWRIGHT_OPTIONS, WAIT_TIME_SHORT
-from ..utils.captcha_solver import CaptchaSolver
+from ..utils.captcha_solver import get_captcha_solver
 from ..utils.logger import setup_logger
 from ..utils.timetable_reader import Course
+from .events import EventKind, RegistrationEventSource
 
 logger = setup_logger(__name__)
 
 
-class PlaywrightScraper:
+class PlaywrightScraper(RegistrationEventSource):
     """Browser automation scraper powered by Playwright."""
 
     def __init__(self):
@@ -27,7 +28,7 @@ class PlaywrightScraper:
         self._password = ""
         self._headless_mode = False
         self._cancellation_token = Event()
-        self.captcha_solver = CaptchaSolver()
+        self.captcha_solver = get_captcha_solver()
 
     def set_headless_mode(self, enabled: bool) -> None:
         self._headless_mode = enabled
@@ -106,8 +107,12 @@ class PlaywrightScraper:
         for course in courses:
             self._check_cancellation()
             logger.info(f"[Playwright] Attempting bid for {course.code} - {course.name}")
-            if not self.register_course(course):
+            self._emit(EventKind.COURSE_STARTED, course.code, f"Registering {course.code} - {course.name}")
+            if self.register_course(course):
+                self._emit(EventKind.OUTCOME, course.code, "Browser flow completed", success=True)
+            else:
                 logger.warning(f"[Playwright] Registration flow failed for {course.code}")
+                self._emit(EventKind.OUTCOME, course.code, "Browser flow failed", success=False)
 
         return True
 
@@ -171,6 +176,7 @@ class PlaywrightScraper:
                 return False
 
             submit_button.first.click()
+            self._emit(EventKind.BID_SUBMITTED, course.code, "Bid submitted")
             self._page.wait_for_timeout(500)
             return True
         except (PlaywrightTimeoutError, Error) as exc:
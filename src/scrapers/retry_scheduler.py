@@ -0,0 +1,94 @@
+"""
+Per-course spacing of registration retries.
+"""
+
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional
+
+from ..utils.config import RETRY_BASE_DELAY, RETRY_FAST_RESPONSE, RETRY_JITTER, RETRY_MAX_DELAY
+
+
+@dataclass
+class _RetryState:
+    attempts: int = 0
+    delay: float = 0.0       # backoff before jitter
+    next_at: float = 0.0     # clock time of the next allowed attempt
+
+
+class RetryScheduler:
+    """
+    Decide when each failed course may be attempted again.
+
+    A course that failed with a quick answer from the portal (a full class, a
+    rejected bid) is retried sooner and sooner, down to base_delay. A slow
+    answer, or no answer at all, doubles its delay up to max_delay so an
+    overloaded portal is not pushed into 429/5xx responses. Each delay is
+    randomised by +/- jitter so courses do not retry in lockstep.
+    """
+
+    def __init__(self, base_delay: float = RETRY_BASE_DELAY, max_delay: float = RETRY_MAX_DELAY,
+                 jitter: float = RETRY_JITTER, fast_response: float = RETRY_FAST_RESPONSE,
+                 clock: Callable[[], float] = time.monotonic,
+                 rng: Callable[[], float] = random.random):
+        """
+        Args:
+            base_delay (float): Shortest delay between attempts of a course, in seconds
+            max_delay (float): Longest delay between attempts of a course, in seconds
+            jitter (float): Relative randomisation of each delay, 0 to 1
+            fast_response (float): Round trips at most this long count as a healthy portal
+            clock (callable): Monotonic clock, replaceable for testing
+            rng (callable): Uniform [0, 1) source, replaceable for testing
+        """
+        self.base_delay = base_delay
+        self.max_delay = max(max_delay, base_delay)
+        self.jitter = min(max(jitter, 0.0), 1.0)
+        self.fast_response = fast_response
+        self._clock = clock
+        self._rng = rng
+        self._states: Dict[str, _RetryState] = {}
+
+    def attempts(self, key: str) -> int:
+        """Number of attempts recorded for a course."""
+        state = self._states.get(key)
+        return state.attempts if state else 0
+
+    def record(self, key: str, success: bool, elapsed: Optional[float] = None) -> float:
+        """
+        Record the result of an attempt and schedule the next one.
+
+        Args:
+            key (str): Course code
+            success (bool): Whether the attempt succeeded
+            elapsed (float): Round trip of the attempt's last request, None if it got no answer
+
+        Returns:
+            float: Seconds until the course may be attempted again (0 on success)
+        """
+        state = self._states.setdefault(key, _RetryState())
+        state.attempts += 1
+        if success:
+            state.delay = 0.0
+            state.next_at = self._clock()
+            return 0.0
+
+        if elapsed is not None and elapsed <= self.fast_response:
+            state.delay = max(self.base_delay, state.delay / 2)
+        else:
+            state.delay = min(self.max_delay, max(self.base_delay, state.delay * 2))
+
+        delay = state.delay * (1 + self.jitter * (2 * self._rng() - 1))
+        state.next_at = self._clock() + delay
+        return delay
+
+    def due(self, keys: Iterable[str]) -> List[str]:
+        """Keys whose next attempt time has passed, in the given order."""
+        now = self._clock()
+        return [key for key in keys if key not in self._states or self._states[key].next_at <= now]
+
+    def wait_time(self, keys: Iterable[str]) -> float:
+        """Seconds until the earliest of the given keys is due."""
+        now = self._clock()
+        waits = [self._states[key].next_at - now if key in self._states else 0.0 for key in keys]
+        return max(0.0, min(waits, default=0.0))
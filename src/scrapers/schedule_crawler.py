@@ -0,0 +1,382 @@
+"""
+Crawler that copies the portal's master schedule into the local catalog.
+"""
+
+import codecs
+import hashlib
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from threading import Lock, local
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+from requests.cookies import RequestsCookieJar
+
+from ..storage.database import CatalogRepository
+from ..utils.config import (
+    CATALOG_BATCH_SIZE, CATALOG_MAX_AGE, CATALOG_MAX_WORKERS, DEFAULT_HEADERS, HOME_URL
+)
+from ..utils.logger import setup_logger
+from .unit_offering import CAPACITY_HEADER, DAY_HEADER, TIME_HEADER, column_index, parse_meeting
+
+logger = setup_logger(__name__)
+
+# Header texts of the master schedule columns; group rows are read by these names
+TYPE_HEADER = 'Type'
+GROUP_HEADER = 'Group'
+ROOM_HEADER = 'Room'
+
+# "UECS2001 - DATA STRUCTURES" heading that starts each unit, the only filled cell of its row
+UNIT_HEADER = re.compile(r'^([A-Z]{2,6}\d{3,5}[A-Z]?)\s*-\s*(.*)$')
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# (day index, start minute, end minute, room) of one weekly meeting
+ScheduleMeeting = Tuple[int, int, int, str]
+
+
+@dataclass
+class ScheduleUnit:
+    """One unit of the master schedule with its groups and meeting times."""
+    code: str
+    name: str
+    capacities: Dict[Tuple[str, int], Optional[int]] = field(default_factory=dict)
+    meetings: Dict[Tuple[str, int], List[ScheduleMeeting]] = field(default_factory=dict)
+
+    def fingerprint(self) -> str:
+        """Hash of the unit's rows, to tell whether it changed since the last crawl."""
+        payload = [
+            self.code, self.name,
+            sorted([kind, number, capacity, self.meetings.get((kind, number), [])]
+                   for (kind, number), capacity in self.capacities.items())
+        ]
+        return hashlib.sha1(json.dumps(payload).encode('utf-8')).hexdigest()
+
+    def group_rows(self) -> List[tuple]:
+        """Groups in the shape CatalogRepository.save_units stores."""
+        return [(kind, number, capacity, self.meetings.get((kind, number), []))
+                for (kind, number), capacity in self.capacities.items()]
+
+
+@dataclass
+class CrawlResult:
+    """What a crawl found and wrote."""
+    seen: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    skipped: int = 0            # units not fetched because their catalog entry is recent
+    not_modified: bool = False  # the portal answered 304 to the conditional request
+
+    def summary(self) -> str:
+        if self.not_modified:
+            return "Master schedule not modified since the last crawl"
+        text = f"{self.seen} units read, {self.changed} updated, {self.unchanged} unchanged, {self.removed} removed"
+        if self.skipped:
+            text += f", {self.skipped} still fresh"
+        return text
+
+
+class MasterScheduleParser(HTMLParser):
+    """
+    Incremental parser of the master schedule page.
+
+    Feed it the page in chunks; each unit is moved to `units` as soon as
+    its table ends, so a crawl can write units while the page is still
+    downloading. Columns are located from the last row of <th> cells, so
+    group rows seen before any such header are not read.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.units: List[ScheduleUnit] = []
+        self._unit: Optional[ScheduleUnit] = None
+        self._group: Optional[Tuple[str, int]] = None   # group that continuation rows belong to
+        self._columns: Optional[Dict[str, Optional[int]]] = None
+        self._cells: Optional[List[str]] = None
+        self._header_row = False
+        self._text: Optional[List[str]] = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'tr':
+            self._cells = []
+            self._header_row = False
+        elif tag in ('td', 'th') and self._cells is not None:
+            self._text = []
+            self._header_row = self._header_row or tag == 'th'
+
+    def handle_data(self, data):
+        if self._text is not None:
+            self._text.append(data)
+
+    def handle_endtag(self, tag):
+        if tag in ('td', 'th') and self._text is not None and self._cells is not None:
+            self._cells.append(' '.join(''.join(self._text).split()))
+            self._text = None
+        elif tag == 'tr' and self._cells is not None:
+            if self._header_row:
+                self._read_header(self._cells)
+            else:
+                self._row(self._cells)
+            self._cells = None
+        elif tag == 'table':
+            self._finish_unit()
+
+    def close(self):
+        super().close()
+        self._finish_unit()
+
+    def _read_header(self, cells: List[str]) -> None:
+        columns = {name: column_index(cells, name)
+                   for name in (TYPE_HEADER, GROUP_HEADER, DAY_HEADER, TIME_HEADER, ROOM_HEADER, CAPACITY_HEADER)}
+        if None in (columns[TYPE_HEADER], columns[GROUP_HEADER]):
+            logger.warning(f"Master schedule header without Type and Group columns ignored: {cells}")
+            self._columns = None
+        else:
+            self._columns = columns
+
+    def _row(self, cells: List[str]) -> None:
+        filled = [cell for cell in cells if cell]
+        header = UNIT_HEADER.match(filled[0]) if len(filled) == 1 else None
+        if header:
+            self._finish_unit()
+            self._unit = ScheduleUnit(header.group(1), header.group(2).strip())
+            return
+        if self._unit is None or self._columns is None:
+            return
+
+        def cell(name: str) -> str:
+            index = self._columns[name]
+            return cells[index] if index is not None and index < len(cells) else ''
+
+        kind, number = cell(TYPE_HEADER), cell(GROUP_HEADER)
+        if kind and number.isdigit():
+            self._group = (kind, int(number))
+            capacity = cell(CAPACITY_HEADER)
+            self._unit.capacities.setdefault(self._group, int(capacity) if capacity.isdigit() else None)
+            self._unit.meetings.setdefault(self._group, [])
+        elif kind or number or self._group is None:
+            return
+
+        meeting = parse_meeting(cell(DAY_HEADER), cell(TIME_HEADER))
+        if meeting:
+            self._unit.meetings[self._group].append(meeting + (cell(ROOM_HEADER),))
+
+    def _finish_unit(self) -> None:
+        if self._unit is not None:
+            self.units.append(self._unit)
+        self._unit = None
+        self._group = None
+
+
+def iter_schedule_units(chunks: Iterable[bytes], encoding: str = 'utf-8') -> Iterator[ScheduleUnit]:
+    """
+    Parse master schedule units from the raw page as it arrives.
+
+    Args:
+        chunks (iterable): Byte chunks of the page, e.g. Response.iter_content()
+        encoding (str): Page encoding
+
+    Yields:
+        ScheduleUnit: Each unit once its table is complete
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    parser = MasterScheduleParser()
+    for chunk in chunks:
+        parser.feed(decoder.decode(chunk))
+        if parser.units:
+            yield from parser.units
+            parser.units.clear()
+    parser.feed(decoder.decode(b'', final=True))
+    parser.close()
+    yield from parser.units
+
+
+class ScheduleCrawler:
+    """
+    Copy the master schedule into the catalog, writing only the units that changed.
+
+    crawl() streams the whole schedule in one conditional request and
+    compares each unit's fingerprint with the stored one; units that
+    disappeared are removed. refresh_units() fetches chosen units on a
+    bounded worker pool and skips units crawled recently; max_workers only
+    applies there, as crawl() makes a single request.
+    """
+
+    def __init__(self, catalog: CatalogRepository, cookies: RequestsCookieJar = None, url: str = HOME_URL,
+                 max_workers: int = CATALOG_MAX_WORKERS, batch_size: int = CATALOG_BATCH_SIZE,
+                 timeout: float = 30):
+        """
+        Args:
+            catalog (CatalogRepository): Where the units are stored
+            cookies (RequestsCookieJar): Authenticated portal cookies, if the schedule needs a login
+            url (str): Master schedule page
+            max_workers (int): Units fetched at once by refresh_units()
+            batch_size (int): Changed units written per transaction
+            timeout (float): Timeout per request in seconds
+        """
+        self.catalog = catalog
+        self.cookies = cookies
+        self.url = url
+        self.max_workers = max(1, max_workers)
+        self.batch_size = max(1, batch_size)
+        self.timeout = timeout
+        self._local = local()
+        self._sessions: List[requests.Session] = []
+        self._sessions_lock = Lock()
+
+    def _session(self) -> requests.Session:
+        # One session per thread, each with its own copy of the cookies, so the
+        # crawl never writes to the jar of the scraper it borrowed them from
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(DEFAULT_HEADERS)
+            if self.cookies is not None:
+                session.cookies = self.cookies.copy()
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
+
+    def close(self) -> None:
+        """Close the sessions opened by crawl() and refresh_units(); later calls open new ones."""
+        with self._sessions_lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+        self._local = local()
+
+    def crawl(self) -> CrawlResult:
+        """
+        Download the whole master schedule and store the units that changed.
+
+        Returns:
+            CrawlResult: Counts of the units read and written
+        """
+        try:
+            return self._crawl()
+        finally:
+            self.close()
+
+    def _crawl(self) -> CrawlResult:
+        result = CrawlResult()
+        headers = {}
+        etag, last_modified = self.catalog.get_meta('etag'), self.catalog.get_meta('last_modified')
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+        stored = self.catalog.unit_hashes()
+        seen = set()
+        batch = []
+        unchanged = []
+        crawled_at = time.time()
+        with self._session().get(self.url, headers=headers, stream=True, timeout=self.timeout, verify=False) as response:
+            if response.status_code == 304:
+                result.not_modified = True
+                return result
+            response.raise_for_status()
+            chunks = response.iter_content(chunk_size=STREAM_CHUNK_SIZE)
+            for unit in iter_schedule_units(chunks, response.encoding or 'utf-8'):
+                if unit.code in seen:
+                    continue
+                seen.add(unit.code)
+                digest = unit.fingerprint()
+                if unit.code in stored and stored[unit.code][0] == digest:
+                    unchanged.append(unit.code)
+                    continue
+                batch.append((unit.code, unit.name, digest, unit.group_rows()))
+                if len(batch) >= self.batch_size:
+                    self.catalog.save_units(batch, crawled_at)
+                    result.changed += len(batch)
+                    batch = []
+            response_etag = response.headers.get('ETag')
+            response_modified = response.headers.get('Last-Modified')
+
+        self.catalog.save_units(batch, crawled_at)
+        result.changed += len(batch)
+        self.catalog.touch_units(unchanged, crawled_at)
+        result.seen, result.unchanged = len(seen), len(unchanged)
+
+        # An empty page is more likely an expired session than an empty schedule
+        if not seen:
+            logger.warning("The master schedule listed no units; the catalog was left unchanged")
+            return result
+        removed = [code for code in stored if code not in seen]
+        self.catalog.delete_units(removed)
+        result.removed = len(removed)
+        if response_etag:
+            self.catalog.set_meta('etag', response_etag)
+        if response_modified:
+            self.catalog.set_meta('last_modified', response_modified)
+
+        logger.info(f"Master schedule crawled: {result.summary()}")
+        return result
+
+    def refresh_units(self, unit_codes: Iterable[str], max_age: float = CATALOG_MAX_AGE) -> CrawlResult:
+        """
+        Fetch the schedule of chosen units concurrently and store the ones that changed.
+
+        Args:
+            unit_codes (iterable): Units to refresh
+            max_age (float): Units crawled less than this many seconds ago are not fetched
+
+        Returns:
+            CrawlResult: Counts of the units fetched and written
+        """
+        result = CrawlResult()
+        stored = self.catalog.unit_hashes()
+        now = time.time()
+        due = []
+        for code in dict.fromkeys(code.strip().upper() for code in unit_codes):
+            if code in stored and now - stored[code][1] < max_age:
+                result.skipped += 1
+            else:
+                due.append(code)
+        if not due:
+            return result
+
+        try:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(due)),
+                                    thread_name_prefix="catalog-worker") as pool:
+                fetched = list(pool.map(self._fetch_unit, due))
+        finally:
+            self.close()
+
+        changed, unchanged = [], []
+        for code, unit in zip(due, fetched):
+            if unit is None:
+                continue
+            result.seen += 1
+            digest = unit.fingerprint()
+            if code in stored and stored[code][0] == digest:
+                unchanged.append(code)
+            else:
+                changed.append((unit.code, unit.name, digest, unit.group_rows()))
+        crawled_at = time.time()
+        for start in range(0, len(changed), self.batch_size):
+            self.catalog.save_units(changed[start:start + self.batch_size], crawled_at)
+        self.catalog.touch_units(unchanged, crawled_at)
+        result.changed, result.unchanged = len(changed), len(unchanged)
+        logger.info(f"Catalog units refreshed: {result.summary()}")
+        return result
+
+    def _fetch_unit(self, unit_code: str) -> Optional[ScheduleUnit]:
+        """Fetch the master schedule filtered to one unit; None if it is not listed or the request failed."""
+        try:
+            response = self._session().post(self.url, data={'reqUnit': unit_code}, timeout=self.timeout, verify=False)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.warning(f"Could not fetch the schedule of {unit_code}: {str(e)}")
+            return None
+        for unit in iter_schedule_units([response.content], response.encoding or 'utf-8'):
+            if unit.code == unit_code:
+                return unit
+        logger.warning(f"{unit_code} is not in the master schedule")
+        return None
@@ -0,0 +1,153 @@
+"""
+Background heartbeat that keeps a portal session warm between bidding rounds.
+"""
+
+import time
+from contextlib import contextmanager
+from threading import Event, Lock, Thread
+
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class SessionKeepAlive:
+    """
+    Ping the portal while the scraper is idle and re-authenticate ahead of time.
+
+    The portal drops sessions after a period of inactivity, and an expired
+    session costs a full CAPTCHA login. The heartbeat sends a cheap
+    authenticated request whenever the session has been idle for `interval`
+    seconds, and logs in again once the session is older than `max_age` or a
+    ping finds it expired. Nothing is done while a bidding round holds the
+    critical section, so relogins never land on the hot path.
+    """
+
+    def __init__(self, ping, relogin, interval: float = 300.0, max_age: float = 1500.0):
+        """
+        Args:
+            ping (callable): Sends one authenticated request; returns False if the session expired
+            relogin (callable): Performs a full login; returns True on success
+            interval (float): Idle seconds before a ping is sent
+            max_age (float): Session age in seconds after which it is renewed proactively, 0 to disable
+        """
+        self._ping = ping
+        self._relogin = relogin
+        self.interval = interval
+        self.max_age = max_age
+
+        self._lock = Lock()
+        self._beat_lock = Lock()   # held by a running beat; bidding rounds wait for it
+        self._stop = Event()
+        self._thread = None
+        self._critical = 0
+        self._retry_at = 0.0
+        self.session_started_at = None
+        self.last_activity = None
+
+    @property
+    def session_age(self) -> float:
+        """Seconds since the current session logged in, or None before the first login."""
+        if self.session_started_at is None:
+            return None
+        return time.monotonic() - self.session_started_at
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def mark_login(self, age: float = 0.0) -> None:
+        """
+        Record that a session has just been established or restored.
+
+        Args:
+            age (float): Seconds since the session originally logged in
+        """
+        with self._lock:
+            self.last_activity = time.monotonic()
+            self.session_started_at = self.last_activity - age
+
+    def mark_activity(self) -> None:
+        """Record a request that reset the portal's idle timer."""
+        self.last_activity = time.monotonic()
+
+    def needs_renewal(self, margin: float = 0.0) -> bool:
+        """
+        Whether the session is due for a proactive relogin.
+
+        Args:
+            margin (float): Extra seconds the session must still be valid for
+
+        Returns:
+            bool: True if the session is older than max_age minus margin
+        """
+        age = self.session_age
+        return bool(self.max_age) and age is not None and age >= self.max_age - margin
+
+    @contextmanager
+    def critical(self):
+        """Suspend pings and relogins for the duration of a bidding round."""
+        with self._beat_lock:
+            self._critical += 1
+        try:
+            yield
+        finally:
+            with self._beat_lock:
+                self._critical -= 1
+
+    def start(self) -> None:
+        """Start the heartbeat thread if it is not already running."""
+        with self._lock:
+            if self.running:
+                return
+            self._stop.clear()
+            self._thread = Thread(target=self._run, name="session-keepalive", daemon=True)
+            self._thread.start()
+        logger.info(f"Session keep-alive started (interval {self.interval:.0f}s, max age {self.max_age:.0f}s)")
+
+    def stop(self) -> None:
+        """Stop the heartbeat thread."""
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            thread.join(timeout=5)
+            logger.info("Session keep-alive stopped")
+
+    def _run(self) -> None:
+        # Wake often enough to honour both the idle interval and the age limit
+        tick = max(1.0, min(self.interval, self.max_age or self.interval) / 10)
+        while not self._stop.wait(tick):
+            with self._beat_lock:
+                if self._critical or self.session_started_at is None:
+                    continue
+                try:
+                    self._beat()
+                except Exception as e:
+                    logger.warning(f"Session keep-alive failed: {str(e)}")
+
+    def _beat(self) -> None:
+        if time.monotonic() < self._retry_at:
+            return
+
+        if self.needs_renewal():
+            logger.info(f"Session is {self.session_age:.0f}s old, renewing it ahead of time")
+            self._renew()
+            return
+
+        if time.monotonic() - (self.last_activity or 0) < self.interval:
+            return
+
+        if self._ping():
+            self.mark_activity()
+            logger.debug(f"Session keep-alive ping ok (age {self.session_age:.0f}s)")
+        else:
+            logger.info("Keep-alive found the session expired, logging in again")
+            self._renew()
+
+    def _renew(self) -> None:
+        if self._relogin():
+            self.mark_login()
+        else:
+            logger.error("Proactive relogin failed; the next request will retry")
+            # Back off a full interval before trying again
+            self._retry_at = time.monotonic() + self.interval
@@ -0,0 +1,109 @@
+"""
+Generation-tagged portal authentication shared by every request of an engine.
+"""
+
+from threading import Event, Lock
+from typing import Callable, Tuple
+
+from requests.cookies import RequestsCookieJar
+
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class SessionManager:
+    """
+    Hand out the current authenticated cookie jar tagged with a generation.
+
+    A relogin produces a new jar and bumps the generation; the HTTP sessions
+    and their connection pools are never rebuilt. Callers report expiry with
+    the generation their request was sent under. The first report starts a
+    single relogin, later reports for the same generation wait for it, and
+    reports for an older generation return immediately because a newer
+    session already exists.
+    """
+
+    def __init__(self, authenticate: Callable[[RequestsCookieJar], bool]):
+        """
+        Args:
+            authenticate (callable): Logs in with the given empty jar; returns True on success
+        """
+        self._authenticate = authenticate
+        self._lock = Lock()
+        self._generation = 0
+        self._jar = RequestsCookieJar()
+        self._renewal = None   # Event of the relogin in flight
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    @property
+    def jar(self) -> RequestsCookieJar:
+        return self._jar
+
+    def current(self) -> Tuple[int, RequestsCookieJar]:
+        """
+        Returns:
+            tuple: (generation, cookie jar) of the current session
+        """
+        with self._lock:
+            return self._generation, self._jar
+
+    def install(self, jar: RequestsCookieJar) -> int:
+        """
+        Make an already authenticated jar the current session.
+
+        Args:
+            jar (RequestsCookieJar): Cookies of a fresh login
+
+        Returns:
+            int: The new generation
+        """
+        with self._lock:
+            self._jar = jar
+            self._generation += 1
+            return self._generation
+
+    def renew(self, failed_generation: int, timeout: float = None) -> bool:
+        """
+        Replace the session that failed, once, however many callers report it.
+
+        Args:
+            failed_generation (int): Generation the failing request was sent with
+            timeout (float): Seconds to wait for a relogin started by another caller
+
+        Returns:
+            bool: True if a session newer than failed_generation is available
+        """
+        with self._lock:
+            if failed_generation < self._generation:
+                return True
+            leader = self._renewal is None
+            if leader:
+                self._renewal = Event()
+            renewal = self._renewal
+
+        if not leader:
+            renewal.wait(timeout)
+            return self._generation > failed_generation
+
+        success = False
+        try:
+            logger.info(f"Renewing session generation {failed_generation}")
+            jar = RequestsCookieJar()
+            success = bool(self._authenticate(jar))
+            if success:
+                generation = self.install(jar)
+                logger.info(f"Session generation {generation} is active")
+            return success
+        except Exception as e:
+            logger.error(f"Error during relogin attempt: {str(e)}")
+            return False
+        finally:
+            with self._lock:
+                self._renewal = None
+            renewal.set()
+            if not success:
+                logger.error("Failed to relogin after session expiration")
@@ -0,0 +1,236 @@
+"""
+Parsed snapshot of a unit page from the registration portal.
+"""
+
+import hashlib
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .extraction import get_extractor
+
+FORM_FIELDS = ('reqFregkey', 'reqPaperType', 'reqSession', 'reqSid', 'reqWithClass')
+
+# Header texts of the columns read from a group row, located by name since their position varies
+DAY_HEADER = 'Day'
+TIME_HEADER = 'Time'
+CAPACITY_HEADER = 'Capacity'
+VACANCY_HEADER = 'Vacancy'
+
+DAYS = ('MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT', 'SUN')
+_CLOCK = re.compile(r'(\d{1,2}):(\d{2})\s*([AP]M)', re.IGNORECASE)
+
+# (day index, start minute, end minute) of one weekly meeting
+Meeting = Tuple[int, int, int]
+
+
+def column_index(headers: List[str], name: str) -> Optional[int]:
+    """
+    Find a column by its header text, ignoring case and surrounding spaces.
+
+    Returns:
+        int: Position of the column, or None if the table has no such header
+    """
+    wanted = name.strip().lower()
+    for index, header in enumerate(headers):
+        if header.strip().lower() == wanted:
+            return index
+    return None
+
+
+def _cell(cells: List[str], index: Optional[int]) -> str:
+    return cells[index] if index is not None and index < len(cells) else ''
+
+
+def _parse_count(cells: List[str], index: Optional[int]) -> Optional[int]:
+    value = _cell(cells, index)
+    return int(value) if value.isdigit() else None
+
+
+def parse_meeting(day: str, time_range: str) -> Optional[Meeting]:
+    """
+    Parse the Day and Time cells of a group row, e.g. "Mon" and "10:00 AM - 12:00 PM".
+
+    Returns:
+        tuple: (day index, start minute, end minute), or None if the cells are not a meeting time
+    """
+    day = day.strip()[:3].upper()
+    clocks = _CLOCK.findall(time_range)
+    if day not in DAYS or len(clocks) != 2:
+        return None
+    minutes = []
+    for hour, minute, suffix in clocks:
+        minutes.append((int(hour) % 12 + (12 if suffix.upper() == 'PM' else 0)) * 60 + int(minute))
+    start, end = minutes
+    if end <= start:
+        return None
+    return DAYS.index(day), start, end
+
+
+@dataclass
+class SlotChoice:
+    """Outcome of picking a group of one class type."""
+    slot_number: Optional[int] = None
+    req_mid: Optional[str] = None
+    skipped: List[Tuple[int, str]] = field(default_factory=list)   # (group number, reason)
+
+
+@dataclass
+class UnitOffering:
+    """Hidden form fields and group rows of one ``registerUnitSurvey.jsp`` page."""
+    unit_code: str
+    student_id: str
+    paper_type: str
+    req_session: str
+    req_sid: str
+    req_with_class: str
+    groups: Dict[Tuple[str, int], str] = field(default_factory=dict)
+    # (capacity, vacancy) per group; None where the page leaves the cell blank
+    seats: Dict[Tuple[str, int], Tuple[Optional[int], Optional[int]]] = field(default_factory=dict)
+    # Weekly meetings per group, from the group's row and the rows continuing it
+    meetings: Dict[Tuple[str, int], List[Meeting]] = field(default_factory=dict)
+
+    def student_info(self) -> dict:
+        """
+        Return the hidden form fields in the shape used by the bidding flow.
+
+        Returns:
+            dict: Dictionary containing student information
+        """
+        return {
+            'student_id': self.student_id,
+            'paper_type': self.paper_type,
+            'req_session': self.req_session,
+            'reqsid': self.req_sid,
+            'req_with_class': self.req_with_class
+        }
+
+    def resolve(self, class_type: str, slot_number: int) -> Optional[str]:
+        """
+        Look up the reqMid value of a group.
+
+        Args:
+            class_type (str): Class type ("L", "T" or "P")
+            slot_number (int): Group number
+
+        Returns:
+            str: The reqMid value or None if the group is not offered
+        """
+        return self.groups.get((class_type, int(slot_number)))
+
+    def vacancy(self, class_type: str, slot_number: int) -> Optional[int]:
+        """
+        Args:
+            class_type (str): Class type ("L", "T" or "P")
+            slot_number (int): Group number
+
+        Returns:
+            int: Seats left in the group, or None if the page does not say
+        """
+        return self.seats.get((class_type, int(slot_number)), (None, None))[1]
+
+    def select(self, class_type: str, slot_numbers: Iterable[int]) -> SlotChoice:
+        """
+        Pick the highest-priority group that is offered and has seats left.
+
+        Groups with an unknown vacancy count as available, so pages without
+        the Vacancy column behave as before.
+
+        Args:
+            class_type (str): Class type ("L", "T" or "P")
+            slot_numbers (iterable): Group numbers in priority order
+
+        Returns:
+            SlotChoice: The chosen group (None if every group was skipped) and why the others were passed over
+        """
+        choice = SlotChoice()
+        for slot_number in slot_numbers:
+            req_mid = self.resolve(class_type, slot_number)
+            if not req_mid:
+                choice.skipped.append((int(slot_number), "not offered"))
+                continue
+            capacity, vacancy = self.seats.get((class_type, int(slot_number)), (None, None))
+            if vacancy is not None and vacancy <= 0:
+                choice.skipped.append((int(slot_number), f"full ({capacity if capacity is not None else '?'} seats)"))
+                continue
+            choice.slot_number, choice.req_mid = int(slot_number), req_mid
+            break
+        return choice
+
+    def fingerprint(self) -> str:
+        """
+        Hash of everything a bid is built from, to tell whether the offering changed.
+
+        Returns:
+            str: Hex digest of the form fields and group table
+        """
+        payload = [
+            self.unit_code, self.student_id, self.paper_type, self.req_session, self.req_sid,
+            self.req_with_class, sorted([kind, number, req_mid] for (kind, number), req_mid in self.groups.items()),
+            # Only whether a group is full changes which group a bid picks
+            sorted([kind, number] for (kind, number) in self.groups if self.vacancy(kind, number) == 0)
+        ]
+        return hashlib.sha1(json.dumps(payload).encode('utf-8')).hexdigest()
+
+
+def parse_unit_offering(unit_code: str, content: bytes) -> UnitOffering:
+    """
+    Parse a unit page into a UnitOffering.
+
+    Args:
+        unit_code (str): The unit code the page was fetched for
+        content (bytes): Raw response body
+
+    Returns:
+        UnitOffering: Parsed snapshot
+
+    Raises:
+        ValueError: If the page does not carry the student's form fields
+    """
+    extractor = get_extractor()
+    fields = extractor.hidden_inputs(content, FORM_FIELDS)
+    if not fields.get('reqFregkey'):
+        raise ValueError('Student ID not found.')
+
+    headers, rows = extractor.unit_table(content)
+    # Meetings stay empty without a Day or Time column, seats unknown without Capacity or Vacancy
+    day_column = column_index(headers, DAY_HEADER)
+    time_column = column_index(headers, TIME_HEADER)
+    capacity_column = column_index(headers, CAPACITY_HEADER)
+    vacancy_column = column_index(headers, VACANCY_HEADER)
+
+    groups = {}
+    seats = {}
+    meetings = {}
+    current = None   # group the following continuation rows belong to
+    for cells, req_mid in rows:
+        if len(cells) < 3 or not cells[2].isdigit() or not req_mid:
+            if current and not req_mid and len(cells) > 2 and not cells[2]:
+                meeting = parse_meeting(_cell(cells, day_column), _cell(cells, time_column))
+                if meeting:
+                    meetings[current].append(meeting)
+            else:
+                current = None
+            continue
+        key = (cells[1], int(cells[2]))
+        if key in groups:
+            current = None
+            continue
+        groups[key] = req_mid
+        seats[key] = (_parse_count(cells, capacity_column), _parse_count(cells, vacancy_column))
+        meeting = parse_meeting(_cell(cells, day_column), _cell(cells, time_column))
+        meetings[key] = [meeting] if meeting else []
+        current = key
+
+    return UnitOffering(
+        unit_code=unit_code,
+        student_id=fields['reqFregkey'],
+        paper_type=fields.get('reqPaperType', ''),
+        req_session=fields.get('reqSession', ''),
+        req_sid=fields.get('reqSid', ''),
+        req_with_class=fields.get('reqWithClass', ''),
+        groups=groups,
+        seats=seats,
+        meetings=meetings
+    )
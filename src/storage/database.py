@@ -4,26 +4,93 @@ SQLite storage for settings and courses.
 
 import json
 import os
+import re
 import sqlite3
-from typing import Any, Dict, List
+import threading
+from typing import Any, Dict, List, Optional, Tuple
 
 from ..utils.config import BASE_DIR, SQLITE_DB_PATH
 from ..utils.timetable_reader import Course
 
 
+# Applied to every connection. WAL lets the GUI read while a scraper thread
+# writes, and NORMAL sync is safe under WAL while skipping an fsync per commit.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",
+    "PRAGMA busy_timeout=5000",
+)
+
+# Prepared statements kept per connection
+STATEMENT_CACHE_SIZE = 256
+
+# Stored in PRAGMA user_version; _migrate upgrades older files step by step
+SCHEMA_VERSION = 1
+
+# Class types in the order a course's slots are returned; others follow alphabetically
+SLOT_TYPE_ORDER = ("L", "T", "P")
+
+
+def _slot_type_key(slot_type: str) -> Tuple[int, str]:
+    return (SLOT_TYPE_ORDER.index(slot_type) if slot_type in SLOT_TYPE_ORDER else len(SLOT_TYPE_ORDER), slot_type)
+
+
+def slot_rows(slots: Dict[str, List[int]]) -> Tuple[Tuple[str, int, int], ...]:
+    """(type, group_no, priority) rows of a course's slot preferences, in stored order."""
+    rows = []
+    for slot_type in sorted(slots, key=_slot_type_key):
+        rows.extend((slot_type, int(group_no), priority) for priority, group_no in enumerate(slots[slot_type]))
+    return tuple(rows)
+
+
 class Database:
     """Lightweight sqlite wrapper with schema bootstrap."""
 
     def __init__(self, db_path: str = SQLITE_DB_PATH):
         self.db_path = db_path or os.path.join(BASE_DIR, "data", "app.db")
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._local = threading.local()
+        # Set by _initialize; catalog searches fall back to LIKE without FTS5
+        self.fts5_available = False
         self._initialize()
 
     def _connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        """
+        Return this thread's connection, opening it on first use.
+
+        The connection stays open until the thread calls close() or exits,
+        so sqlite's statement cache is reused across calls. Callers still use
+        ``with database._connect() as conn:`` for transactions; that commits
+        or rolls back but does not close the connection.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, cached_statements=STATEMENT_CACHE_SIZE)
+            conn.row_factory = sqlite3.Row
+            for pragma in CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
         return conn
 
+    def close(self) -> None:
+        """
+        Close the calling thread's connection; a later call on the thread opens a new one.
+
+        Connections of other threads may still be in use and are left open;
+        they are closed when their thread exits and its thread-local storage
+        is released.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        self._local.conn = None
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
     def _initialize(self) -> None:
         with self._connect() as conn:
             conn.execute(
@@ -40,12 +107,210 @@ class Database:
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     code TEXT NOT NULL UNIQUE,
                     name TEXT NOT NULL,
-                    slots_json TEXT NOT NULL,
                     sort_order INTEGER NOT NULL DEFAULT 0
                 )
                 """
             )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS course_slots (
+                    course_id INTEGER NOT NULL REFERENCES courses(id) ON DELETE CASCADE,
+                    type TEXT NOT NULL,
+                    group_no INTEGER NOT NULL,
+                    priority INTEGER NOT NULL,
+                    PRIMARY KEY (course_id, type, priority)
+                ) WITHOUT ROWID
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS auth_sessions (
+                    student_id TEXT NOT NULL,
+                    base_url TEXT NOT NULL,
+                    cookies_json TEXT NOT NULL,
+                    issued_at REAL NOT NULL,
+                    PRIMARY KEY (student_id, base_url)
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS bid_plans (
+                    student_id TEXT NOT NULL,
+                    unit_code TEXT NOT NULL,
+                    form_json TEXT NOT NULL,
+                    course_hash TEXT NOT NULL,
+                    offering_hash TEXT NOT NULL,
+                    built_at REAL NOT NULL,
+                    valid_until REAL NOT NULL,
+                    sort_order INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (student_id, unit_code)
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS unit_offerings (
+                    student_id TEXT NOT NULL,
+                    unit_code TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    fields_json TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (student_id, unit_code)
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS unit_offering_groups (
+                    student_id TEXT NOT NULL,
+                    unit_code TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    group_no INTEGER NOT NULL,
+                    req_mid TEXT NOT NULL,
+                    capacity INTEGER,
+                    vacancy INTEGER,
+                    meetings_json TEXT NOT NULL,
+                    PRIMARY KEY (student_id, unit_code, type, group_no)
+                ) WITHOUT ROWID
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS catalog_units (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    code TEXT NOT NULL UNIQUE,
+                    name TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    crawled_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS catalog_groups (
+                    unit_id INTEGER NOT NULL REFERENCES catalog_units(id) ON DELETE CASCADE,
+                    type TEXT NOT NULL,
+                    group_no INTEGER NOT NULL,
+                    capacity INTEGER,
+                    PRIMARY KEY (unit_id, type, group_no)
+                ) WITHOUT ROWID
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS catalog_sessions (
+                    unit_id INTEGER NOT NULL REFERENCES catalog_units(id) ON DELETE CASCADE,
+                    type TEXT NOT NULL,
+                    group_no INTEGER NOT NULL,
+                    day INTEGER NOT NULL,
+                    start_minute INTEGER NOT NULL,
+                    end_minute INTEGER NOT NULL,
+                    room TEXT NOT NULL DEFAULT ''
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS catalog_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )
+                """
+            )
+            try:
+                # rowid is the catalog_units id
+                conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS catalog_search USING fts5(code, name, prefix='2 4')"
+                )
+                self.fts5_available = True
+            except sqlite3.OperationalError:
+                self.fts5_available = False
+            self._migrate(conn)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_courses_sort_order ON courses(sort_order, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_course_slots_group ON course_slots(type, group_no)")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_catalog_sessions_group ON catalog_sessions(unit_id, type, group_no)"
+            )
+            conn.commit()
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        """Upgrade a database file created by an older version to SCHEMA_VERSION."""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+
+        # One explicit transaction: sqlite3 would run the DDL below in autocommit,
+        # so a failure half way would leave a partly rebuilt schema behind
+        if conn.in_transaction:
             conn.commit()
+        conn.execute("BEGIN")
+        try:
+            if version < 1:
+                self._migrate_course_slots(conn)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def _migrate_course_slots(self, conn: sqlite3.Connection) -> None:
+        """Move the slots_json blobs of `courses` into course_slots rows and drop the column."""
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(courses)")}
+        if "slots_json" not in columns:
+            return
+
+        rows = conn.execute("SELECT id, slots_json FROM courses").fetchall()
+        # Rebuilt rather than ALTER TABLE DROP COLUMN, which older sqlite builds lack
+        conn.execute("DROP TABLE IF EXISTS courses_migrated")
+        conn.execute(
+            """
+            CREATE TABLE courses_migrated (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                code TEXT NOT NULL UNIQUE,
+                name TEXT NOT NULL,
+                sort_order INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        conn.execute(
+            "INSERT INTO courses_migrated(id, code, name, sort_order) SELECT id, code, name, sort_order FROM courses"
+        )
+        conn.execute("DROP TABLE courses")
+        conn.execute("ALTER TABLE courses_migrated RENAME TO courses")
+
+        slots = []
+        for row in rows:
+            try:
+                blob = json.loads(row["slots_json"]) if row["slots_json"] else {}
+                slots.extend((row["id"],) + slot for slot in slot_rows(blob))
+            except (TypeError, ValueError):
+                continue
+        conn.execute("DELETE FROM course_slots")
+        conn.executemany(
+            "INSERT INTO course_slots(course_id, type, group_no, priority) VALUES (?, ?, ?, ?)", slots
+        )
+
+
+_shared_databases: Dict[str, Database] = {}
+_shared_lock = threading.Lock()
+
+
+def get_database(db_path: str = SQLITE_DB_PATH) -> Database:
+    """
+    Return the process-wide Database of a file, shared by the GUI, settings and scrapers.
+
+    Args:
+        db_path (str): Database file
+
+    Returns:
+        Database: The shared instance, so each thread holds one connection to the file
+    """
+    with _shared_lock:
+        database = _shared_databases.get(db_path)
+        if database is None:
+            database = _shared_databases[db_path] = Database(db_path)
+    return database
 
 
 class SettingsRepository:
@@ -71,23 +336,25 @@ class SettingsRepository:
                 value = row["value"]
                 if key in ("headless_mode",):
                     result[key] = value.lower() == "true"
-                elif key in ("max_retries",):
+                elif key in ("max_retries", "font_size"):
                     try:
                         result[key] = int(value)
                     except ValueError:
-                        result[key] = self.DEFAULT_SETTINGS[key]
+                        if key in self.DEFAULT_SETTINGS:
+                            result[key] = self.DEFAULT_SETTINGS[key]
                 else:
                     result[key] = value
         return result
 
     def save_settings(self, settings: Dict[str, Any]) -> None:
+        if not settings:
+            return
         with self.database._connect() as conn:
-            for key, value in settings.items():
-                conn.execute(
-                    "INSERT INTO app_settings(key, value) VALUES(?, ?) "
-                    "ON CONFLICT(key) DO UPDATE SET value=excluded.value",
-                    (key, str(value)),
-                )
+            conn.executemany(
+                "INSERT INTO app_settings(key, value) VALUES(?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+                [(key, str(value)) for key, value in settings.items()],
+            )
             conn.commit()
 
     def migrate_from_json(self, settings_file: str) -> None:
@@ -116,25 +383,121 @@ class CourseRepository:
         self.database = database
 
     def list_courses(self) -> List[Course]:
+        with self.database._connect() as conn:
+            # Plain tuples: this join returns one row per preferred group
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            # Slot rows come in primary key order; types are reordered below
+            rows = cursor.execute(
+                "SELECT c.code, c.name, s.type, s.group_no FROM courses c "
+                "LEFT JOIN course_slots s ON s.course_id = c.id "
+                "ORDER BY c.sort_order ASC, c.id ASC, s.type, s.priority"
+            ).fetchall()
+        courses: List[Course] = []
+        slots = None
+        last_code = None
+        for code, name, slot_type, group_no in rows:
+            if code != last_code:
+                slots = {}
+                courses.append(Course(code=code, name=name, slots=slots))
+                last_code = code
+            if slot_type is not None:
+                if slot_type in slots:
+                    slots[slot_type].append(group_no)
+                else:
+                    slots[slot_type] = [group_no]
+        for course in courses:
+            if len(course.slots) > 1:
+                course.slots = {slot_type: course.slots[slot_type] for slot_type in sorted(course.slots, key=_slot_type_key)}
+        return courses
+
+    def courses_with_group(self, class_type: str, group_no: int) -> List[Tuple[str, int]]:
+        """
+        Find the courses that list a group among their preferences.
+
+        Args:
+            class_type (str): Class type such as "T"
+            group_no (int): Group number
+
+        Returns:
+            list: (unit code, preference index of the group) in course priority order
+        """
         with self.database._connect() as conn:
             rows = conn.execute(
-                "SELECT code, name, slots_json FROM courses ORDER BY sort_order ASC, id ASC"
+                "SELECT c.code, s.priority FROM course_slots s JOIN courses c ON c.id = s.course_id "
+                "WHERE s.type = ? AND s.group_no = ? ORDER BY c.sort_order ASC, c.id ASC",
+                (class_type, int(group_no)),
             ).fetchall()
-            courses: List[Course] = []
-            for row in rows:
-                slots = json.loads(row["slots_json"]) if row["slots_json"] else {}
-                courses.append(Course(code=row["code"], name=row["name"], slots=slots))
-            return courses
+        return [(row["code"], row["priority"]) for row in rows]
+
+    def replace_courses(self, courses: List[Course]) -> Dict[str, int]:
+        """
+        Make the stored course list equal to `courses`, writing only the rows that changed.
+
+        The list is diffed against the tables by unit code; course rows
+        (including sort_order moves) and the slot rows of courses whose
+        preferences changed are written with executemany in one transaction,
+        so swapping two courses rewrites two course rows and no slots.
+
+        Returns:
+            dict: Number of courses inserted, updated and deleted
+        """
+        wanted = {}
+        for index, course in enumerate(courses):
+            if course.code in wanted:
+                raise ValueError(f"Duplicate course code: {course.code}")
+            wanted[course.code] = ((course.name, index), frozenset(slot_rows(course.slots)))
 
-    def replace_courses(self, courses: List[Course]) -> None:
         with self.database._connect() as conn:
-            conn.execute("DELETE FROM courses")
-            for index, course in enumerate(courses):
-                conn.execute(
-                    "INSERT INTO courses(code, name, slots_json, sort_order) VALUES (?, ?, ?, ?)",
-                    (course.code, course.name, json.dumps(course.slots), index),
+            stored = {
+                row["code"]: (row["id"], (row["name"], row["sort_order"]))
+                for row in conn.execute("SELECT id, code, name, sort_order FROM courses")
+            }
+            stored_slots: Dict[int, set] = {}
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            for course_id, slot_type, group_no, priority in cursor.execute(
+                "SELECT course_id, type, group_no, priority FROM course_slots"
+            ):
+                stored_slots.setdefault(course_id, set()).add((slot_type, group_no, priority))
+
+            deletes = [(stored[code][0],) for code in stored if code not in wanted]
+            updates = []
+            slot_changes = []
+            for code, (values, slots) in wanted.items():
+                if code not in stored:
+                    continue
+                course_id, stored_values = stored[code]
+                if stored_values != values:
+                    updates.append(values + (course_id,))
+                if stored_slots.get(course_id, set()) != slots:
+                    slot_changes.append((course_id, slots))
+
+            if deletes:
+                conn.executemany("DELETE FROM course_slots WHERE course_id = ?", deletes)
+                conn.executemany("DELETE FROM courses WHERE id = ?", deletes)
+            if updates:
+                conn.executemany("UPDATE courses SET name = ?, sort_order = ? WHERE id = ?", updates)
+
+            inserted = 0
+            for code, ((name, index), slots) in wanted.items():
+                if code in stored:
+                    continue
+                cursor = conn.execute("INSERT INTO courses(code, name, sort_order) VALUES (?, ?, ?)", (code, name, index))
+                slot_changes.append((cursor.lastrowid, slots))
+                inserted += 1
+
+            if slot_changes:
+                conn.executemany(
+                    "DELETE FROM course_slots WHERE course_id = ?", [(course_id,) for course_id, _ in slot_changes]
+                )
+                conn.executemany(
+                    "INSERT INTO course_slots(course_id, type, group_no, priority) VALUES (?, ?, ?, ?)",
+                    [(course_id,) + slot for course_id, slots in slot_changes for slot in slots],
                 )
             conn.commit()
+        changed = {course_id for *_, course_id in updates} | {course_id for course_id, _ in slot_changes}
+        return {"inserted": inserted, "updated": len(changed) - inserted, "deleted": len(deletes)}
 
     def migrate_from_json(self, courses_file: str) -> None:
         if not courses_file or not os.path.exists(courses_file):
@@ -152,3 +515,330 @@ class CourseRepository:
             self.replace_courses(courses)
         except Exception:
             return
+
+
+class SessionRepository:
+    """Authenticated portal cookies, kept so a later run can skip the CAPTCHA login."""
+
+    def __init__(self, database: Database):
+        self.database = database
+
+    def load_session(self, student_id: str, base_url: str) -> Optional[Tuple[List[Dict[str, Any]], float]]:
+        with self.database._connect() as conn:
+            row = conn.execute(
+                "SELECT cookies_json, issued_at FROM auth_sessions WHERE student_id = ? AND base_url = ?",
+                (student_id, base_url),
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row["cookies_json"]), row["issued_at"]
+
+    def save_session(self, student_id: str, base_url: str, cookies: List[Dict[str, Any]], issued_at: float) -> None:
+        with self.database._connect() as conn:
+            conn.execute(
+                "INSERT INTO auth_sessions(student_id, base_url, cookies_json, issued_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(student_id, base_url) DO UPDATE SET "
+                "cookies_json=excluded.cookies_json, issued_at=excluded.issued_at",
+                (student_id, base_url, json.dumps(cookies), issued_at),
+            )
+            conn.commit()
+
+    def delete_session(self, student_id: str, base_url: str) -> None:
+        with self.database._connect() as conn:
+            conn.execute(
+                "DELETE FROM auth_sessions WHERE student_id = ? AND base_url = ?",
+                (student_id, base_url),
+            )
+            conn.commit()
+
+
+class BidPlanRepository:
+    """Compiled bid forms per student and unit, replayed without parsing at bidding time."""
+
+    def __init__(self, database: Database):
+        self.database = database
+
+    def load_plan(self, student_id: str) -> Dict[str, Dict[str, Any]]:
+        with self.database._connect() as conn:
+            rows = conn.execute(
+                "SELECT unit_code, form_json, course_hash, offering_hash, built_at, valid_until, sort_order "
+                "FROM bid_plans WHERE student_id = ? ORDER BY sort_order ASC",
+                (student_id,),
+            ).fetchall()
+        plan = {}
+        for row in rows:
+            entry = dict(row)
+            entry["form"] = json.loads(entry.pop("form_json"))
+            plan[row["unit_code"]] = entry
+        return plan
+
+    def save_bundle(self, student_id: str, unit_code: str, form: Dict[str, Any], course_hash: str,
+                    offering_hash: str, built_at: float, valid_until: float, sort_order: int) -> None:
+        with self.database._connect() as conn:
+            conn.execute(
+                "INSERT INTO bid_plans(student_id, unit_code, form_json, course_hash, offering_hash, "
+                "built_at, valid_until, sort_order) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(student_id, unit_code) DO UPDATE SET form_json=excluded.form_json, "
+                "course_hash=excluded.course_hash, offering_hash=excluded.offering_hash, "
+                "built_at=excluded.built_at, valid_until=excluded.valid_until, sort_order=excluded.sort_order",
+                (student_id, unit_code, json.dumps(form), course_hash, offering_hash, built_at, valid_until, sort_order),
+            )
+            conn.commit()
+
+    def extend_validity(self, student_id: str, unit_code: str, valid_until: float, sort_order: int) -> None:
+        with self.database._connect() as conn:
+            conn.execute(
+                "UPDATE bid_plans SET valid_until = ?, sort_order = ? WHERE student_id = ? AND unit_code = ?",
+                (valid_until, sort_order, student_id, unit_code),
+            )
+            conn.commit()
+
+    def delete_bundle(self, student_id: str, unit_code: str) -> None:
+        with self.database._connect() as conn:
+            conn.execute(
+                "DELETE FROM bid_plans WHERE student_id = ? AND unit_code = ?",
+                (student_id, unit_code),
+            )
+            conn.commit()
+
+    def prune(self, student_id: str, keep_codes: List[str]) -> None:
+        """Drop bundles of courses that are no longer in the course list."""
+        with self.database._connect() as conn:
+            placeholders = ", ".join("?" for _ in keep_codes)
+            query = "DELETE FROM bid_plans WHERE student_id = ?"
+            if keep_codes:
+                query += f" AND unit_code NOT IN ({placeholders})"
+            conn.execute(query, (student_id, *keep_codes))
+            conn.commit()
+
+
+class OfferingRepository:
+    """Parsed unit pages per student, with the hash of the page they were parsed from."""
+
+    def __init__(self, database: Database):
+        self.database = database
+
+    def load_offering(self, student_id: str, unit_code: str) -> Optional[Dict[str, Any]]:
+        with self.database._connect() as conn:
+            row = conn.execute(
+                "SELECT content_hash, fields_json, fetched_at FROM unit_offerings "
+                "WHERE student_id = ? AND unit_code = ?",
+                (student_id, unit_code),
+            ).fetchone()
+            if row is None:
+                return None
+            groups = conn.execute(
+                "SELECT type, group_no, req_mid, capacity, vacancy, meetings_json FROM unit_offering_groups "
+                "WHERE student_id = ? AND unit_code = ? ORDER BY type, group_no",
+                (student_id, unit_code),
+            ).fetchall()
+        return {
+            "content_hash": row["content_hash"],
+            "fields": json.loads(row["fields_json"]),
+            "fetched_at": row["fetched_at"],
+            "groups": [
+                (group["type"], group["group_no"], group["req_mid"], group["capacity"], group["vacancy"],
+                 json.loads(group["meetings_json"]))
+                for group in groups
+            ],
+        }
+
+    def save_offering(self, student_id: str, unit_code: str, content_hash: str, fields: Dict[str, Any],
+                      groups: List[tuple], fetched_at: float) -> None:
+        """Replace the stored offering; `groups` holds (type, group_no, req_mid, capacity, vacancy, meetings)."""
+        with self.database._connect() as conn:
+            conn.execute(
+                "INSERT INTO unit_offerings(student_id, unit_code, content_hash, fields_json, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT(student_id, unit_code) DO UPDATE SET "
+                "content_hash=excluded.content_hash, fields_json=excluded.fields_json, fetched_at=excluded.fetched_at",
+                (student_id, unit_code, content_hash, json.dumps(fields), fetched_at),
+            )
+            conn.execute(
+                "DELETE FROM unit_offering_groups WHERE student_id = ? AND unit_code = ?", (student_id, unit_code)
+            )
+            conn.executemany(
+                "INSERT INTO unit_offering_groups(student_id, unit_code, type, group_no, req_mid, capacity, "
+                "vacancy, meetings_json) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (student_id, unit_code, kind, number, req_mid, capacity, vacancy, json.dumps(meetings))
+                    for kind, number, req_mid, capacity, vacancy, meetings in groups
+                ],
+            )
+            conn.commit()
+
+    def touch_offering(self, student_id: str, unit_code: str, fetched_at: float) -> None:
+        """Mark an unchanged offering as fetched again."""
+        with self.database._connect() as conn:
+            conn.execute(
+                "UPDATE unit_offerings SET fetched_at = ? WHERE student_id = ? AND unit_code = ?",
+                (fetched_at, student_id, unit_code),
+            )
+            conn.commit()
+
+    def delete_offering(self, student_id: str, unit_code: str) -> None:
+        with self.database._connect() as conn:
+            conn.execute(
+                "DELETE FROM unit_offering_groups WHERE student_id = ? AND unit_code = ?", (student_id, unit_code)
+            )
+            conn.execute("DELETE FROM unit_offerings WHERE student_id = ? AND unit_code = ?", (student_id, unit_code))
+            conn.commit()
+
+    def prune(self, fetched_before: float) -> int:
+        """Drop offerings fetched before a time; returns how many were removed."""
+        with self.database._connect() as conn:
+            conn.execute(
+                "DELETE FROM unit_offering_groups WHERE (student_id, unit_code) IN "
+                "(SELECT student_id, unit_code FROM unit_offerings WHERE fetched_at < ?)",
+                (fetched_before,),
+            )
+            removed = conn.execute("DELETE FROM unit_offerings WHERE fetched_at < ?", (fetched_before,)).rowcount
+            conn.commit()
+        return removed
+
+
+class CatalogRepository:
+    """Local copy of the master schedule: units, their groups and meeting times, searchable by code and name."""
+
+    def __init__(self, database: Database):
+        self.database = database
+
+    def unit_hashes(self) -> Dict[str, Tuple[str, float]]:
+        """Return unit code -> (content hash, crawl time) of every stored unit."""
+        with self.database._connect() as conn:
+            rows = conn.execute("SELECT code, content_hash, crawled_at FROM catalog_units").fetchall()
+        return {row["code"]: (row["content_hash"], row["crawled_at"]) for row in rows}
+
+    def save_units(self, units: List[tuple], crawled_at: float) -> None:
+        """
+        Insert or replace units in one transaction.
+
+        Args:
+            units (list): (code, name, content hash, groups) per unit, where groups holds
+                (type, group_no, capacity, [(day, start minute, end minute, room), ...])
+            crawled_at (float): Time the units were fetched
+        """
+        if not units:
+            return
+        with self.database._connect() as conn:
+            for code, name, content_hash, groups in units:
+                row = conn.execute("SELECT id FROM catalog_units WHERE code = ?", (code,)).fetchone()
+                if row is None:
+                    unit_id = conn.execute(
+                        "INSERT INTO catalog_units(code, name, content_hash, crawled_at) VALUES (?, ?, ?, ?)",
+                        (code, name, content_hash, crawled_at),
+                    ).lastrowid
+                else:
+                    unit_id = row["id"]
+                    conn.execute(
+                        "UPDATE catalog_units SET name = ?, content_hash = ?, crawled_at = ? WHERE id = ?",
+                        (name, content_hash, crawled_at, unit_id),
+                    )
+                    self._delete_details(conn, unit_id)
+
+                conn.executemany(
+                    "INSERT INTO catalog_groups(unit_id, type, group_no, capacity) VALUES (?, ?, ?, ?)",
+                    [(unit_id, kind, number, capacity) for kind, number, capacity, _ in groups],
+                )
+                conn.executemany(
+                    "INSERT INTO catalog_sessions(unit_id, type, group_no, day, start_minute, end_minute, room) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (unit_id, kind, number, day, start, end, room)
+                        for kind, number, _, meetings in groups for day, start, end, room in meetings
+                    ],
+                )
+                if self.database.fts5_available:
+                    conn.execute("INSERT INTO catalog_search(rowid, code, name) VALUES (?, ?, ?)", (unit_id, code, name))
+            conn.commit()
+
+    def touch_units(self, codes: List[str], crawled_at: float) -> None:
+        """Mark unchanged units as crawled again."""
+        if not codes:
+            return
+        with self.database._connect() as conn:
+            conn.executemany(
+                "UPDATE catalog_units SET crawled_at = ? WHERE code = ?", [(crawled_at, code) for code in codes]
+            )
+            conn.commit()
+
+    def delete_units(self, codes: List[str]) -> None:
+        if not codes:
+            return
+        with self.database._connect() as conn:
+            for code in codes:
+                row = conn.execute("SELECT id FROM catalog_units WHERE code = ?", (code,)).fetchone()
+                if row is None:
+                    continue
+                self._delete_details(conn, row["id"])
+                conn.execute("DELETE FROM catalog_units WHERE id = ?", (row["id"],))
+            conn.commit()
+
+    def _delete_details(self, conn: sqlite3.Connection, unit_id: int) -> None:
+        conn.execute("DELETE FROM catalog_groups WHERE unit_id = ?", (unit_id,))
+        conn.execute("DELETE FROM catalog_sessions WHERE unit_id = ?", (unit_id,))
+        if self.database.fts5_available:
+            conn.execute("DELETE FROM catalog_search WHERE rowid = ?", (unit_id,))
+
+    def search_units(self, text: str, limit: int = 20) -> List[Tuple[str, str]]:
+        """
+        Find units whose code or name words start with every word of `text`.
+
+        Args:
+            text (str): What the user typed, e.g. "uecs20" or "data struct"
+            limit (int): Maximum number of results
+
+        Returns:
+            list: (unit code, unit name), best match first
+        """
+        terms = re.findall(r"\w+", text)
+        if not terms:
+            return []
+        with self.database._connect() as conn:
+            if self.database.fts5_available:
+                query = " ".join(f'"{term}"*' for term in terms)
+                rows = conn.execute(
+                    "SELECT u.code, u.name FROM catalog_search JOIN catalog_units u ON u.id = catalog_search.rowid "
+                    "WHERE catalog_search MATCH ? ORDER BY rank, u.code LIMIT ?",
+                    (query, limit),
+                ).fetchall()
+            else:
+                conditions = " AND ".join("(code LIKE ? OR name LIKE ?)" for _ in terms)
+                params = [value for term in terms for value in (f"{term}%", f"%{term}%")]
+                rows = conn.execute(
+                    f"SELECT code, name FROM catalog_units WHERE {conditions} ORDER BY code LIMIT ?",
+                    (*params, limit),
+                ).fetchall()
+        return [(row["code"], row["name"]) for row in rows]
+
+    def unit_course(self, code: str) -> Optional[Course]:
+        """
+        Build a course from a catalog unit, listing every group of each class type in ascending order.
+
+        Returns:
+            Course: The unit as a course, or None if it is not in the catalog
+        """
+        with self.database._connect() as conn:
+            unit = conn.execute("SELECT id, code, name FROM catalog_units WHERE code = ?", (code,)).fetchone()
+            if unit is None:
+                return None
+            rows = conn.execute(
+                "SELECT type, group_no FROM catalog_groups WHERE unit_id = ? ORDER BY type, group_no", (unit["id"],)
+            ).fetchall()
+        slots: Dict[str, List[int]] = {}
+        for row in rows:
+            slots.setdefault(row["type"], []).append(row["group_no"])
+        slots = {slot_type: slots[slot_type] for slot_type in sorted(slots, key=_slot_type_key)}
+        return Course(code=unit["code"], name=unit["name"], slots=slots)
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self.database._connect() as conn:
+            row = conn.execute("SELECT value FROM catalog_meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self.database._connect() as conn:
+            conn.execute(
+                "INSERT INTO catalog_meta(key, value) VALUES(?, ?) ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+                (key, value),
+            )
+            conn.commit()
@@ -2,32 +2,201 @@
 CAPTCHA solving utility using ddddocr.
 """
 
-import ddddocr
+import io
 import logging
+import threading
+from dataclasses import dataclass, field
+from typing import List
+
+from .config import CAPTCHA_CHARSET
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+
+@dataclass
+class CaptchaGuess:
+    """OCR result with per-character confidence."""
+    text: str
+    char_probabilities: List[float] = field(default_factory=list)
+
+    @property
+    def confidence(self) -> float:
+        """Probability of the least certain character, 0.0 for an empty guess."""
+        return min(self.char_probabilities) if self.char_probabilities else 0.0
+
+
+@dataclass
+class CaptchaStats:
+    """Process-wide counters of CAPTCHA outcomes."""
+    solved: int = 0
+    refetched: int = 0
+    submitted: int = 0
+    rejected: int = 0
+
+    @property
+    def miss_rate(self) -> float:
+        """Share of submitted guesses the portal rejected."""
+        return self.rejected / self.submitted if self.submitted else 0.0
+
+    def record_submission(self, accepted: bool) -> None:
+        self.submitted += 1
+        if not accepted:
+            self.rejected += 1
+        logger.info(
+            f"CAPTCHA stats: {self.submitted} submitted, {self.rejected} rejected, "
+            f"{self.refetched} refetched before submit, miss rate {self.miss_rate:.0%}"
+        )
+
+
 class CaptchaSolver:
-    """CAPTCHA solver using ddddocr."""
-    
+    """CAPTCHA solver using ddddocr, loaded on first use."""
+
     def __init__(self):
-        """Initialize the OCR engine."""
-        self.ocr = ddddocr.DdddOcr(show_ad=False)
-    
+        """Prepare the solver without loading the OCR model yet."""
+        self._ocr = None
+        self._load_lock = threading.Lock()
+        self._warm_up_thread = None
+        self._supports_probability = True
+        self.stats = CaptchaStats()
+
+    @property
+    def ocr(self):
+        """The ddddocr engine, loading the ONNX model on first access."""
+        if self._ocr is None:
+            with self._load_lock:
+                if self._ocr is None:
+                    # ddddocr pulls in onnxruntime, so keep the import off the startup path
+                    import ddddocr
+                    logger.info("Loading CAPTCHA OCR model")
+                    ocr = ddddocr.DdddOcr(show_ad=False)
+                    if CAPTCHA_CHARSET:
+                        try:
+                            ocr.set_ranges(CAPTCHA_CHARSET)
+                        except AttributeError:
+                            logger.warning("Installed ddddocr cannot restrict the charset")
+                    self._ocr = ocr
+        return self._ocr
+
+    def warm_up(self) -> None:
+        """Load the model and run one dummy inference so the first real solve is fast."""
+        try:
+            ocr = self.ocr
+            # Pillow is a ddddocr dependency, so it is available whenever the model is
+            from PIL import Image
+            buffer = io.BytesIO()
+            Image.new('RGB', (100, 36), 'white').save(buffer, format='PNG')
+            ocr.classification(buffer.getvalue())
+            logger.info("CAPTCHA OCR model warmed up")
+        except Exception as e:
+            logger.warning(f"CAPTCHA OCR warm-up failed: {str(e)}")
+
+    def warm_up_in_background(self) -> threading.Thread:
+        """
+        Start warm-up on a daemon thread, once per process.
+
+        Returns:
+            threading.Thread: The warm-up thread
+        """
+        with self._load_lock:
+            if self._warm_up_thread is None:
+                self._warm_up_thread = threading.Thread(
+                    target=self.warm_up, name="captcha-warm-up", daemon=True
+                )
+                self._warm_up_thread.start()
+        return self._warm_up_thread
+
     def solve(self, image: bytes) -> str:
         """
         Solve CAPTCHA from image bytes with retry mechanism.
-        
+
         Args:
             image (bytes): CAPTCHA image data
-            
+
         Returns:
             str: Solved CAPTCHA text
         """
-        
+
+        return self.solve_with_confidence(image).text
+
+    def solve_with_confidence(self, image: bytes) -> CaptchaGuess:
+        """
+        Solve CAPTCHA and report how sure the model is of every character.
+
+        Args:
+            image (bytes): CAPTCHA image data
+
+        Returns:
+            CaptchaGuess: Guessed text and per-character probabilities
+        """
         try:
-            return self.ocr.classification(image)
+            if self._supports_probability:
+                try:
+                    result = self.ocr.classification(image, probability=True)
+                    guess = self._decode(result['charsets'], result['probability'])
+                    self.stats.solved += 1
+                    return guess
+                except TypeError:
+                    logger.warning("Installed ddddocr has no probability output; confidence gating disabled")
+                    self._supports_probability = False
+
+            text = self.ocr.classification(image)
+            self.stats.solved += 1
+            return CaptchaGuess(text, [1.0] * len(text))
         except Exception as e:
             logger.error(f"Unexpected error during CAPTCHA solving: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    @staticmethod
+    def _decode(charsets: List[str], probability: List[List[float]]) -> CaptchaGuess:
+        """
+        Greedy CTC decoding of ddddocr's per-timestep distributions.
+
+        Characters outside the configured ranges come back as -1 and are ignored;
+        the remaining scores are renormalised so confidences stay comparable.
+        """
+        if probability and not isinstance(probability[0], list):
+            probability = [probability]
+
+        text, char_probabilities = [], []
+        previous = None
+        for step in probability:
+            scores = [score if score > 0 else 0.0 for score in step]
+            total = sum(scores)
+            if not total:
+                previous = None
+                continue
+            index = max(range(len(scores)), key=scores.__getitem__)
+            char, score = charsets[index], scores[index] / total
+
+            if char == '':
+                previous = None
+            elif index == previous:
+                # Repeated timestep of the same character: keep its best score
+                char_probabilities[-1] = max(char_probabilities[-1], score)
+            else:
+                text.append(char)
+                char_probabilities.append(score)
+            if char:
+                previous = index
+
+        return CaptchaGuess(''.join(text), char_probabilities)
+
+
+_shared_solver = None
+_shared_lock = threading.Lock()
+
+
+def get_captcha_solver() -> CaptchaSolver:
+    """
+    Return the process-wide CAPTCHA solver shared by every engine.
+
+    Returns:
+        CaptchaSolver: The shared solver
+    """
+    global _shared_solver
+    if _shared_solver is None:
+        with _shared_lock:
+            if _shared_solver is None:
+                _shared_solver = CaptchaSolver()
+    return _shared_solver
@@ -0,0 +1,106 @@
+"""
+Server clock offset estimation from HTTP Date headers.
+
+The Date header only has one-second resolution, but every response still
+bounds the offset: the server stamped it with second D at some instant
+between sending the request (t0) and receiving the reply (t1), so
+D - t1 <= offset < D + 1 - t0. Intersecting these bounds over a few
+requests, each timed to straddle the next expected tick of the server
+clock, narrows the offset down to roughly half a round trip.
+"""
+
+import math
+import statistics
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+@dataclass
+class ClockOffset:
+    """Estimated server clock minus local clock, in seconds."""
+    offset: float = 0.0
+    error: float = 0.5     # half width of the interval the true offset lies in
+    rtt: float = 0.0       # median round trip of the samples
+    samples: int = 0
+
+    def to_local(self, server_time: float) -> float:
+        """Convert a server timestamp to the local clock."""
+        return server_time - self.offset
+
+
+def parse_http_date(value: str) -> Optional[float]:
+    """Parse an RFC 7231 Date header into a Unix timestamp, None if malformed."""
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def estimate_clock_offset(fetch_date: Callable[[], Optional[str]], samples: int = 6,
+                          target_error: float = 0.01,
+                          clock: Callable[[], float] = time.time,
+                          sleep: Callable[[float], None] = time.sleep) -> ClockOffset:
+    """
+    Estimate the server clock offset from repeated Date headers.
+
+    Args:
+        fetch_date (callable): Sends one request and returns its Date header (or None)
+        samples (int): Maximum number of requests to send
+        target_error (float): Stop early once the offset is known this precisely
+        clock (callable): Local wall clock
+        sleep (callable): Sleep function, replaceable for testing
+
+    Returns:
+        ClockOffset: The estimate; offset 0 with error 0.5 if no Date header was usable
+    """
+    low, high = -math.inf, math.inf
+    rtts = []
+
+    for _ in range(samples):
+        if rtts and math.isfinite(low) and math.isfinite(high):
+            # Aim the request so its midpoint lands on the next server second boundary
+            middle = (low + high) / 2
+            now = clock()
+            send_at = math.floor(now + middle) + 1 - middle - statistics.median(rtts) / 2
+            while send_at < now + 0.005:
+                send_at += 1
+            sleep(send_at - now)
+
+        started = clock()
+        server_second = parse_http_date(fetch_date())
+        ended = clock()
+        if server_second is None:
+            continue
+
+        rtts.append(ended - started)
+        new_low, new_high = max(low, server_second - ended), min(high, server_second + 1 - started)
+        if new_low > new_high:
+            # Local clock jumped or the server clock is not monotonic: start over
+            logger.warning("Inconsistent Date header sample, restarting clock offset estimate")
+            new_low, new_high = server_second - ended, server_second + 1 - started
+        low, high = new_low, new_high
+
+        if (high - low) / 2 <= target_error:
+            break
+
+    if not rtts:
+        logger.warning("No usable Date header; assuming the local clock matches the server")
+        return ClockOffset()
+
+    estimate = ClockOffset(
+        offset=(low + high) / 2,
+        error=(high - low) / 2,
+        rtt=statistics.median(rtts),
+        samples=len(rtts),
+    )
+    logger.info(
+        f"Server clock offset {estimate.offset * 1000:+.0f} ms (+/- {estimate.error * 1000:.0f} ms, "
+        f"RTT {estimate.rtt * 1000:.0f} ms, {estimate.samples} samples)"
+    )
+    return estimate
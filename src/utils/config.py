@@ -6,6 +6,7 @@ import configparser
 import os
 import sys
 import logging
+from urllib.parse import urlsplit
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -68,7 +69,8 @@ def create_default_config() -> configparser.ConfigParser:
         'login_url': f'{base_url}/login.jsp',
         'login_process_url': f'{base_url}/login_proc.jsp',
         'registration_url': f'{base_url}/registration/registerUnitSurvey.jsp',
-        'home_url': f'{base_url}/mainpage.jsp',
+        'registration_process_url': f'{base_url}/registration/registerUnitProSurvey.jsp',
+        'home_url': f'{base_url}/schedule/masterScheduleSurvey.jsp',
         'course_registration_url': f'{base_url}/registration/registerCourse.jsp'
     }
     
@@ -100,7 +102,8 @@ def create_default_config() -> configparser.ConfigParser:
         'window_width': '800',
         'window_height': '600',
         'window_x': '100',
-        'window_y': '100'
+        'window_y': '100',
+        'settings_flush_ms': '500'
     }
       # Default Logging Settings
     config['Logging'] = {
@@ -108,6 +111,71 @@ def create_default_config() -> configparser.ConfigParser:
         'format': '%%(asctime)s - %%(name)s - %%(levelname)s - %%(message)s'
     }
 
+    config['Captcha'] = {
+        'charset': 'abcde2345678gfynmnpwx',
+        'min_confidence': '0.6',
+        'max_refetches': '3'
+    }
+
+    config['Session'] = {
+        'keepalive': 'false',
+        'keepalive_interval': '300',
+        'max_session_age': '1500',
+        'reuse_cookies': 'true'
+    }
+
+    config['Schedule'] = {
+        'fire_delay_ms': '0',
+        'clock_samples': '6',
+        'renew_margin': '120'
+    }
+
+    config['Plan'] = {
+        'ttl': '3600'
+    }
+
+    config['Workers'] = {
+        'max_workers': '4'
+    }
+
+    config['Retry'] = {
+        'base_delay_ms': '250',
+        'max_delay_ms': '8000',
+        'jitter': '0.5',
+        'fast_response_ms': '400',
+        'refresh_every': '5'
+    }
+
+    config['Solver'] = {
+        'enabled': 'true',
+        'alternatives': '3',
+        'max_nodes': '20000'
+    }
+
+    config['Offerings'] = {
+        'ttl': '600',
+        'memory_size': '64'
+    }
+
+    config['Catalog'] = {
+        'max_workers': '4',
+        'batch_size': '100',
+        'max_age': '86400'
+    }
+
+    config['Tracing'] = {
+        'enabled': 'false',
+        'keep_files': '20'
+    }
+
+    config['Parsing'] = {
+        'backend': 'auto'
+    }
+
+    config['Async'] = {
+        'max_concurrency': '4'
+    }
+
     config['Storage'] = {
         'sqlite_db_path': 'data/app.db'
     }
@@ -122,7 +190,11 @@ BASE_URL = config['URLs']['base_url']
 LOGIN_URL = config['URLs']['login_url']
 LOGIN_PROCESS_URL = config['URLs']['login_process_url'] # Route for login form post method
 REGISTRATION_URL = config['URLs']['registration_url']
-HOME_URL = config['URLs']['home_url']
+REGISTRATION_PROCESS_URL = config.get(
+    'URLs', 'registration_process_url',
+    fallback=REGISTRATION_URL.replace('registerUnitSurvey.jsp', 'registerUnitProSurvey.jsp')
+)
+HOME_URL = config['URLs']['home_url'] # Master schedule of every unit offered
 COURSE_REGISTRATION_URL = config['URLs']['course_registration_url']
 
 # Headers
@@ -131,6 +203,15 @@ DEFAULT_HEADERS = {
     'Accept': config['Headers']['accept']
 }
 
+# Headers the portal expects on a bid submit
+_portal = urlsplit(BASE_URL)
+SUBMIT_HEADERS = {
+    'Accept': config['Headers']['accept'],
+    'Content-Type': 'application/x-www-form-urlencoded',
+    'Origin': f'{_portal.scheme}://{_portal.netloc}',
+    'Referer': REGISTRATION_URL
+}
+
 # Browser automation settings (Playwright first, Selenium section as fallback)
 _browser_section = 'Playwright' if config.has_section('Playwright') else 'Selenium'
 PLAYWRIGHT_OPTIONS = config[_browser_section]['options'].split(',')
@@ -151,6 +232,8 @@ WINDOW_POSITION = (
     int(config['GUI']['window_x']),
     int(config['GUI']['window_y'])
 )
+# Settings changes are written once the UI has been idle this long
+SETTINGS_FLUSH_DELAY = config.getfloat('GUI', 'settings_flush_ms', fallback=500) / 1000
 
 # Determine the base directory for logs
 if getattr(sys, 'frozen', False):
@@ -168,6 +251,64 @@ ERROR_LOG_FILE = os.path.join(LOG_DIR, 'error.log')
 _sqlite_db_raw = config['Storage']['sqlite_db_path'] if config.has_section('Storage') else 'data/app.db'
 SQLITE_DB_PATH = _sqlite_db_raw if os.path.isabs(_sqlite_db_raw) else os.path.join(BASE_DIR, _sqlite_db_raw)
 
+# CAPTCHA OCR (charset defaults to Kaptcha's kaptcha.textproducer.char.string)
+CAPTCHA_CHARSET = config.get('Captcha', 'charset', fallback='abcde2345678gfynmnpwx')
+CAPTCHA_MIN_CONFIDENCE = config.getfloat('Captcha', 'min_confidence', fallback=0.6)
+CAPTCHA_MAX_REFETCHES = config.getint('Captcha', 'max_refetches', fallback=3)
+
+# Background session heartbeat and proactive relogin (seconds)
+SESSION_KEEPALIVE_ENABLED = config.getboolean('Session', 'keepalive', fallback=False)
+SESSION_KEEPALIVE_INTERVAL = config.getfloat('Session', 'keepalive_interval', fallback=300.0)
+SESSION_MAX_AGE = config.getfloat('Session', 'max_session_age', fallback=1500.0)
+# Keep the authenticated cookies in SQLite so the next run can skip the CAPTCHA login
+SESSION_REUSE_COOKIES = config.getboolean('Session', 'reuse_cookies', fallback=True)
+
+# Scheduled bidding: extra delay after window open and Date header samples for clock sync
+SCHEDULE_FIRE_DELAY = config.getfloat('Schedule', 'fire_delay_ms', fallback=0.0) / 1000
+SCHEDULE_CLOCK_SAMPLES = config.getint('Schedule', 'clock_samples', fallback=6)
+# Seconds before the fire time at which a session too old to last the window is renewed
+SCHEDULE_RENEW_MARGIN = config.getfloat('Schedule', 'renew_margin', fallback=120.0)
+
+# Seconds a compiled bid bundle stays valid before its unit page is checked again
+BID_PLAN_TTL = config.getfloat('Plan', 'ttl', fallback=3600.0)
+
+# Courses the request engine registers in parallel (1 = one after another)
+REQUEST_MAX_WORKERS = config.getint('Workers', 'max_workers', fallback=4)
+
+# Delay between registration attempts of a course: doubled after a slow or
+# failed round trip, halved after a quick rejection, randomised by +/- jitter
+RETRY_BASE_DELAY = config.getfloat('Retry', 'base_delay_ms', fallback=250) / 1000
+RETRY_MAX_DELAY = config.getfloat('Retry', 'max_delay_ms', fallback=8000) / 1000
+RETRY_JITTER = config.getfloat('Retry', 'jitter', fallback=0.5)
+RETRY_FAST_RESPONSE = config.getfloat('Retry', 'fast_response_ms', fallback=400) / 1000
+# Re-resolve reqMid values from a fresh unit page every N attempts (0 = never)
+RETRY_REFRESH_EVERY = config.getint('Retry', 'refresh_every', fallback=5)
+
+# Clash-free timetable search run before registering several courses
+TIMETABLE_SOLVER_ENABLED = config.getboolean('Solver', 'enabled', fallback=True)
+TIMETABLE_ALTERNATIVES = config.getint('Solver', 'alternatives', fallback=3)
+TIMETABLE_MAX_NODES = config.getint('Solver', 'max_nodes', fallback=20000)
+
+# Parsed unit pages: seconds planning may reuse them without a request, and how many stay in memory
+OFFERING_CACHE_TTL = config.getfloat('Offerings', 'ttl', fallback=600.0)
+OFFERING_CACHE_SIZE = config.getint('Offerings', 'memory_size', fallback=64)
+
+# Master schedule catalog: concurrent unit refreshes, units written per transaction,
+# and seconds before a refresh fetches a unit again
+CATALOG_MAX_WORKERS = config.getint('Catalog', 'max_workers', fallback=4)
+CATALOG_BATCH_SIZE = config.getint('Catalog', 'batch_size', fallback=100)
+CATALOG_MAX_AGE = config.getfloat('Catalog', 'max_age', fallback=86400.0)
+
+# Per-request timing capture, exported to logs/traces; only the newest trace files are kept
+TRACING_ENABLED = config.getboolean('Tracing', 'enabled', fallback=False)
+TRACING_KEEP_FILES = config.getint('Tracing', 'keep_files', fallback=20)
+
+# HTML extraction backend (auto, lxml or bs4)
+PARSER_BACKEND = config.get('Parsing', 'backend', fallback='auto')
+
+# Async request engine
+ASYNC_MAX_CONCURRENCY = config.getint('Async', 'max_concurrency', fallback=4)
+
 # Logging
 LOG_LEVEL = config['Logging']['level']
 LOG_FORMAT = config['Logging']['format']
@@ -23,6 +23,11 @@ class ContextFilter(logging.Filter):
         return True
 
 
+def get_log_context() -> dict:
+    """Return the run/task context that ContextFilter stamps on log records."""
+    return {"run_id": _run_id, "task": _task_context.get()}
+
+
 def _configure_root_logger() -> None:
     global _configured
     if _configured:
@@ -1,12 +1,18 @@
 """Settings manager backed by sqlite storage."""
 
 import os
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Set
 
-from ..storage.database import Database, SettingsRepository
+from ..storage.database import SettingsRepository, get_database
 
 class Settings:
-    """Settings manager for the application."""
+    """
+    Settings manager for the application.
+
+    Updates only change the in-memory settings and remember which keys
+    differ from what is stored. flush() writes just those keys in one
+    transaction; the GUI calls it on a short debounce timer and at shutdown.
+    """
     
     def __init__(self, settings_file: str = "user_settings.json"):
         """
@@ -16,10 +22,11 @@ class Settings:
             settings_file (str): Path to the settings file
         """
         self.settings_file = settings_file
-        self.database = Database()
+        self.database = get_database()
         self.repo = SettingsRepository(self.database)
         self.repo.migrate_from_json(self.settings_file)
         self.settings = self._load_settings()
+        self._dirty: Set[str] = set()
     
     def _load_settings(self) -> Dict[str, Any]:
         """
@@ -48,9 +55,48 @@ class Settings:
             'font_size': 16
         }
     
+    @property
+    def dirty(self) -> bool:
+        """Whether some settings changed since the last flush."""
+        return bool(self._dirty)
+
+    def set(self, key: str, value: Any):
+        """
+        Change a setting in memory and mark it for the next flush.
+
+        Args:
+            key (str): Setting name
+            value (Any): New value; an unchanged value is not marked
+        """
+        if key in self.settings and self.settings[key] == value:
+            return
+        self.settings[key] = value
+        self._dirty.add(key)
+
+    def flush(self) -> int:
+        """
+        Write the changed settings to storage in one transaction.
+
+        Returns:
+            int: Number of settings written
+        """
+        if not self._dirty:
+            return 0
+        changed = {key: self.settings[key] for key in self._dirty}
+        self.repo.save_settings(changed)
+        self._dirty.clear()
+        return len(changed)
+
     def save_settings(self):
-        """Save settings to file."""
-        self.repo.save_settings(self.settings)
+        """Save the pending settings now."""
+        self.flush()
+
+    def close(self):
+        """Flush pending settings and close the storage connection."""
+        try:
+            self.flush()
+        finally:
+            self.database.close()
     
     def get_student_id(self) -> str:
         """
@@ -117,27 +163,24 @@ class Settings:
                        max_retries: Optional[int] = None,
                        font_size: Optional[int] = None,):
         """
-        Update settings.
+        Update settings in memory; call flush() to store them.
         
         Args:
             student_id (Optional[str]): Student ID to save
             password (Optional[str]): Password to save
-            timetable_file (Optional[str]): Timetable file path to save
             method (Optional[str]): Last used method to save
             headless_mode (Optional[bool]): Whether to enable headless mode
             max_retries (Optional[int]): Maximum number of retries for scraping
             font_size (Optional[int]): UI font size in pixels
         """
-        if student_id is not None:
-            self.settings['student_id'] = student_id
-        if password is not None:
-            self.settings['password'] = password
-        if method is not None:
-            self.settings['method'] = method
-        if headless_mode is not None:
-            self.settings['headless_mode'] = headless_mode
-        if max_retries is not None:
-            self.settings['max_retries'] = max_retries
-        if font_size is not None:
-            self.settings['font_size'] = font_size
-        self.save_settings() 
\ No newline at end of file
+        updates = {
+            'student_id': student_id,
+            'password': password,
+            'method': method,
+            'headless_mode': headless_mode,
+            'max_retries': max_retries,
+            'font_size': font_size,
+        }
+        for key, value in updates.items():
+            if value is not None:
+                self.set(key, value)
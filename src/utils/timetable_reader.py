@@ -2,9 +2,21 @@
 Timetable reading utility.
 """
 
+import os
 import re
-from dataclasses import dataclass
-from typing import Dict, List
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# "L(1 or 2) - ..." line listing the groups of one class type in priority order
+SLOT_LINE = re.compile(r'(L|T|P)\((.*)\) -')
+# Unit codes such as UECS2001 or MPU3113, as TTAP copies them from the portal
+COURSE_CODE = re.compile(r'^[A-Z]{2,6}\d{3,5}[A-Z]?$')
+
+TIMETABLE_EXTENSIONS = ('.txt',)
 
 @dataclass
 class Course:
@@ -13,17 +25,54 @@ class Course:
     name: str
     slots: Dict[str, List[int]]
 
+@dataclass
+class TimetableError:
+    """A line of a timetable file that could not be used."""
+    source: str
+    line_number: int
+    line: str
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.source}:{self.line_number}: {self.message} ({self.line!r})"
+
+@dataclass
+class TimetableImport:
+    """Courses read from one or more timetable files and the lines that were skipped."""
+    courses: List[Course] = field(default_factory=list)
+    errors: List[TimetableError] = field(default_factory=list)
+
 class TimetableReader:
     """Timetable reader utility."""
-    
+
+    @staticmethod
+    def parse_slot_line(line: str) -> Optional[tuple]:
+        """
+        Parse a slot line such as "T(2 or 5) - ...".
+
+        Args:
+            line (str): The line to parse
+
+        Returns:
+            tuple: (slot type, list of slot numbers), or None if it is not a slot line
+
+        Raises:
+            ValueError: If a slot number is not an integer
+        """
+        slot = SLOT_LINE.search(line)
+        if not slot:
+            return None
+        # int() ignores the spaces around each number
+        return slot.group(1), [int(num) for num in slot.group(2).split("or")]
+
     @staticmethod
     def read_course(course_lines: List[str]) -> Course:
         """
         Read course information from lines.
-        
+
         Args:
             course_lines (List[str]): List of lines containing course information
-            
+
         Returns:
             Course: Course object with parsed information
         """
@@ -33,52 +82,156 @@ class TimetableReader:
 
         slots = {}
         # Read the slots
-        for i in range(2, 5):
-            # Get slot type and slot number with regex
-            slot = re.search(r'(L|T|P)\((.*)\) -', course_lines[i])
-            if not slot:
-                continue
-                
-            slot_type = slot.group(1)
-            slot_numbers = list(
-                # Convert the map to list
-                map(
-                    # Convert each item in the list to number
-                    lambda num: int(num),
-                    # Split the numbers with " or ", this produces a list
-                    slot.group(2).split(" or ")
-                )
-            )
-
-            slots[slot_type] = slot_numbers
+        for line in course_lines[2:5]:
+            parsed = TimetableReader.parse_slot_line(line)
+            if parsed:
+                slot_type, slot_numbers = parsed
+                slots[slot_type] = slot_numbers
 
         return Course(course_code, course_name, slots)
 
     @staticmethod
-    def read_timetable(filename: str) -> List[Course]:
+    def iter_courses(lines: Iterable[str], source: str = '<input>',
+                     errors: List[TimetableError] = None) -> Iterator[Course]:
         """
-        Read timetable from file.
-        
+        Parse courses lazily from timetable lines.
+
+        A course is a code line, an optional name line and any number of slot
+        lines, so blocks without a P line (or with extra blank lines) are read
+        correctly. The header of a TTAP export is skipped. Lines that cannot
+        be used are reported to `errors` and skipped instead of aborting.
+
         Args:
-            filename (str): Path to timetable file
-            
+            lines (iterable): Lines of one file, e.g. an open file object
+            source (str): Name used in error reports
+            errors (list): Receives a TimetableError per skipped line
+
+        Yields:
+            Course: Each course as soon as its block is complete
+        """
+        def report(line_number: int, line: str, message: str):
+            if errors is not None:
+                errors.append(TimetableError(source, line_number, line, message))
+
+        # Bound once: this loop runs for every line of possibly large exports
+        search_slot = SLOT_LINE.search
+        match_code = COURSE_CODE.match
+
+        course = None
+        expecting_name = False
+        in_header = None   # decided by the first non-empty line
+        for line_number, raw in enumerate(lines, start=1):
+            line = raw.strip()
+            if not line:
+                continue
+            if in_header is None:
+                # TTAP exports start with a NOTE header before the first unit code
+                in_header = line.startswith('NOTE')
+            if in_header:
+                if not match_code(line):
+                    continue
+                in_header = False
+
+            # Searched anywhere in the line, as the original reader did; the '(' test only skips the regex
+            slot = search_slot(line) if '(' in line else None
+            if slot:
+                expecting_name = False
+                if course is None:
+                    report(line_number, line, "slot line without a course code")
+                    continue
+                slot_type = slot.group(1)
+                if slot_type in course.slots:
+                    report(line_number, line, f"duplicate {slot_type} line for {course.code}")
+                    continue
+                try:
+                    course.slots[slot_type] = [int(num) for num in slot.group(2).split("or")]
+                except ValueError:
+                    report(line_number, line, "slot numbers must be integers")
+                continue
+
+            is_code = match_code(line) is not None
+            if expecting_name and not is_code:
+                course.name = line
+                expecting_name = False
+            elif not is_code:
+                # Close the current course so slot lines under an unrecognised code are
+                # reported one by one instead of being merged into the previous course
+                report(line_number, line, "unexpected course code format")
+                if course is not None:
+                    yield course
+                    course = None
+            else:
+                if course is not None:
+                    yield course
+                course = Course(line, '', {})
+                expecting_name = True
+
+        if course is not None:
+            yield course
+        elif in_header:
+            report(0, '', "no unit code found after the TTAP header")
+
+    @staticmethod
+    def iter_paths(paths: Union[str, Iterable[str]]) -> Iterator[str]:
+        """Expand files and directories into timetable files, in a stable order."""
+        if isinstance(paths, str):
+            paths = [paths]
+        for path in paths:
+            if os.path.isdir(path):
+                for root, dirs, files in os.walk(path):
+                    dirs.sort()
+                    for name in sorted(files):
+                        if name.lower().endswith(TIMETABLE_EXTENSIONS):
+                            yield os.path.join(root, name)
+            else:
+                yield path
+
+    @staticmethod
+    def read_timetables(paths: Union[str, Iterable[str]]) -> TimetableImport:
+        """
+        Read courses from several timetable files and directories.
+
+        A unit code that appears again keeps its first definition; the
+        repeat is reported as an error.
+
+        Args:
+            paths (str or iterable): Files and directories to import
+
         Returns:
-            List[Course]: List of courses
+            TimetableImport: The courses in file order and every skipped line
         """
-        # Open file
-        with open(filename, "r", encoding="utf-8-sig") as file:
-            # Read all lines that are not empty
-            lines = list(filter(lambda line: line != '\n', file.readlines()))
+        result = TimetableImport()
+        seen = {}
+        for path in TimetableReader.iter_paths(paths):
+            try:
+                with open(path, "r", encoding="utf-8-sig") as file:
+                    for course in TimetableReader.iter_courses(file, path, result.errors):
+                        if course.code in seen:
+                            result.errors.append(TimetableError(
+                                path, 0, course.code, f"duplicate course, already read from {seen[course.code]}"
+                            ))
+                            continue
+                        seen[course.code] = path
+                        result.courses.append(course)
+            except (OSError, UnicodeDecodeError) as e:
+                result.errors.append(TimetableError(path, 0, '', f"cannot read file: {e}"))
 
-            if lines[0].startswith('NOTE'):
-                # TTAP format file
-                lines = lines[3:]
+        for error in result.errors:
+            logger.debug(f"Skipped timetable line {error}")
+        if result.errors:
+            logger.warning(f"Imported {len(result.courses)} courses; skipped {len(result.errors)} timetable lines, "
+                           f"first: {result.errors[0]}")
+        return result
 
-        courses = []  # List of courses
+    @staticmethod
+    def read_timetable(filename: str) -> List[Course]:
+        """
+        Read timetable from file.
 
-        # Read courses
-        for i in range(0, len(lines), 5):
-            course = TimetableReader.read_course(lines[i:i+5])
-            courses.append(course)
+        Args:
+            filename (str): Path to a timetable file or a directory of them
 
-        return courses
+        Returns:
+            List[Course]: List of courses
+        """
+        return TimetableReader.read_timetables(filename).courses
@@ -0,0 +1,198 @@
+"""
+Clash-free group selection over the courses' slot preferences.
+
+Every group's weekly meetings are packed into an integer bitmask with one bit
+per half hour of the week, so two groups clash exactly when their masks share a
+bit. Each course becomes a list of internally clash-free group combinations in
+preference order, and a depth-first search over the courses (in priority order)
+picks one combination per course. Forward checking filters the later courses'
+combinations against the time already taken, which gives both the pruning and
+a lower bound on how many courses must be dropped.
+
+Solutions are ranked by the number of dropped courses first and then
+lexicographically by preference rank in course priority order, so an earlier
+course keeps its preferred groups whenever all courses can still fit.
+"""
+
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .logger import setup_logger
+from .timetable_reader import Course
+
+logger = setup_logger(__name__)
+
+SLOT_MINUTES = 30
+DAY_MINUTES = 24 * 60
+
+# (day index, start minute, end minute) of one weekly meeting
+Meeting = Tuple[int, int, int]
+# Meetings of every group a course may take: (class type, group number) -> meetings
+GroupTimes = Dict[Tuple[str, int], List[Meeting]]
+
+
+def week_mask(meetings: Iterable[Meeting]) -> int:
+    """
+    Pack weekly meetings into a bitmask of half-hour slots.
+
+    Meetings that do not start or end on a half hour cover the whole slot.
+    """
+    mask = 0
+    for day, start, end in meetings:
+        first = (day * DAY_MINUTES + start) // SLOT_MINUTES
+        last = -(-(day * DAY_MINUTES + end) // SLOT_MINUTES)
+        mask |= ((1 << (last - first)) - 1) << first
+    return mask
+
+
+@dataclass(frozen=True)
+class CourseOption:
+    """One clash-free combination of groups for a course."""
+    groups: Tuple[Tuple[str, int], ...]   # (class type, group number) per class type
+    ranks: Tuple[int, ...]                # preference index of each group
+    mask: int
+
+
+@dataclass
+class TimetableSolution:
+    """A clash-free choice of groups for every course that could be fitted."""
+    choices: Dict[str, Dict[str, int]] = field(default_factory=dict)   # unit code -> class type -> group
+    dropped: List[str] = field(default_factory=list)
+    cost: tuple = ()   # (dropped courses, per-course rank) as used to order the solutions
+
+    def apply(self, course: Course) -> Course:
+        """
+        Move the chosen groups to the front of a course's preferences.
+
+        The remaining groups keep their order as fallbacks; dropped courses are returned unchanged.
+        """
+        chosen = self.choices.get(course.code)
+        if not chosen:
+            return course
+        slots = {}
+        for class_type, slot_numbers in course.slots.items():
+            if class_type in chosen:
+                slots[class_type] = [chosen[class_type]] + [n for n in slot_numbers if n != chosen[class_type]]
+            else:
+                slots[class_type] = list(slot_numbers)
+        return Course(course.code, course.name, slots)
+
+
+def course_options(course: Course, group_times: GroupTimes) -> List[CourseOption]:
+    """
+    List a course's clash-free group combinations, best preference first.
+
+    Args:
+        course (Course): The course and its slot preferences
+        group_times (dict): Meetings of the groups that can be taken; others are skipped
+
+    Returns:
+        list: CourseOption in lexicographic order of preference rank
+    """
+    choices = []
+    for class_type, slot_numbers in course.slots.items():
+        if not slot_numbers:
+            continue
+        available = [(rank, (class_type, int(number)), week_mask(group_times[(class_type, int(number))]))
+                     for rank, number in enumerate(slot_numbers) if (class_type, int(number)) in group_times]
+        if not available:
+            return []
+        choices.append(available)
+
+    options = []
+    # product() yields the combinations in lexicographic rank order
+    for combination in itertools.product(*choices):
+        mask = 0
+        for _, _, group_mask in combination:
+            if mask & group_mask:
+                break
+            mask |= group_mask
+        else:
+            options.append(CourseOption(
+                groups=tuple(group for _, group, _ in combination),
+                ranks=tuple(rank for rank, _, _ in combination),
+                mask=mask,
+            ))
+    return options
+
+
+def solve_timetable(courses: List[Course], group_times: Dict[str, GroupTimes], alternatives: int = 3,
+                    max_nodes: int = 20000) -> List[TimetableSolution]:
+    """
+    Find the best clash-free assignments of groups to courses.
+
+    Args:
+        courses (list): Courses in priority order
+        group_times (dict): Unit code -> meetings of each group that can be taken
+        alternatives (int): Number of runner-up solutions to return after the best one
+        max_nodes (int): Search budget; the best solutions found so far are returned once it runs out
+
+    Returns:
+        list: TimetableSolution, best first; empty if there are no courses
+    """
+    started = time.perf_counter()
+    limit = 1 + max(0, alternatives)
+    domains = []
+    forced = []   # courses without a single clash-free combination
+    for course in courses:
+        options = course_options(course, group_times.get(course.code, {}))
+        if options:
+            domains.append((course.code, options))
+        else:
+            forced.append(course.code)
+
+    solutions: List[Tuple[tuple, list]] = []   # (cost, picks), best first
+    picks: List[Optional[CourseOption]] = [None] * len(domains)
+    nodes = 0
+
+    def record(drops: int) -> None:
+        # A dropped course ranks after any combination of that course
+        cost = (drops,) + tuple((0, pick.ranks) if pick else (1,) for pick in picks)
+        solutions.append((cost, list(picks)))
+        solutions.sort(key=lambda item: item[0])
+        del solutions[limit:]
+
+    def search(index: int, used: int, remaining: List[List[CourseOption]], drops: int) -> bool:
+        nonlocal nodes
+        nodes += 1
+        if nodes > max_nodes:
+            return False
+        # Forward checking: courses left without options must be dropped
+        bound = drops + sum(1 for options in remaining if not options)
+        if len(solutions) == limit and bound >= solutions[-1][0][0]:
+            return True
+        if index == len(domains):
+            record(drops)
+            return True
+
+        for option in remaining[0]:
+            taken = used | option.mask
+            picks[index] = option
+            later = [[o for o in options if not o.mask & taken] for options in remaining[1:]]
+            if not search(index + 1, taken, later, drops):
+                return False
+        picks[index] = None
+        return search(index + 1, used, remaining[1:], drops + 1)
+
+    completed = search(0, 0, [options for _, options in domains], 0)
+    if not completed:
+        logger.warning(f"Timetable search stopped after {max_nodes} nodes; returning the best solutions found")
+
+    result = []
+    for cost, chosen in solutions:
+        solution = TimetableSolution(cost=cost, dropped=list(forced))
+        for (code, _), pick in zip(domains, chosen):
+            if pick is None:
+                solution.dropped.append(code)
+            else:
+                solution.choices[code] = {class_type: number for class_type, number in pick.groups}
+        result.append(solution)
+
+    logger.info(
+        f"Timetable solved for {len(courses)} courses in {(time.perf_counter() - started) * 1000:.1f} ms "
+        f"({nodes} nodes, {len(result)} solutions, "
+        f"{len(result[0].dropped) if result else len(courses)} dropped in the best)"
+    )
+    return result
@@ -0,0 +1,242 @@
+"""
+Per-request timing capture for the requests-based engines.
+
+Every traced HTTP call records DNS, connect (TCP + TLS), time to first byte and
+total time, the response size and how many attempts urllib3's Retry spent on
+it. Parsing can be traced the same way with Tracer.span. Records carry the
+run_id/task logging context and can be exported as a Chrome trace
+(chrome://tracing or ui.perfetto.dev) to see where a slow bid spent its time.
+"""
+
+import contextvars
+import json
+import os
+import socket
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from .config import LOG_DIR, TRACING_KEEP_FILES
+from .logger import get_log_context, setup_logger
+
+logger = setup_logger(__name__)
+
+_current_record = contextvars.ContextVar("current_trace_record", default=None)
+
+
+@dataclass
+class TraceRecord:
+    """Timing of one traced operation; phase offsets are relative to the start."""
+    name: str
+    category: str
+    start: float                       # wall clock, seconds since the epoch
+    run_id: str
+    task: str
+    thread_id: int
+    method: str = ''
+    url: str = ''
+    status: Optional[int] = None
+    size: int = 0
+    retries: int = 0
+    duration: float = 0.0
+    phases: Dict[str, List[float]] = field(default_factory=dict)   # name -> [offset, duration]
+    _origin: float = field(default=0.0, repr=False)
+
+    def mark(self, phase: str, started: float, ended: float) -> None:
+        """Record a phase from two perf_counter readings."""
+        self.phases[phase] = [started - self._origin, ended - started]
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name, 'category': self.category, 'start': self.start,
+            'run_id': self.run_id, 'task': self.task, 'thread_id': self.thread_id,
+            'method': self.method, 'url': self.url, 'status': self.status, 'size': self.size,
+            'retries': self.retries, 'duration_ms': self.duration * 1000,
+            'phases_ms': {name: [offset * 1000, length * 1000] for name, (offset, length) in self.phases.items()},
+        }
+
+
+class _TimedConnectMixin:
+    """Split connection setup into DNS lookup and connect for the active trace record."""
+
+    def connect(self):
+        record = _current_record.get()
+        if record is None:
+            return super().connect()
+
+        host = self._dns_host
+        dns_started = time.perf_counter()
+        try:
+            self._dns_host = socket.getaddrinfo(host, self.port, 0, socket.SOCK_STREAM)[0][4][0]
+        except OSError:
+            pass  # let urllib3 raise its usual NameResolutionError
+        connect_started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            self._dns_host = host
+            record.mark('dns', dns_started, connect_started)
+            record.mark('connect', connect_started, time.perf_counter())
+
+
+class _TracingHTTPConnection(_TimedConnectMixin, HTTPConnection):
+    pass
+
+
+class _TracingHTTPSConnection(_TimedConnectMixin, HTTPSConnection):
+    pass
+
+
+class _TracingHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TracingHTTPConnection
+
+
+class _TracingHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TracingHTTPSConnection
+
+
+class TracingHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that reports connection, first-byte and retry data to the active trace record."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TracingHTTPConnectionPool,
+            'https': _TracingHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        record = _current_record.get()
+        started = time.perf_counter()
+        response = super().send(request, **kwargs)
+        if record is not None:
+            # send() returns once headers are in; the body is read afterwards
+            record.mark('ttfb', started, time.perf_counter())
+            retries = getattr(response.raw, 'retries', None)
+            record.retries = len(retries.history) if retries is not None else 0
+        return response
+
+
+class Tracer:
+    """Bounded in-memory store of trace records with Chrome-trace export."""
+
+    def __init__(self, max_records: int = 10000, enabled: bool = True, keep_files: int = TRACING_KEEP_FILES):
+        self.enabled = enabled
+        self.keep_files = keep_files
+        self._records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+        self._exports = 0
+
+    @contextmanager
+    def span(self, name: str, category: str = 'parse', method: str = '', url: str = ''):
+        """
+        Trace the enclosed block; HTTP calls made inside it fill in their phases.
+
+        Yields:
+            TraceRecord: The record, or None when tracing is disabled
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        context = get_log_context()
+        record = TraceRecord(
+            name=name, category=category, start=time.time(),
+            run_id=context['run_id'], task=context['task'], thread_id=threading.get_ident(),
+            method=method, url=url, _origin=time.perf_counter(),
+        )
+        token = _current_record.set(record)
+        try:
+            yield record
+        finally:
+            _current_record.reset(token)
+            record.duration = time.perf_counter() - record._origin
+            with self._lock:
+                self._records.append(record)
+            if category == 'http':
+                logger.debug(
+                    f"{method} {name} {record.status} {record.size}B in {record.duration * 1000:.1f} ms "
+                    f"(retries={record.retries}, phases={record.to_dict()['phases_ms']})"
+                )
+
+    @staticmethod
+    def record_response(record: Optional[TraceRecord], response) -> None:
+        """Copy status and size of a finished response onto its record."""
+        if record is None or response is None:
+            return
+        record.status = response.status_code
+        record.size = len(response.content)
+
+    def records(self) -> List[TraceRecord]:
+        with self._lock:
+            return list(self._records)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+
+    def to_chrome_trace(self) -> dict:
+        """Build a Chrome trace event document from the stored records."""
+        events = []
+        pid = os.getpid()
+        for record in self.records():
+            start_us = record.start * 1e6
+            args = record.to_dict()
+            events.append({
+                'name': record.name, 'cat': record.category, 'ph': 'X',
+                'ts': start_us, 'dur': record.duration * 1e6,
+                'pid': pid, 'tid': record.thread_id, 'args': args,
+            })
+            for phase, (offset, length) in record.phases.items():
+                events.append({
+                    'name': phase, 'cat': f'{record.category}.phase', 'ph': 'X',
+                    'ts': start_us + offset * 1e6, 'dur': length * 1e6,
+                    'pid': pid, 'tid': record.thread_id,
+                })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path: str = None) -> str:
+        """
+        Write the stored records as a Chrome trace JSON file.
+
+        Args:
+            path (str): Output file; defaults to logs/traces/trace-<run_id>-<time>-<n>.json,
+                a new file for every export, of which the newest keep_files are kept
+
+        Returns:
+            str: The path written
+        """
+        rotate = path is None
+        if path is None:
+            with self._lock:
+                self._exports += 1
+                number = self._exports
+            stamp = time.strftime('%Y%m%d-%H%M%S')
+            path = os.path.join(LOG_DIR, 'traces', f"trace-{get_log_context()['run_id']}-{stamp}-{number}.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f)
+        logger.info(f"Request trace written to {path}")
+        if rotate:
+            self._prune_traces(os.path.dirname(path))
+        return path
+
+    def _prune_traces(self, directory: str) -> None:
+        """Delete the oldest default trace files beyond keep_files, like log rotation."""
+        if self.keep_files <= 0:
+            return
+        try:
+            paths = [entry.path for entry in os.scandir(directory)
+                     if entry.is_file() and entry.name.startswith('trace-') and entry.name.endswith('.json')]
+            paths.sort(key=os.path.getmtime, reverse=True)
+            for stale in paths[self.keep_files:]:
+                os.remove(stale)
+        except OSError as e:
+            logger.warning(f"Could not remove old request traces: {str(e)}")